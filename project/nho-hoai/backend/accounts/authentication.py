@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+JWT_USER_CACHE_TTL_DEFAULT = 60  # seconds
+
+# per-process backends: an invalidation would never reach the other workers
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def shared_cache_problem(alias):
+    """Why CACHES[alias] cannot hold resolved users, or None if it can."""
+    config = settings.CACHES.get(alias)
+    if config is None:
+        return f"CACHES has no {alias!r} entry."
+    if config["BACKEND"] in LOCAL_CACHE_BACKENDS:
+        return (
+            f"CACHES[{alias!r}] ({config['BACKEND']}) is not shared between processes."
+        )
+    return None
+
+
+def _cache():
+    """The shared user cache, or None: caching is off without one."""
+    alias = getattr(settings, "JWT_USER_CACHE_ALIAS", None)
+    if alias is None or shared_cache_problem(alias):
+        return None
+    return caches[alias]
+
+
+def _cache_key(user_id):
+    return f"accounts:jwt-user:{user_id}"
+
+
+def _token_version(validated_token):
+    # simplejwt's revoke claim (password hash digest) when CHECK_REVOKE_TOKEN
+    # is on, else None: a token minted after a password change never matches
+    # a user cached for the old one.
+    return validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+
+
+def invalidate_cached_user(user_id):
+    cache = _cache()
+    if cache is not None:
+        cache.delete(_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from a short-TTL cache keyed by
+    user id (+ token version) instead of a SELECT on every request.
+
+    Only enabled with JWT_USER_CACHE_ALIAS naming a shared cache (Redis,
+    Memcached, database): with a per-process one (LocMem) a deactivated user
+    would stay logged in on the other workers, so it acts exactly like
+    JWTAuthentication, and the accounts.E001 check flags the setting.
+
+    Misses fall back to JWTAuthentication.get_user (DB lookup, is_active and
+    revoke checks). User saves/deletes invalidate the entry (accounts.signals).
+    QuerySet.update(), bulk_update() and raw SQL send no signal: call
+    invalidate_cached_user() after them, or the old user is served for up to
+    JWT_USER_CACHE_TTL.
+    """
+
+    def get_user(self, validated_token):
+        cache = _cache()
+        if cache is None:
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = _token_version(validated_token)
+
+        if user_id is not None:
+            hit = cache.get(_cache_key(user_id))
+            if hit is not None and hit[0] == version:
+                return hit[1]
+
+        user = super().get_user(validated_token)
+        cache.set(
+            _cache_key(user_id),
+            (version, user),
+            getattr(settings, "JWT_USER_CACHE_TTL", JWT_USER_CACHE_TTL_DEFAULT),
+        )
+        return user
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .authentication import shared_cache_problem
+
+
+@register()
+def check_jwt_user_cache(app_configs, **kwargs):
+    alias = getattr(settings, "JWT_USER_CACHE_ALIAS", None)
+    if alias is None:
+        return []
+    problem = shared_cache_problem(alias)
+    if problem is None:
+        return []
+    return [
+        Error(
+            f"JWT_USER_CACHE_ALIAS: {problem}",
+            hint=(
+                "Point it at a cache every worker shares (Redis, Memcached, "
+                "database) or unset it to turn the user cache off."
+            ),
+            id="accounts.E001",
+        )
+    ]
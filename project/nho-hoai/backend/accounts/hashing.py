@@ -0,0 +1,47 @@
+"""
+Parallel password hashing for bulk provisioning.
+
+PBKDF2 is CPU-bound and holds the GIL, so a process pool is the only way to
+use more than one core. Runs in `manage.py provision_users` and the
+"provision_users" job, never inside a web request. Kept free of model imports: spawned pool processes
+import this module before django.setup() runs in `_init_worker`.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+HASH_CHUNK = 50  # passwords per task (amortizes pickling / IPC)
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(p) for p in passwords]
+
+
+def hash_passwords(passwords, processes=None):
+    """make_password() for every item, in order; None -> unusable password."""
+    passwords = list(passwords)
+    processes = max(1, processes or os.cpu_count() or 1)
+    if processes == 1 or len(passwords) <= HASH_CHUNK:
+        return _hash_chunk(passwords)
+
+    chunks = [
+        passwords[i : i + HASH_CHUNK] for i in range(0, len(passwords), HASH_CHUNK)
+    ]
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool:
+        hashed = []
+        for part in pool.map(_hash_chunk, chunks):
+            hashed.extend(part)
+    return hashed
@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import (
+    CachedJWTAuthentication,
+    invalidate_cached_user,
+    shared_cache_problem,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare queries/time per authenticated request for JWTAuthentication "
+        "vs CachedJWTAuthentication (runs in a rolled-back transaction). "
+        "Needs JWT_USER_CACHE_ALIAS: without it both do the same lookup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        n = max(1, options["requests"])
+        alias = getattr(settings, "JWT_USER_CACHE_ALIAS", None)
+        problem = (
+            "JWT_USER_CACHE_ALIAS is not set."
+            if alias is None
+            else shared_cache_problem(alias)
+        )
+        if problem:
+            raise CommandError(
+                f"The user cache is off: {problem} Point JWT_USER_CACHE_ALIAS "
+                "at a shared cache (settings_production does so with REDIS_URL)."
+            )
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username="__bench_jwt_auth__", password=None
+            )
+            token = str(RefreshToken.for_user(user).access_token)
+            invalidate_cached_user(user.pk)
+
+            rows = []
+            for name, auth in (
+                ("JWTAuthentication", JWTAuthentication()),
+                ("CachedJWTAuthentication", CachedJWTAuthentication()),
+            ):
+                with CaptureQueriesContext(connection) as ctx:
+                    t0 = time.perf_counter()
+                    for _ in range(n):
+                        request = factory.get(
+                            "/api/auth/me/", HTTP_AUTHORIZATION=f"Bearer {token}"
+                        )
+                        auth.authenticate(request)
+                    elapsed = time.perf_counter() - t0
+                rows.append((name, len(ctx.captured_queries) / n, elapsed / n * 1e6))
+
+            invalidate_cached_user(user.pk)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{n} authenticated requests, user cache {alias!r}")
+        for name, qpr, us in rows:
+            self.stdout.write(f"  {name:<24} {qpr:.3f} queries/req  {us:8.1f} us/req")
+        saved = rows[0][1] - rows[1][1]
+        self.stdout.write(self.style.SUCCESS(f"saved {saved:.3f} queries/req"))
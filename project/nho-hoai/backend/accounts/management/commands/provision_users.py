@@ -0,0 +1,63 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.provisioning import (
+    PROVISION_MODES,
+    RosterError,
+    parse_roster,
+    provision_users,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV roster (username[,password,email]) with "
+        "parallel password hashing; optionally copy template decks to each. "
+        "Writes the credentials (or activation tokens) as CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("roster", help="CSV file path, or - for stdin.")
+        parser.add_argument("--mode", choices=PROVISION_MODES, default="password")
+        parser.add_argument(
+            "--template-deck",
+            type=int,
+            action="append",
+            default=[],
+            help="Deck id to copy to every new user (repeatable).",
+        )
+        parser.add_argument("--processes", type=int, default=None)
+        parser.add_argument("--output", default=None, help="CSV path (default stdout).")
+
+    def handle(self, *args, **options):
+        if options["roster"] == "-":
+            text = sys.stdin.read()
+        else:
+            with open(options["roster"], encoding="utf-8-sig") as f:
+                text = f.read()
+
+        try:
+            users = provision_users(
+                parse_roster(text),
+                mode=options["mode"],
+                template_deck_ids=options["template_deck"],
+                processes=options["processes"],
+            )
+        except RosterError as e:
+            lines = [f"{where}: {'; '.join(msgs)}" for where, msgs in e.errors.items()]
+            raise CommandError("Invalid roster:\n" + "\n".join(lines))
+
+        fields = ["id", "username"] + (
+            ["password"] if options["mode"] == "password" else ["uid", "token"]
+        )
+        out = open(options["output"], "w", newline="") if options["output"] else None
+        try:
+            writer = csv.DictWriter(out or self.stdout, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(users)
+        finally:
+            if out is not None:
+                out.close()
+        self.stderr.write(self.style.SUCCESS(f"Created {len(users)} user(s)."))
@@ -0,0 +1,211 @@
+"""
+Bulk user provisioning from a CSV roster (whole classes at once).
+
+Roster: header row with `username` and optional `password` / `email`
+columns (a single headerless column of usernames also works).
+
+mode="password": the CSV password (validated) or a generated one is hashed
+                 in a process pool; the output carries the plain passwords.
+mode="token":    users get an unusable password and a one-time activation
+                 token (POST /api/auth/activate/), no hashing at all.
+
+Hashing takes minutes for a large class, so the API only validates the
+roster and queues a "provision_users" job (learning/tasks.py). The job's
+credentials never go into Job.result: `save_credentials` writes them to a
+private file that `take_credentials` hands out once and deletes (unfetched
+files expire after CREDENTIALS_TTL).
+"""
+
+import csv
+import io
+import json
+import os
+import secrets
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .hashing import hash_passwords
+
+PROVISION_MODES = ("password", "token")
+ROSTER_MAX_ROWS = 10000
+USER_CHUNK = 500
+GENERATED_PASSWORD_BYTES = 9  # token_urlsafe -> 12 chars
+CREDENTIALS_TTL = 24 * 3600  # seconds an unfetched credentials file is kept
+
+
+class RosterError(Exception):
+    def __init__(self, errors):
+        super().__init__("invalid roster")
+        self.errors = errors  # {"row 3": ["..."], ...}
+
+
+def parse_roster(text):
+    """CSV text -> [{"username", "password", "email"}, ...]"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        raise RosterError({"csv": ["Roster is empty."]})
+
+    header = [h.strip().lower() for h in next(csv.reader([lines[0]]))]
+    if "username" in header:
+        reader = csv.DictReader(io.StringIO("\n".join(lines)), fieldnames=header)
+        next(reader)  # header row
+        raw = list(reader)
+    else:
+        raw = [{"username": r[0] if r else ""} for r in csv.reader(lines)]
+
+    if len(raw) > ROSTER_MAX_ROWS:
+        raise RosterError({"csv": [f"At most {ROSTER_MAX_ROWS} rows per roster."]})
+
+    return [
+        {
+            "username": (r.get("username") or "").strip(),
+            "password": r.get("password") or "",
+            "email": (r.get("email") or "").strip(),
+        }
+        for r in raw
+    ]
+
+
+def validate_roster(rows, mode):
+    """Raise RosterError listing every bad row (cheap: no hashing)."""
+    User = get_user_model()
+    errors = {}
+    seen = set()
+    for i, row in enumerate(rows, start=1):
+        row_errors = []
+        username = row["username"]
+        if not username:
+            row_errors.append("Username is required.")
+        else:
+            try:
+                User.username_validator(username)
+            except DjangoValidationError as e:
+                row_errors.extend(e.messages)
+            if username in seen:
+                row_errors.append("Duplicate username in roster.")
+            seen.add(username)
+        if mode == "password" and row["password"]:
+            try:
+                validate_password(row["password"], User(username=username))
+            except DjangoValidationError as e:
+                row_errors.extend(e.messages)
+        if row_errors:
+            errors[f"row {i}"] = row_errors
+
+    taken = set(
+        User.objects.filter(username__in=seen).values_list("username", flat=True)
+    )
+    for i, row in enumerate(rows, start=1):
+        if row["username"] in taken:
+            errors.setdefault(f"row {i}", []).append("Username already exists.")
+    if errors:
+        raise RosterError(errors)
+
+
+def provision_users(rows, *, mode="password", template_deck_ids=(), processes=None):
+    """
+    Create every roster user (all or nothing) and return one output row per
+    user: {"id", "username", "password"} or {"id", "username", "uid", "token"}.
+    """
+    from learning.deck_copy import clone_decks_for_users
+
+    if mode not in PROVISION_MODES:
+        raise ValueError(f"unknown provisioning mode {mode!r}")
+    validate_roster(rows, mode)
+
+    User = get_user_model()
+    if mode == "password":
+        plain = [
+            r["password"] or secrets.token_urlsafe(GENERATED_PASSWORD_BYTES)
+            for r in rows
+        ]
+        hashed = hash_passwords(plain, processes)
+    else:
+        plain = [None] * len(rows)
+        hashed = hash_passwords(plain, 1)  # unusable, no real hashing
+
+    users = [
+        User(username=r["username"], email=r["email"], password=h)
+        for r, h in zip(rows, hashed)
+    ]
+    with transaction.atomic():
+        # SQLite >= 3.35 / PostgreSQL set the new pks on `users`
+        User.objects.bulk_create(users, batch_size=USER_CHUNK)
+        if template_deck_ids:
+            clone_decks_for_users(list(template_deck_ids), [u.pk for u in users])
+
+    out = []
+    for user, password in zip(users, plain):
+        row = {"id": user.pk, "username": user.username}
+        if mode == "password":
+            row["password"] = password
+        else:
+            row["uid"] = urlsafe_base64_encode(force_bytes(user.pk))
+            row["token"] = default_token_generator.make_token(user)
+        out.append(row)
+    return out
+
+
+def credentials_dir():
+    return Path(settings.PROVISIONING_CREDENTIALS_DIR)
+
+
+def _credentials_path(job_id):
+    return credentials_dir() / f"job-{int(job_id)}.json"
+
+
+def prune_credentials(now=None):
+    """Delete credentials files nobody fetched within CREDENTIALS_TTL."""
+    cutoff = (now or time.time()) - CREDENTIALS_TTL
+    removed = 0
+    for path in credentials_dir().glob("job-*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def save_credentials(job_id, users):
+    """Store a job's output rows for one `take_credentials` (owner-only file)."""
+    directory = credentials_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    prune_credentials()
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")  # mode 0600
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(users, f)
+        os.replace(tmp, _credentials_path(job_id))
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def take_credentials(job_id):
+    """A job's credentials rows, or None once fetched (or expired)."""
+    path = _credentials_path(job_id)
+    # the rename is the claim: of two concurrent fetches only one gets the file
+    taken = path.with_name(f"{path.name}.{secrets.token_hex(8)}.taken")
+    try:
+        os.rename(path, taken)
+    except FileNotFoundError:
+        return None
+    try:
+        if taken.stat().st_mtime < time.time() - CREDENTIALS_TTL:
+            return None
+        with open(taken, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        taken.unlink(missing_ok=True)
@@ -1,3 +1,78 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from learning.jobs import run_job
+from learning.models import Job
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProvisionUsersTests(TestCase):
+    def setUp(self):
+        self.credentials_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.credentials_dir, ignore_errors=True)
+        settings = override_settings(PROVISIONING_CREDENTIALS_DIR=self.credentials_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.staff = User.objects.create_user("teacher", password="pw", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def provision(self, csv, mode):
+        response = self.client.post(
+            "/api/auth/provision/", {"csv": csv, "mode": mode}, format="json"
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        job_id = response.data["id"]
+        self.assertEqual(run_job(job_id), (job_id, True))
+        return Job.objects.get(id=job_id)
+
+    def assert_no_secrets(self, job, *secrets):
+        stored = json.dumps([job.payload, job.result])
+        for secret in secrets:
+            self.assertNotIn(secret, stored)
+
+    def test_passwords_are_handed_out_once_and_never_stored(self):
+        job = self.provision(
+            "username,password\nstudent1,Zebra-Lantern-71\nstudent2,", "password"
+        )
+        self.assertEqual(job.result["created"], 2)
+        self.assertEqual(
+            [set(u) for u in job.result["users"]], [{"id", "username"}] * 2
+        )
+        self.assertNotIn("password", json.dumps(job.result))
+
+        url = job.result["credentials_url"]
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        users = {u["username"]: u["password"] for u in response.data["users"]}
+        self.assertEqual(users["student1"], "Zebra-Lantern-71")
+        self.assertTrue(
+            User.objects.get(username="student2").check_password(users["student2"])
+        )
+        job.refresh_from_db()
+        self.assert_no_secrets(job, *users.values())
+
+        self.assertEqual(self.client.get(url).status_code, 410)
+
+    def test_activation_tokens_are_not_stored(self):
+        job = self.provision("student3", "token")
+        response = self.client.get(job.result["credentials_url"])
+        self.assertEqual(response.status_code, 200)
+        (user,) = response.data["users"]
+        self.assert_no_secrets(job, user["token"])
+
+    def test_credentials_only_for_the_job_owner(self):
+        job = self.provision("student4", "token")
+        other = User.objects.create_user("teacher2", password="pw", is_staff=True)
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get(job.result["credentials_url"]).status_code, 404
+        )
@@ -1,11 +1,24 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .views import MeView, RegisterView
+from .views import (
+    ActivateView,
+    MeView,
+    ProvisionCredentialsView,
+    ProvisionUsersView,
+    RegisterView,
+)
 
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("me/", MeView.as_view(), name="me"),
+    path("provision/", ProvisionUsersView.as_view(), name="provision_users"),
+    path(
+        "provision/<int:job_id>/credentials/",
+        ProvisionCredentialsView.as_view(),
+        name="provision_credentials",
+    ),
+    path("activate/", ActivateView.as_view(), name="activate"),
 ]
@@ -1,11 +1,33 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ValidationError as DjangoValidationError
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.utils.http import urlsafe_base64_decode
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .provisioning import (
+    PROVISION_MODES,
+    RosterError,
+    parse_roster,
+    take_credentials,
+    validate_roster,
+)
+
+
+def _token_response(user, status):
+    refresh = RefreshToken.for_user(user)
+    return Response(
+        {
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
+            "user": {"id": user.id, "username": user.username},
+        },
+        status=status,
+    )
+
 
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
@@ -54,13 +76,124 @@ class RegisterView(APIView):
             return Response({"errors": errors}, status=400)
 
         user = User.objects.create_user(username=username, password=password)
+        return _token_response(user, 201)
+
+
+class ProvisionUsersView(APIView):
+    """
+    POST /api/auth/provision/   (staff only)
+    body: multipart `file` or JSON `csv` (roster text),
+          mode?: "password" | "token", template_deck_ids?: [...]
+    returns: 202 + job; the roster is validated here, users are created by
+    the "provision_users" job. Poll GET /api/jobs/{job_id}/: its result is
+    { created, users: [{id, username}], credentials_url }
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        from learning.jobs import enqueue
+        from learning.models import Deck
+        from learning.serializers import JobSerializer
+
+        upload = request.FILES.get("file")
+        if upload is not None:
+            text = upload.read().decode("utf-8-sig", errors="replace")
+        else:
+            text = request.data.get("csv") or ""
+
+        mode = request.data.get("mode") or "password"
+        if mode not in PROVISION_MODES:
+            return Response({"errors": {"mode": ["Unknown mode."]}}, status=400)
+
+        deck_ids = request.data.get("template_deck_ids") or []
+        if isinstance(deck_ids, str):  # multipart: "1,2"
+            deck_ids = deck_ids.split(",")
+        if not isinstance(deck_ids, list):
+            return Response(
+                {"errors": {"template_deck_ids": ["Must be a list."]}}, status=400
+            )
+        deck_ids = {int(x) for x in deck_ids if str(x).strip().isdigit()}
+        if Deck.objects.filter(id__in=deck_ids).count() != len(deck_ids):
+            return Response(
+                {"errors": {"template_deck_ids": ["Unknown deck id."]}}, status=400
+            )
+
+        try:
+            rows = parse_roster(text)
+            validate_roster(rows, mode)
+        except RosterError as e:
+            return Response({"errors": e.errors}, status=400)
 
-        refresh = RefreshToken.for_user(user)
-        return Response(
-            {
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-                "user": {"id": user.id, "username": user.username},
-            },
-            status=201,
+        # not retried: a second run would find the first run's usernames taken
+        job = enqueue(
+            "provision_users",
+            user=request.user,
+            max_attempts=1,
+            rows=rows,
+            mode=mode,
+            template_deck_ids=sorted(deck_ids),
         )
+        return Response(JobSerializer(job).data, status=202)
+
+
+class ProvisionCredentialsView(APIView):
+    """
+    GET /api/auth/provision/{job_id}/credentials/   (staff, the job's owner)
+    returns: { users: [{id, username, password | uid, token}] } exactly once;
+    410 once fetched or expired, 404 while the job has not finished
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, job_id):
+        from learning.models import Job
+
+        job = Job.objects.filter(
+            id=job_id, user=request.user, kind="provision_users"
+        ).first()
+        if job is None or job.status != Job.SUCCEEDED:
+            return Response({"detail": "Not found."}, status=404)
+        users = take_credentials(job.id)
+        if users is None:
+            return Response(
+                {"detail": "Credentials were already downloaded or have expired."},
+                status=410,
+            )
+        return Response({"users": users}, headers={"Cache-Control": "no-store"})
+
+
+class ActivateView(APIView):
+    """
+    POST /api/auth/activate/
+    body: { uid, token, password }  (one-time token from provisioning)
+    returns: { access, refresh, user }
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        User = get_user_model()
+
+        uid = request.data.get("uid") or ""
+        token = request.data.get("token") or ""
+        password = request.data.get("password") or ""
+
+        try:
+            user = User.objects.get(pk=urlsafe_base64_decode(uid).decode())
+        except (ValueError, TypeError, OverflowError, User.DoesNotExist):
+            user = None
+        # the token hashes the current password: setting one invalidates it
+        if user is None or not default_token_generator.check_token(user, token):
+            return Response(
+                {"errors": {"token": ["Invalid or expired token."]}}, status=400
+            )
+
+        try:
+            validate_password(password, user)
+        except DjangoValidationError as e:
+            return Response({"errors": {"password": list(e.messages)}}, status=400)
+
+        user.set_password(password)
+        user.save(update_fields=["password"])
+        return _token_response(user, 200)
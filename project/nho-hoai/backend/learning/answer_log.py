@@ -0,0 +1,505 @@
+"""
+Write-behind mode for study_answer (settings.LEARNING_WRITE_BEHIND).
+
+Each answer is appended (fsync) to a per-process JSONL log instead of doing
+INSERT + 2 UPDATEs inline. A background thread flushes the log to the DB in
+batched transactions every FLUSH_INTERVAL seconds (or sooner when BATCH_SIZE
+answers are waiting), so the DB write lock is taken once per batch.
+
+- read-your-writes: summaries read every log file (`logged_answers`) before
+  opening their DB snapshot and drop the entries the snapshot already has
+  (`unflushed`), so each answer counts exactly once. study_answer only
+  overlays this process' in-memory backlog.
+- crash recovery: every process holds an flock on answers-<pid>.lock for
+  its whole life, so a log whose lock can be taken belongs to a dead process.
+  A starting process takes such logs over into its own backlog;
+  `manage.py replay_answer_log` writes them to the DB and never touches the
+  log of a live process. Replay is idempotent: an entry whose
+  (session, card, answered_at) already exists is skipped, and the unique
+  constraint on those columns stops two writers that race on it.
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .budget import UsageDeltas, bump_daily_counts
+from .groups import AnswerDeltas, bump_group_stats
+from .models import Card, CardProgress, StudyAnswer, StudySession
+from .replica import pin_primary
+from .srs import SRS_FIELDS, apply_srs, count_late_answer
+from .stats import invalidate_deck_stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "LOG_DIR": None,
+    "FLUSH_INTERVAL": 1.0,
+    "BATCH_SIZE": 500,
+}
+
+LOG_GLOB = "answers-*.jsonl"
+
+
+def _lock_path(log_path):
+    return log_path.with_suffix(".lock")
+
+
+def _lock_file(path, blocking=True):
+    """
+    flock `path` (created if missing); returns the open fd, or None when a
+    live process holds it. Retries if the file was unlinked by its previous
+    holder while we waited, so two holders never lock different inodes.
+    """
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        try:
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def _remove_log(path, lock_fd):
+    """Delete a dead process' log, then its lock (still held)."""
+    path.unlink(missing_ok=True)
+    _lock_path(path).unlink(missing_ok=True)
+    os.close(lock_fd)
+
+
+def orphaned_logs(log_dir):
+    """(path, lock fd) of every log in `log_dir` whose process is gone."""
+    for path in sorted(Path(log_dir).glob(LOG_GLOB)):
+        fd = _lock_file(_lock_path(path), blocking=False)
+        if fd is None:
+            continue  # a live process' log
+        if not path.exists():  # removed by whoever held the lock before us
+            _lock_path(path).unlink(missing_ok=True)
+            os.close(fd)
+            continue
+        yield path, fd
+
+
+def get_config():
+    cfg = dict(DEFAULTS)
+    cfg.update(getattr(settings, "LEARNING_WRITE_BEHIND", None) or {})
+    if cfg["LOG_DIR"] is None:
+        cfg["LOG_DIR"] = Path(settings.BASE_DIR) / "var" / "answer-log"
+    cfg["LOG_DIR"] = Path(cfg["LOG_DIR"])
+    return cfg
+
+
+def is_enabled():
+    return bool(get_config()["ENABLED"])
+
+
+def _encode(entry):
+    return json.dumps(
+        {**entry, "answered_at": entry["answered_at"].isoformat()},
+        separators=(",", ":"),
+    )
+
+
+def _decode(line):
+    data = json.loads(line)
+    return {
+        "session_id": int(data["session_id"]),
+        "user_id": int(data["user_id"]),
+        "card_id": int(data["card_id"]),
+        "is_correct": bool(data["is_correct"]),
+        "answered_at": datetime.fromisoformat(data["answered_at"]),
+    }
+
+
+def _key(entry):
+    return (entry["session_id"], entry["card_id"], entry["answered_at"])
+
+
+def read_log_file(path):
+    entries = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(_decode(line))
+                except (ValueError, KeyError, TypeError):
+                    # torn write at the tail of a crashed log
+                    continue
+    except FileNotFoundError:
+        return []
+    return entries
+
+
+def _already_flushed(entries):
+    """Keys of `entries` that already have a StudyAnswer row."""
+    if not entries:
+        return set()
+    rows = StudyAnswer.objects.filter(
+        session_id__in={e["session_id"] for e in entries},
+        answered_at__gte=min(e["answered_at"] for e in entries),
+    ).values_list("session_id", "card_id", "answered_at")
+    return set(rows)
+
+
+def write_entries(entries):
+    """
+    Apply a batch of logged answers in one transaction:
+      - bulk INSERT StudyAnswer
+      - replay apply_srs in answer order, then bulk UPDATE/INSERT CardProgress
+        (answers older than the row's last_answered_at only count in the
+        totals: they must not move the schedule back)
+      - one F() UPDATE per session for the counters
+      - class aggregates (GroupCardStat) for the answering users' groups
+      - daily budget counters (DailyStudyCount)
+    The answering users are pinned to the primary once it commits.
+    Returns the entries written, in answer order (duplicates/orphans skipped).
+    """
+    if not entries:
+        return []
+
+    with transaction.atomic():
+        # row locks (PostgreSQL) serialize batches of the same sessions, so
+        # the duplicate check below sees what a concurrent batch committed
+        live_sessions = set(
+            StudySession.objects.filter(id__in={e["session_id"] for e in entries})
+            .order_by("id")
+            .select_for_update()
+            .values_list("id", flat=True)
+        )
+        done = _already_flushed(entries)
+        live_cards = dict(
+            Card.objects.filter(id__in={e["card_id"] for e in entries}).values_list(
+                "id", "deck_id"
+            )
+        )
+        todo = [
+            e
+            for e in entries
+            if _key(e) not in done
+            and e["session_id"] in live_sessions
+            and e["card_id"] in live_cards
+        ]
+        if not todo:
+            return []
+
+        todo.sort(key=lambda e: e["answered_at"])
+
+        StudyAnswer.objects.bulk_create(
+            [
+                StudyAnswer(
+                    session_id=e["session_id"],
+                    card_id=e["card_id"],
+                    is_correct=e["is_correct"],
+                    answered_at=e["answered_at"],
+                )
+                for e in todo
+            ],
+            ignore_conflicts=True,  # backstop for the unique constraint
+        )
+
+        prog_map = {
+            (p.user_id, p.card_id): p
+            for p in CardProgress.objects.filter(
+                user_id__in={e["user_id"] for e in todo},
+                card_id__in={e["card_id"] for e in todo},
+            )
+        }
+        touched = {}
+        created = {}
+        group_deltas = AnswerDeltas()
+        usage = UsageDeltas()
+        for e in todo:
+            pair = (e["user_id"], e["card_id"])
+            p = prog_map.get(pair)
+            if p is not None:
+                touched[pair] = p
+            else:
+                p = created.get(pair)
+                if p is None:
+                    p = CardProgress(user_id=e["user_id"], card_id=e["card_id"])
+                    created[pair] = p
+            old_difficulty = p.difficulty_score
+            first_answer = p.total_correct + p.total_wrong == 0
+            if p.last_answered_at is not None and e["answered_at"] < p.last_answered_at:
+                count_late_answer(p, e["is_correct"])
+            else:
+                usage.add(p, e["answered_at"], first_answer=first_answer)
+                apply_srs(p, e["is_correct"], now=e["answered_at"], save=False)
+            group_deltas.add(p, e["is_correct"], old_difficulty, first_answer)
+
+        now = timezone.now()
+        for p in touched.values():
+            p.updated_at = now
+        if touched:
+            CardProgress.objects.bulk_update(touched.values(), SRS_FIELDS)
+        if created:
+            CardProgress.objects.bulk_create(created.values())
+
+        deltas = {}
+        for e in todo:
+            d = deltas.setdefault(e["session_id"], [0, 0, 0])
+            d[0] += 1
+            d[1 if e["is_correct"] else 2] += 1
+        for sid, (total, correct, wrong) in deltas.items():
+            StudySession.objects.filter(id=sid).update(
+                total_answered=F("total_answered") + total,
+                correct_count=F("correct_count") + correct,
+                wrong_count=F("wrong_count") + wrong,
+            )
+
+        bump_group_stats(group_deltas)
+        bump_daily_counts(usage)
+
+    touched_decks = {}
+    for e in todo:
+        touched_decks.setdefault(e["user_id"], set()).add(live_cards[e["card_id"]])
+    for user_id, deck_ids in touched_decks.items():
+        invalidate_deck_stats(user_id, deck_ids)
+        pin_primary(user_id)  # the replica has these rows only after its next refresh
+
+    return todo
+
+
+class AnswerLog:
+    """Per-process append log + background flusher."""
+
+    def __init__(self, log_dir, flush_interval, batch_size):
+        self.log_dir = Path(log_dir)
+        self.pid = os.getpid()
+        self.path = self.log_dir / f"answers-{self.pid}.jsonl"
+        self.flush_interval = float(flush_interval)
+        self.batch_size = max(1, int(batch_size))
+
+        self._lock = threading.Lock()  # guards _pending + file handle
+        self._flush_lock = threading.Lock()  # one flusher at a time
+        self._wake = threading.Event()
+        self._pending = []
+        self._fh = None
+        self._lock_fd = None
+
+    def start(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        # held until this process exits: marks the log as live
+        self._lock_fd = _lock_file(_lock_path(self.path))
+        # a previous process with this pid died before flushing
+        self._pending = read_log_file(self.path)
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._adopt_orphans()
+        threading.Thread(
+            target=self._run, name="answer-log-flusher", daemon=True
+        ).start()
+        atexit.register(self.flush_all)
+
+    def _adopt_orphans(self):
+        """Move the backlog of dead processes' logs into this one."""
+        for path, fd in orphaned_logs(self.log_dir):
+            if path == self.path:
+                os.close(fd)
+                continue
+            entries = read_log_file(path)
+            for e in entries:
+                self._fh.write(_encode(e) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())  # in our log before theirs is gone
+            self._pending.extend(entries)
+            _remove_log(path, fd)
+            if entries:
+                logger.info(
+                    "answer log: took over %d entries of %s", len(entries), path
+                )
+
+    def forget_inherited(self):
+        """In a forked child: drop the parent's lock fd (the lock stays with it)."""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def append(self, entry):
+        line = _encode(entry) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._pending.append(entry)
+            n = len(self._pending)
+        if n >= self.batch_size:
+            self._wake.set()
+
+    def pending_for(self, session_id):
+        """This process' unflushed entries of one session."""
+        with self._lock:
+            return [e for e in self._pending if e["session_id"] == session_id]
+
+    def flush(self):
+        """Flush one batch; returns how many entries left the log."""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[: self.batch_size]
+            if not batch:
+                return 0
+            write_entries(batch)
+            with self._lock:
+                del self._pending[: len(batch)]
+                self._compact()
+            return len(batch)
+
+    def flush_all(self):
+        while self.flush():
+            pass
+
+    def _compact(self):
+        # rewrite the log with only the unflushed tail (caller holds _lock)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in self._pending:
+                f.write(_encode(e) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._fh.close()
+        os.replace(tmp, self.path)
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush_all()
+            except Exception:
+                logger.exception("answer log flush failed; will retry")
+            finally:
+                close_old_connections()
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_answer_log():
+    global _log
+    # re-create after fork (gunicorn --preload): pid, thread and fd are per process
+    if _log is None or _log.pid != os.getpid():
+        with _log_lock:
+            if _log is None or _log.pid != os.getpid():
+                if _log is not None:
+                    _log.forget_inherited()
+                cfg = get_config()
+                log = AnswerLog(
+                    cfg["LOG_DIR"], cfg["FLUSH_INTERVAL"], cfg["BATCH_SIZE"]
+                )
+                log.start()
+                _log = log
+    return _log
+
+
+def logged_answers(session_id):
+    """
+    Entries of `session_id` in any process' log. Read them before the DB
+    snapshot they are merged with: an entry flushed (and compacted away) in
+    between is then in the snapshot, never in neither.
+    """
+    log_dir = get_config()["LOG_DIR"]
+    entries = []
+    for path in sorted(log_dir.glob(LOG_GLOB)):
+        entries.extend(e for e in read_log_file(path) if e["session_id"] == session_id)
+    return entries
+
+
+def unflushed(entries):
+    """The `entries` without a StudyAnswer row (read in the caller's snapshot)."""
+    if not entries:
+        return []
+    done = _already_flushed(entries)
+    return [e for e in entries if _key(e) not in done]
+
+
+def overlay_pending(session, prog_map, pending):
+    """
+    Apply pending answers to in-memory session counters and progress rows.
+    An answer not newer than the row's last_answered_at is already in it.
+    """
+    for e in sorted(pending, key=lambda e: e["answered_at"]):
+        session.total_answered += 1
+        if e["is_correct"]:
+            session.correct_count += 1
+        else:
+            session.wrong_count += 1
+
+        p = prog_map.get(e["card_id"])
+        if p is None:
+            p = CardProgress(user_id=e["user_id"], card_id=e["card_id"])
+            prog_map[e["card_id"]] = p
+        if p.last_answered_at is None or e["answered_at"] > p.last_answered_at:
+            apply_srs(p, e["is_correct"], now=e["answered_at"], save=False)
+
+
+def record_answer(user, session, card, is_correct):
+    """
+    Write-behind replacement for study_answer's INSERT + UPDATEs.
+    Returns the projected CardProgress; the counters of `session` (as loaded
+    by the view) get this process' unflushed answers of it added in memory.
+    Another worker's backlog shows up in the summary, not here.
+    """
+    entry = {
+        "session_id": session.id,
+        "user_id": user.id,
+        "card_id": card.id,
+        "is_correct": bool(is_correct),
+        "answered_at": timezone.now(),
+    }
+
+    log = get_answer_log()
+    # backlog first: an entry flushed before the row is read is in the row,
+    # and overlay_pending skips it by last_answered_at
+    pending = log.pending_for(session.id)
+    progress = CardProgress.objects.filter(user=user, card=card).first()
+    prog_map = {card.id: progress} if progress is not None else {}
+    log.append(entry)
+    # no DB write for ReplicaRouter to notice; write_entries pins again on flush
+    pin_primary(user.id)
+    overlay_pending(session, prog_map, pending + [entry])
+
+    return prog_map[card.id]
+
+
+def replay_log_dir(log_dir=None, batch_size=None):
+    """
+    Replay the logs of dead processes in `log_dir` into the DB and remove
+    them; logs of running processes are left to their owners.
+    """
+    cfg = get_config()
+    log_dir = Path(log_dir or cfg["LOG_DIR"])
+    batch_size = int(batch_size or cfg["BATCH_SIZE"])
+
+    files = written = 0
+    for path, fd in orphaned_logs(log_dir):
+        try:
+            entries = read_log_file(path)
+            for i in range(0, len(entries), batch_size):
+                written += len(write_entries(entries[i : i + batch_size]))
+        except BaseException:
+            os.close(fd)
+            raise
+        _remove_log(path, fd)
+        files += 1
+    return files, written
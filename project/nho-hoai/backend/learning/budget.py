@@ -0,0 +1,114 @@
+"""
+Per-user daily study budgets.
+
+StudyLimits holds a user's limits (REVIEWS_PER_DAY_DEFAULT /
+NEW_PER_DAY_DEFAULT without a row) and time zone. Every answer bumps the
+user's DailyStudyCount row for the day with F() (INSERT on the first answer of
+the day): an answer to a due card counts as a review, a card's first-ever
+answer as a new card, anything else (carry-over, hard drills) is free. The
+session pickers turn what is left into SQL LIMITs. Days are calendar days in
+the user's time zone, so the budget resets at their midnight, not UTC's.
+"""
+
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyStudyCount, StudyLimits
+
+REVIEWS_PER_DAY_DEFAULT = 200
+NEW_PER_DAY_DEFAULT = 20
+LIMIT_MAX = 9999
+
+
+def get_limits(user):
+    """(reviews_per_day, new_per_day, time_zone)."""
+    row = (
+        StudyLimits.objects.filter(user=user)
+        .values_list("reviews_per_day", "new_per_day", "time_zone")
+        .first()
+    )
+    return row or (REVIEWS_PER_DAY_DEFAULT, NEW_PER_DAY_DEFAULT, "")
+
+
+def user_zone(time_zone):
+    """tzinfo of a StudyLimits.time_zone value ("" or unknown = TIME_ZONE)."""
+    if time_zone:
+        try:
+            return ZoneInfo(time_zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.get_default_timezone()
+
+
+def study_day(when, time_zone=""):
+    return timezone.localdate(when, user_zone(time_zone))
+
+
+def today_counts(user, now=None, time_zone=None):
+    """(reviews, new_cards) answered today (`time_zone` None: look it up)."""
+    if time_zone is None:
+        time_zone = get_limits(user)[2]
+    day = study_day(now or timezone.now(), time_zone)
+    row = (
+        DailyStudyCount.objects.filter(user=user, day=day)
+        .values_list("reviews", "new_cards")
+        .first()
+    )
+    return row or (0, 0)
+
+
+def remaining_budget(user, now=None):
+    reviews_per_day, new_per_day, time_zone = get_limits(user)
+    reviews, new_cards = today_counts(user, now, time_zone)
+    return {
+        "reviews_left": max(0, reviews_per_day - reviews),
+        "new_left": max(0, new_per_day - new_cards),
+    }
+
+
+class UsageDeltas:
+    """
+    Collects consumption while answers are applied; bump_daily_counts()
+    sorts it into (user, day) rows in each user's time zone.
+    """
+
+    def __init__(self):
+        self.answers = []
+
+    def add(self, progress, answered_at, *, first_answer):
+        """Call before apply_srs: `progress.due_at` must be the old value."""
+        due = not first_answer and progress.due_at <= answered_at
+        if not (first_answer or due):
+            return
+        self.answers.append((progress.user_id, answered_at, due, first_answer))
+
+
+def bump_daily_counts(deltas):
+    if not deltas.answers:
+        return 0
+    zones = dict(
+        StudyLimits.objects.filter(
+            user_id__in={a[0] for a in deltas.answers}
+        ).values_list("user_id", "time_zone")
+    )
+    rows = {}
+    for user_id, answered_at, due, first_answer in deltas.answers:
+        key = (user_id, study_day(answered_at, zones.get(user_id, "")))
+        d = rows.setdefault(key, [0, 0])
+        d[0] += 1 if due else 0
+        d[1] += 1 if first_answer else 0
+
+    with transaction.atomic():
+        DailyStudyCount.objects.bulk_create(
+            [DailyStudyCount(user_id=u, day=day) for u, day in rows],
+            ignore_conflicts=True,
+        )
+        for (user_id, day), (reviews, new_cards) in rows.items():
+            DailyStudyCount.objects.filter(user_id=user_id, day=day).update(
+                reviews=F("reviews") + reviews,
+                new_cards=F("new_cards") + new_cards,
+            )
+    return len(rows)
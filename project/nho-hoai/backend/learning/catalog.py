@@ -0,0 +1,164 @@
+"""
+Public deck catalog (GET /api/decks/catalog/).
+
+Popularity is read from denormalized Deck counters, so catalog requests never
+touch StudySession / CardProgress: subscriber_count moves with subscribe /
+unsubscribe (F() +/- 1); active_learners (distinct learners with a session in
+the last ACTIVITY_WINDOW) and card_count are recounted by the
+"refresh_catalog" job, which also repairs subscriber_count drift (cascading
+user deletes). Publishing a deck queues a refresh of that deck; until a job
+runner has taken it, a page build recounts the decks still at card_count 0
+(`count_uncounted`), so a fresh catalog never lists populated decks as empty.
+
+Pages are keyset-paginated on the counters and cached whole for CATALOG_TTL
+seconds. Past that, the first request takes a cache.add() lock and rebuilds
+the page while the others keep serving the stale copy; on a cold miss they
+wait up to LOCK_WAIT for it instead of all querying at once.
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import Card, Deck, DeckSubscription, Job, StudySession
+
+ACTIVITY_WINDOW = timedelta(days=7)
+CATALOG_TTL = 30  # seconds a page is served without a rebuild
+CATALOG_STALE_TTL = 300  # then served stale while one request rebuilds it
+LOCK_TTL = 10  # a rebuild that crashed releases the page after this
+LOCK_WAIT = 2.0  # cold miss: seconds to wait for another request's rebuild
+LOCK_POLL = 0.05
+
+CATALOG_FIELDS = [
+    "id",
+    "title",
+    "source_lang",
+    "target_lang",
+    "owner_name",
+    "card_count",
+    "subscriber_count",
+    "active_learners",
+    "updated_at",
+]
+
+
+def catalog_queryset(source_lang=None, target_lang=None):
+    qs = Deck.objects.filter(published=True)
+    if source_lang:
+        qs = qs.filter(source_lang=source_lang)
+    if target_lang:
+        qs = qs.filter(target_lang=target_lang)
+    return qs.annotate(owner_name=F("owner__username")).values(*CATALOG_FIELDS)
+
+
+def adjust_subscriber_count(deck_id, delta):
+    qs = Deck.objects.filter(id=deck_id)
+    if delta < 0:
+        qs = qs.filter(subscriber_count__gte=-delta)
+    qs.update(subscriber_count=F("subscriber_count") + delta)
+
+
+def _counts(qs, value="id", distinct=False):
+    return dict(
+        qs.order_by()
+        .values("deck_id")
+        .annotate(n=Count(value, distinct=distinct))
+        .values_list("deck_id", "n")
+    )
+
+
+def refresh_popularity(deck_ids=None, now=None):
+    """Recount the counters of published decks; returns how many changed."""
+    cutoff = (now or timezone.now()) - ACTIVITY_WINDOW
+    decks = Deck.objects.filter(published=True)
+    related = {"deck__published": True}
+    if deck_ids is not None:
+        decks = decks.filter(id__in=deck_ids)
+        related["deck_id__in"] = deck_ids
+    decks = list(
+        decks.order_by().only("id", "subscriber_count", "active_learners", "card_count")
+    )
+    subscribers = _counts(DeckSubscription.objects.filter(**related))
+    learners = _counts(
+        StudySession.objects.filter(started_at__gte=cutoff, **related),
+        "user",
+        distinct=True,
+    )
+    cards = _counts(Card.objects.filter(**related))
+
+    changed = []
+    for d in decks:
+        counts = (subscribers.get(d.id, 0), learners.get(d.id, 0), cards.get(d.id, 0))
+        if counts != (d.subscriber_count, d.active_learners, d.card_count):
+            d.subscriber_count, d.active_learners, d.card_count = counts
+            changed.append(d)
+    with transaction.atomic():
+        # not save(): Deck.updated_at drives sync and conditional GETs
+        Deck.objects.bulk_update(
+            changed,
+            ["subscriber_count", "active_learners", "card_count"],
+            batch_size=500,
+        )
+    return len(changed)
+
+
+def count_uncounted(source_lang=None, target_lang=None):
+    """Recount published decks never counted (card_count 0) before a page build."""
+    qs = Deck.objects.filter(published=True, card_count=0)
+    if source_lang:
+        qs = qs.filter(source_lang=source_lang)
+    if target_lang:
+        qs = qs.filter(target_lang=target_lang)
+    deck_ids = list(qs.order_by().values_list("id", flat=True))
+    return refresh_popularity(deck_ids) if deck_ids else 0
+
+
+def schedule_catalog_refresh(*deck_ids):
+    """Queue a refresh of newly published decks unless one is already waiting."""
+    for deck_id in {d for d in deck_ids if d}:
+        waiting = Job.objects.filter(
+            kind="refresh_catalog", status=Job.QUEUED, payload__deck_id=deck_id
+        ).exists()
+        if not waiting:
+            enqueue("refresh_catalog", deck_id=deck_id)
+
+
+def page_cache_key(*parts):
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f"learning:catalog:{digest}"
+
+
+def cached_page(key, build):
+    """`build()` result cached under `key` with stale-while-rebuild locking."""
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry["page"]
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, LOCK_TTL):
+        try:
+            page = build()
+            cache.set(
+                key,
+                {"page": page, "fresh_until": time.time() + CATALOG_TTL},
+                CATALOG_TTL + CATALOG_STALE_TTL,
+            )
+        finally:
+            cache.delete(lock_key)
+        return page
+    if entry is not None:
+        return entry["page"]  # someone else is rebuilding it
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["page"]
+    return build()
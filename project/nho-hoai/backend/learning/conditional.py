@@ -0,0 +1,100 @@
+"""
+Conditional GET for deck resources.
+
+Validators come from two Deck columns, never from the card rows:
+  - Deck.updated_at        -> deck fields changed
+  - Deck.cards_changed_at  -> a card of the deck was added/edited/removed
+Every code path that writes cards must call `mark_cards_changed`.
+Subscribers of a shared deck also see their own CardOverride rows and the
+deck list changes with their subscriptions; both are folded in below.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import CardOverride, Deck, DeckSubscription
+from .sharing import readable_decks
+
+
+def mark_cards_changed(*deck_ids):
+    deck_ids = {d for d in deck_ids if d}
+    if deck_ids:
+        Deck.objects.filter(id__in=deck_ids).update(cards_changed_at=timezone.now())
+
+
+def _etag(request, *parts):
+    # ?fields= changes the body, so it is part of the validator
+    raw = "|".join(str(p) for p in parts + (request.query_params.get("fields", ""),))
+    return '"%s"' % hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def deck_validators(request, user, deck_id, kind):
+    """(etag, last_modified) for one deck (`kind` = "deck" | "cards")."""
+    rows = list(
+        readable_decks(user)
+        .filter(id=deck_id)
+        .order_by()
+        .values("owner_id", "updated_at", "cards_changed_at")[:1]
+    )
+    if not rows:
+        return None, None
+    row = rows[0]
+    parts = [kind, deck_id, row["updated_at"], row["cards_changed_at"]]
+    last_modified = max(row["updated_at"], row["cards_changed_at"])
+    if kind == "cards" and row["owner_id"] != user.id:
+        # subscriber: the body also depends on this user's overrides
+        ov = CardOverride.objects.filter(user=user, card__deck_id=deck_id).aggregate(
+            n=Count("id"), changed=Max("updated_at")
+        )
+        parts += [ov["n"], ov["changed"]]
+        if ov["changed"]:
+            last_modified = max(last_modified, ov["changed"])
+    return _etag(request, *parts), last_modified
+
+
+def deck_list_validators(request, user):
+    row = readable_decks(user).aggregate(
+        n=Count("id"), updated=Max("updated_at"), cards=Max("cards_changed_at")
+    )
+    if not row["n"]:
+        return _etag(request, "decks", user.id, 0), None
+    subs = DeckSubscription.objects.filter(user=user).aggregate(
+        changed=Max("created_at")
+    )
+    last_modified = max(
+        t for t in (row["updated"], row["cards"], subs["changed"]) if t is not None
+    )
+    etag = _etag(
+        request,
+        "decks",
+        user.id,
+        row["n"],
+        row["updated"],
+        row["cards"],
+        subs["changed"],
+    )
+    return etag, last_modified
+
+
+def conditional_response(request, etag, last_modified, build):
+    """304 when If-None-Match / If-Modified-Since match, else build() + headers."""
+    if etag is None and last_modified is None:
+        return build()
+
+    ts = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=ts)
+    if not_modified is not None:
+        return not_modified
+
+    response = build()
+    if response.status_code == 200:
+        if etag:
+            response["ETag"] = etag
+        if ts is not None:
+            response["Last-Modified"] = http_date(ts)
+        response["Cache-Control"] = "private, no-cache"
+    return response
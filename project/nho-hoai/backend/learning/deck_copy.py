@@ -0,0 +1,98 @@
+"""
+Copy template decks to many users at once (classroom provisioning).
+
+Two bulk INSERTs per chunk of users (decks, then their cards); template cards
+are read once. The template's distractor index is copied with the card ids
+remapped, so copies need no rebuild; media links point at the same blobs.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Card, CardMedia, Deck
+
+CARD_COPY_FIELDS = ("term", "meaning", "example", "note", "term_norm", "meaning_norm")
+COPY_USER_CHUNK = 100
+
+
+def _copy_fields(row):
+    return {f: row[f] for f in CARD_COPY_FIELDS}
+
+
+def _index_fresh(deck):
+    built = deck.distractors_built_at
+    return built is not None and built >= deck.cards_changed_at
+
+
+def _remap_distractors(copies):
+    by_deck = {}
+    for row, card in copies:
+        by_deck.setdefault(card.deck_id, {})[row["id"]] = card.id
+    changed = []
+    for row, card in copies:
+        if row["distractor_ids"]:
+            new_ids = by_deck[card.deck_id]
+            card.distractor_ids = [
+                new_ids[j] for j in row["distractor_ids"] if j in new_ids
+            ]
+            changed.append(card)
+    Card.objects.bulk_update(changed, ["distractor_ids"], batch_size=1000)
+
+
+def clone_decks_for_users(template_deck_ids, user_ids, *, chunk_size=COPY_USER_CHUNK):
+    """Returns the number of decks created."""
+    templates = list(Deck.objects.filter(id__in=template_deck_ids).order_by("id"))
+    if not templates or not user_ids:
+        return 0
+    cards_by_deck = {d.id: [] for d in templates}
+    for row in (
+        Card.objects.filter(deck__in=templates)
+        .order_by("id")
+        .values("id", "deck_id", "distractor_ids", *CARD_COPY_FIELDS)
+    ):
+        cards_by_deck[row.pop("deck_id")].append(row)
+    media_by_card = {}
+    for card_id, kind, blob_id in CardMedia.objects.filter(
+        card__deck__in=templates
+    ).values_list("card_id", "kind", "blob_id"):
+        media_by_card.setdefault(card_id, []).append((kind, blob_id))
+
+    created = 0
+    for i in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[i : i + chunk_size]
+        with transaction.atomic():
+            now = timezone.now()
+            pairs = [
+                (
+                    t.id,
+                    Deck(
+                        owner_id=uid,
+                        title=t.title,
+                        source_lang=t.source_lang,
+                        target_lang=t.target_lang,
+                        cards_changed_at=now,
+                        distractors_built_at=now if _index_fresh(t) else None,
+                    ),
+                )
+                for uid in chunk
+                for t in templates
+            ]
+            # SQLite >= 3.35 / PostgreSQL return the new ids
+            Deck.objects.bulk_create([deck for _, deck in pairs], batch_size=500)
+            copies = [
+                (row, Card(deck_id=deck.id, **_copy_fields(row)))
+                for template_id, deck in pairs
+                for row in cards_by_deck[template_id]
+            ]
+            Card.objects.bulk_create([card for _, card in copies], batch_size=1000)
+            _remap_distractors(copies)
+            CardMedia.objects.bulk_create(
+                [
+                    CardMedia(card_id=card.id, kind=kind, blob_id=blob_id)
+                    for row, card in copies
+                    for kind, blob_id in media_by_card.get(row["id"], ())
+                ],
+                batch_size=1000,
+            )
+        created += len(pairs)
+    return created
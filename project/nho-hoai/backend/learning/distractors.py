@@ -0,0 +1,194 @@
+"""
+Multiple-choice distractors.
+
+Card.distractor_ids holds, per card, the DISTRACTOR_K other cards of its deck
+whose meanings look most alike: character bigram (Dice) similarity first,
+then cards of the same script class with the nearest length. The index is
+rebuilt per deck by the "build_distractors" job, scheduled on card writes,
+so serving the options of a question is a list lookup and a random.sample.
+"""
+
+import bisect
+import random
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import chain
+
+from django.db import transaction
+from django.utils import timezone
+
+from .grading import normalize
+from .jobs import enqueue
+from .models import Card, Deck, Job
+from .sharing import overlay_overrides, readable_cards_q
+
+DISTRACTOR_K = 8  # stored per card; MC_OPTIONS - 1 are sampled per question
+MC_OPTIONS = 4
+NGRAM = 2  # bigrams: Japanese meanings are often 2-4 characters
+MAX_POSTING = 200  # a gram shared by more cards than this says nothing
+BUILD_DELAY_SECONDS = 30  # an import / burst of edits -> one rebuild
+
+
+def _grams(text):
+    padded = f" {text} "
+    return {padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def script_class(text):
+    """Dominant script of `text`: kana, han, latin or other."""
+    counts = Counter()
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        name = unicodedata.name(ch, "")
+        if name.startswith(("HIRAGANA", "KATAKANA")):
+            counts["kana"] += 1
+        elif name.startswith("CJK"):
+            counts["han"] += 1
+        elif name.startswith("LATIN"):
+            counts["latin"] += 1
+        else:
+            counts["other"] += 1
+    return counts.most_common(1)[0][0] if counts else "other"
+
+
+def _nearest_length(pool, length, texts, text, taken, n):
+    """Up to n indexes of `pool` ((len, idx) sorted) closest to `length`."""
+    out = []
+    right = bisect.bisect_left(pool, (length, -1))
+    left = right - 1
+    while len(out) < n and (left >= 0 or right < len(pool)):
+        # step towards the side whose length is closer
+        if right >= len(pool) or (
+            left >= 0 and length - pool[left][0] <= pool[right][0] - length
+        ):
+            j = pool[left][1]
+            left -= 1
+        else:
+            j = pool[right][1]
+            right += 1
+        if j not in taken and texts[j] != text:
+            taken.add(j)
+            out.append(j)
+    return out
+
+
+def compute_distractors(meanings, k=DISTRACTOR_K):
+    """For a list of meanings, the k most similar other indexes of each."""
+    texts = [normalize(m) for m in meanings]
+    grams = [_grams(t) for t in texts]
+    postings = defaultdict(list)
+    for i, gs in enumerate(grams):
+        for g in gs:
+            postings[g].append(i)
+
+    everything = sorted((len(t), i) for i, t in enumerate(texts))
+    by_class = defaultdict(list)
+    for length, i in everything:
+        by_class[script_class(texts[i])].append((length, i))
+
+    result = []
+    for i, gs in enumerate(grams):
+        shared = Counter()
+        for g in gs:
+            if len(postings[g]) <= MAX_POSTING:
+                shared.update(postings[g])
+        scored = sorted(
+            (
+                (-2 * n / (len(gs) + len(grams[j])), j)
+                for j, n in shared.items()
+                if texts[j] != texts[i]  # same meaning would be a second answer
+            )
+        )
+        picked = [j for _, j in scored[:k]]
+        taken = set(picked)
+        for pool in (by_class[script_class(texts[i])], everything):
+            if len(picked) >= k:
+                break
+            picked += _nearest_length(
+                pool, len(texts[i]), texts, texts[i], taken, k - len(picked)
+            )
+        result.append(picked)
+    return result
+
+
+def build_deck_distractors(deck_id):
+    """Rebuild the index of one deck; returns the number of cards."""
+    built_at = timezone.now()  # card writes after this leave the deck stale
+    cards = list(
+        Card.objects.filter(deck_id=deck_id).order_by("id").only("id", "meaning")
+    )
+    nearest = compute_distractors([c.meaning for c in cards])
+    for card, idxs in zip(cards, nearest):
+        card.distractor_ids = [cards[j].id for j in idxs]
+    with transaction.atomic():
+        Card.objects.bulk_update(cards, ["distractor_ids"], batch_size=500)
+        Deck.objects.filter(id=deck_id).update(distractors_built_at=built_at)
+    return len(cards)
+
+
+def schedule_distractor_build(*deck_ids):
+    """Queue one delayed rebuild per deck unless one is already waiting."""
+    run_after = timezone.now() + timedelta(seconds=BUILD_DELAY_SECONDS)
+    for deck_id in {d for d in deck_ids if d}:
+        waiting = Job.objects.filter(
+            kind="build_distractors", status=Job.QUEUED, payload__deck_id=deck_id
+        ).exists()
+        if not waiting:
+            enqueue("build_distractors", run_after=run_after, deck_id=deck_id)
+
+
+def mc_options(card_id, distractor_ids, cards_by_id, pool=()):
+    """
+    MC_OPTIONS shuffled {id, meaning} options for one card: the card itself
+    plus a sample of its indexed distractors. Ids missing from `cards_by_id`
+    (deleted since the last build) are skipped and random `pool` ids fill in
+    for cards the index has not reached yet.
+    """
+    meaning = cards_by_id[card_id]["meaning"]
+    candidates = [j for j in distractor_ids if j in cards_by_id]
+    random.shuffle(candidates)
+    extra = random.sample(pool, min(len(pool), 2 * MC_OPTIONS))
+
+    seen = {meaning}
+    options = [card_id]
+    for j in chain(candidates, extra):
+        if len(options) == MC_OPTIONS:
+            break
+        if cards_by_id[j]["meaning"] not in seen:
+            seen.add(cards_by_id[j]["meaning"])
+            options.append(j)
+    random.shuffle(options)
+    return [{"id": j, "meaning": cards_by_id[j]["meaning"]} for j in options]
+
+
+def session_choices(user, cards, card_ids):
+    """
+    {card_id: options} for the distinct `card_ids` of a session. `cards` are
+    the (overlaid) card dicts of the payload; distractors outside it are read
+    in one query.
+    """
+    card_ids = set(card_ids)
+    cards_by_id = {c["id"]: c for c in cards}
+    distractors = dict(
+        Card.objects.filter(id__in=card_ids)
+        .order_by()
+        .values_list("id", "distractor_ids")
+    )
+    missing = set(chain.from_iterable(distractors.values())) - set(cards_by_id)
+    if missing:
+        extra = list(
+            Card.objects.filter(readable_cards_q(user), id__in=missing)
+            .order_by()
+            .values("id", "meaning")
+        )
+        overlay_overrides(user, extra)
+        cards_by_id.update((c["id"], c) for c in extra)
+
+    pool = [c["id"] for c in cards]
+    return {
+        card_id: mc_options(card_id, distractors.get(card_id, ()), cards_by_id, pool)
+        for card_id in card_ids
+        if card_id in cards_by_id
+    }
@@ -0,0 +1,150 @@
+"""
+Teacher analytics: per-(group, card) aggregates in GroupCardStat.
+
+Every answer bumps the rows of the groups its student belongs to (one F()
+UPDATE per group and card, INSERT on the first answer), so reading the
+hardest cards of a class is a single indexed query. `refresh_group_stats`
+(command or job) rebuilds a group from its members' CardProgress after
+members join/leave; a progress reset or rebuild recomputes the rows of the
+cards it touched in the student's groups (`refresh_member_card_stats`).
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import CardProgress, GroupCardStat, StudyGroup
+
+USER_GROUPS_TTL = 300  # membership changes invalidate explicitly
+
+
+def _user_groups_key(user_id):
+    return f"learning:user-groups:{user_id}"
+
+
+def user_group_ids(user_ids):
+    """{user_id: [group ids]}; cached, so students in no class cost no query."""
+    user_ids = set(user_ids)
+    keys = {_user_groups_key(uid): uid for uid in user_ids}
+    cached = cache.get_many(list(keys))
+    out = {keys[k]: v for k, v in cached.items()}
+
+    missing = user_ids - set(out)
+    if missing:
+        fetched = {uid: [] for uid in missing}
+        for uid, gid in StudyGroup.members.through.objects.filter(
+            user_id__in=missing
+        ).values_list("user_id", "studygroup_id"):
+            fetched[uid].append(gid)
+        cache.set_many(
+            {_user_groups_key(uid): gids for uid, gids in fetched.items()},
+            USER_GROUPS_TTL,
+        )
+        out.update(fetched)
+    return out
+
+
+def invalidate_user_groups(user_ids):
+    cache.delete_many([_user_groups_key(uid) for uid in set(user_ids)])
+
+
+class AnswerDeltas:
+    """Collects per-(user, card) changes while answers are applied."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, progress, is_correct, old_difficulty, first_answer):
+        d = self.rows.setdefault((progress.user_id, progress.card_id), [0, 0, 0, 0])
+        d[0] += 1
+        d[1] += 0 if is_correct else 1
+        d[2] += progress.difficulty_score - old_difficulty
+        d[3] += 1 if first_answer else 0
+
+
+def bump_group_stats(deltas):
+    """Apply an AnswerDeltas to the GroupCardStat rows of the users' groups."""
+    if not deltas.rows:
+        return 0
+    groups = user_group_ids({uid for uid, _ in deltas.rows})
+
+    per_row = {}
+    for (uid, card_id), d in deltas.rows.items():
+        for gid in groups.get(uid, ()):
+            acc = per_row.setdefault((gid, card_id), [0, 0, 0, 0])
+            for i in range(4):
+                acc[i] += d[i]
+    if not per_row:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        GroupCardStat.objects.bulk_create(
+            [GroupCardStat(group_id=g, card_id=c) for g, c in per_row],
+            ignore_conflicts=True,
+        )
+        for (gid, card_id), (attempts, wrong, diff, learners) in per_row.items():
+            # SET expressions all read the pre-update row
+            GroupCardStat.objects.filter(group_id=gid, card_id=card_id).update(
+                attempts=F("attempts") + attempts,
+                wrong=F("wrong") + wrong,
+                wrong_rate=Cast(F("wrong") + wrong, FloatField())
+                / (F("attempts") + attempts),
+                learners=F("learners") + learners,
+                difficulty_sum=F("difficulty_sum") + diff,
+                updated_at=now,
+            )
+    return len(per_row)
+
+
+def refresh_group_stats(group_id, card_ids=None):
+    """
+    Rebuild one group's rows from its members' CardProgress (one GROUP BY);
+    only those of `card_ids` (ids or a Card id subquery) if given.
+    """
+    progress = CardProgress.objects.filter(
+        Q(total_correct__gt=0) | Q(total_wrong__gt=0),
+        user__in=StudyGroup.members.through.objects.filter(
+            studygroup_id=group_id
+        ).values("user_id"),
+    )
+    old = GroupCardStat.objects.filter(group_id=group_id)
+    if card_ids is not None:
+        progress = progress.filter(card_id__in=card_ids)
+        old = old.filter(card_id__in=card_ids)
+    rows = (
+        progress.values("card_id")
+        .annotate(
+            attempts=Sum(F("total_correct") + F("total_wrong")),
+            wrong=Sum("total_wrong"),
+            learners=Count("id"),
+            difficulty_sum=Sum("difficulty_score"),
+        )
+        .order_by()
+    )
+    stats = [
+        GroupCardStat(
+            group_id=group_id,
+            card_id=r["card_id"],
+            attempts=r["attempts"],
+            wrong=r["wrong"],
+            wrong_rate=r["wrong"] / r["attempts"],
+            learners=r["learners"],
+            difficulty_sum=r["difficulty_sum"],
+        )
+        for r in rows
+    ]
+    with transaction.atomic():
+        old.delete()
+        GroupCardStat.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
+
+
+def refresh_member_card_stats(user_id, card_ids):
+    """After a student's progress on `card_ids` was reset or rebuilt."""
+    groups = user_group_ids([user_id]).get(user_id, [])
+    for group_id in groups:
+        refresh_group_stats(group_id, card_ids)
+    return len(groups)
@@ -0,0 +1,157 @@
+"""
+Lightweight DB-backed job runner (no Redis/Celery).
+
+    @register("rebuild_progress")
+    def rebuild_progress(ctx, user_id, deck_id=None):
+        ctx.progress(50, "halfway")
+        return {"cards": 10}          # stored in Job.result (JSON)
+
+    enqueue("rebuild_progress", user=request.user, user_id=..., deck_id=...)
+
+`manage.py run_jobs` claims queued jobs (conditional UPDATE, so several
+workers can poll the same table) and runs them in a process pool. A failing
+job is retried with exponential backoff until max_attempts. While a job runs
+its worker bumps heartbeat_at every HEARTBEAT_INTERVAL; a RUNNING job without
+a heartbeat for STALE_AFTER belongs to a dead worker and is queued again, however
+long it legitimately takes.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+RETRY_BASE_SECONDS = 10  # 10s, 20s, 40s, ...
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=3)  # this long without a heartbeat = worker died
+
+
+def register(kind):
+    def decorator(fn):
+        REGISTRY[kind] = fn
+        return fn
+
+    return decorator
+
+
+def enqueue(kind, *, user=None, max_attempts=3, run_after=None, **payload):
+    if kind not in REGISTRY:
+        raise ValueError(f"unknown job kind {kind!r}")
+    return Job.objects.create(
+        kind=kind,
+        user=user,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+class JobContext:
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, percent, message=""):
+        percent = max(0, min(100, int(percent)))
+        Job.objects.filter(id=self.job.id).update(
+            progress=percent, progress_message=message[:255]
+        )
+
+
+def claim_jobs(worker_id, limit):
+    """Claim up to `limit` due jobs for `worker_id`; returns their ids."""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in candidates:
+        won = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if won:
+            claimed.append(job_id)
+    return claimed
+
+
+def heartbeat(worker_id, job_ids):
+    """Mark `worker_id`'s running jobs as alive."""
+    if not job_ids:
+        return 0
+    return Job.objects.filter(
+        id__in=job_ids, status=Job.RUNNING, locked_by=worker_id
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale(now=None):
+    """Jobs left RUNNING by a dead worker (no heartbeat) go back to the queue."""
+    now = now or timezone.now()
+    cutoff = now - STALE_AFTER
+    return (
+        Job.objects.filter(status=Job.RUNNING)
+        .filter(
+            Q(heartbeat_at__lt=cutoff)
+            | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+        )
+        .update(status=Job.QUEUED, locked_by="", run_after=now)
+    )
+
+
+def fail_job(job, error, backoff=True):
+    """Retry with exponential backoff (or now), or give up after max_attempts."""
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1) if backoff else 0
+        Job.objects.filter(id=job.id).update(
+            status=Job.QUEUED,
+            error=error,
+            locked_by="",
+            run_after=now + timedelta(seconds=delay),
+        )
+    else:
+        Job.objects.filter(id=job.id).update(
+            status=Job.FAILED, error=error, finished_at=now
+        )
+
+
+def run_job(job_id):
+    """Execute one claimed job (in a pool process)."""
+    close_old_connections()
+    job = Job.objects.get(id=job_id)
+    handler = REGISTRY.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"no handler registered for {job.kind!r}")
+        result = handler(JobContext(job), **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("job %s (%s) failed: %s", job.id, job.kind, error)
+        fail_job(job, error)
+        return job.id, False
+    finally:
+        close_old_connections()
+
+    Job.objects.filter(id=job.id).update(
+        status=Job.SUCCEEDED,
+        result=result,
+        progress=100,
+        error="",
+        finished_at=timezone.now(),
+    )
+    return job.id, True
@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from learning.models import Card, Deck
+from learning.renderers import FastJSONRenderer, orjson
+from learning.serializers import CARD_FIELDS, CardSerializer, format_row_datetimes
+
+
+class Command(BaseCommand):
+    help = (
+        "Time card list serialization + rendering per N cards: ModelSerializer "
+        "vs values() rows, JSONRenderer vs FastJSONRenderer (rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        n = max(1, options["cards"])
+        repeat = max(1, options["repeat"])
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username="__bench_serialization__", password=None
+            )
+            deck = Deck.objects.create(
+                owner=user, title="bench", source_lang="ja", target_lang="en"
+            )
+            Card.objects.bulk_create(
+                [
+                    Card(
+                        deck=deck,
+                        term=f"単語{i}",
+                        meaning=f"meaning {i}",
+                        example=f"example sentence number {i}",
+                        note="",
+                    )
+                    for i in range(n)
+                ],
+                batch_size=1000,
+            )
+            qs = Card.objects.filter(deck=deck).order_by("-updated_at")
+
+            cases = [
+                (
+                    "CardSerializer + JSONRenderer",
+                    lambda: JSONRenderer().render(CardSerializer(qs, many=True).data),
+                ),
+                (
+                    "CardSerializer + FastJSONRenderer",
+                    lambda: FastJSONRenderer().render(
+                        CardSerializer(qs, many=True).data
+                    ),
+                ),
+                (
+                    "values() + JSONRenderer",
+                    lambda: JSONRenderer().render(
+                        format_row_datetimes(list(qs.values(*CARD_FIELDS)))
+                    ),
+                ),
+                (
+                    "values() + FastJSONRenderer",
+                    lambda: FastJSONRenderer().render(
+                        format_row_datetimes(list(qs.values(*CARD_FIELDS)))
+                    ),
+                ),
+            ]
+
+            results = []
+            for name, fn in cases:
+                best = None
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    fn()
+                    elapsed = time.perf_counter() - t0
+                    best = elapsed if best is None else min(best, elapsed)
+                results.append((name, best))
+
+            transaction.set_rollback(True)
+
+        if orjson is None:
+            self.stdout.write("orjson not installed: FastJSONRenderer = JSONRenderer")
+        base = results[0][1]
+        self.stdout.write(f"best of {repeat}, {n} cards (query included)")
+        for name, t in results:
+            self.stdout.write(f"  {name:<36} {t * 1000:8.1f} ms  x{base / t:5.1f}")
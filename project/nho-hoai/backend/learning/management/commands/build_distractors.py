@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from learning.distractors import build_deck_distractors
+from learning.models import Deck
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the multiple-choice distractor index of stale decks (never "
+        "built, or cards changed since). Card writes schedule this as a job; "
+        "run it once after upgrading or to catch up without a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deck", type=int, action="append", default=[])
+        parser.add_argument(
+            "--all", action="store_true", help="Rebuild fresh decks too."
+        )
+
+    def handle(self, *args, **options):
+        decks = Deck.objects.order_by("id")
+        if options["deck"]:
+            decks = decks.filter(id__in=options["deck"])
+        elif not options["all"]:
+            decks = decks.filter(
+                Q(distractors_built_at__isnull=True)
+                | Q(distractors_built_at__lt=F("cards_changed_at"))
+            )
+        n_decks = n_cards = 0
+        for deck_id in decks.values_list("id", flat=True):
+            n_cards += build_deck_distractors(deck_id)
+            n_decks += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {n_cards} card(s) in {n_decks} deck(s).")
+        )
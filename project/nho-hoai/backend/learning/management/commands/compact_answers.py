@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from learning.retention import COMPACT_CHUNK, RETENTION_DAYS_DEFAULT, compact_answers
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold StudyAnswer rows older than --days into per-(user, card, day) "
+        "AnswerDaily rows and delete them in chunks. --archive-dir writes the "
+        "raw rows to gzipped JSONL first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=RETENTION_DAYS_DEFAULT)
+        parser.add_argument("--chunk-size", type=int, default=COMPACT_CHUNK)
+        parser.add_argument("--archive-dir", default=None)
+
+    def handle(self, *args, **options):
+        stats = compact_answers(
+            days=max(1, options["days"]),
+            chunk_size=max(1, options["chunk_size"]),
+            archive_dir=options["archive_dir"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compacted {stats['answers']} answer(s) into "
+                f"{stats['created']} new / {stats['updated']} updated daily row(s)."
+            )
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from learning.media import GC_GRACE, gc_blobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete media blobs (rows and files) that no card links to any more "
+        f"and that were last uploaded more than {GC_GRACE} ago."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        n = gc_blobs(dry_run=options["dry_run"])
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}Deleted {n} blob(s)."))
@@ -0,0 +1,294 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from learning.catalog import refresh_popularity
+from learning.models import Card, CardProgress, Deck, StudyAnswer, StudySession
+from learning.pagination import ActiveCatalogPagination
+
+# flagged plans that are fine as they are: endpoint -> reason
+ALLOWED = {
+    "deck list": (
+        "owned + subscribed decks come from two index lookups (MULTI-INDEX OR); "
+        "sorting one user's few dozen decks by updated_at is cheap"
+    ),
+    "sync (delta)": (
+        "cards come from the (deck, updated_at) index: only the cards changed "
+        "since the cursor are sorted into (deck, id) page order"
+    ),
+}
+
+# the run gets its own cache: clearing it must not touch a shared one
+ADVISOR_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "index-advisor",
+    }
+}
+
+SKIP_SQL = ("INSERT", "SAVEPOINT", "RELEASE", "ROLLBACK", "BEGIN", "COMMIT")
+
+_COL = r'"(?P<table>\w+)"\."(?P<col>\w+)"'
+EQ_RE = re.compile(_COL + r" (?:= |IN \()")
+RANGE_RE = re.compile(_COL + r" (?:<|<=|>|>=) ")
+ORDER_RE = re.compile(r"ORDER BY (.+?)(?: LIMIT| OFFSET|\)|$)")
+
+
+def _where_part(sql):
+    i = sql.find(" WHERE ")
+    return sql[i:] if i >= 0 else ""
+
+
+def propose_index(sql, table):
+    """Equality columns, then one range column or the ORDER BY columns."""
+    where = _where_part(sql)
+    eq = [m["col"] for m in EQ_RE.finditer(where) if m["table"] == table]
+    rng = [m["col"] for m in RANGE_RE.finditer(where) if m["table"] == table]
+
+    order = []
+    m = ORDER_RE.search(sql)
+    if m:
+        order = [c["col"] for c in re.finditer(_COL, m.group(1)) if c["table"] == table]
+
+    cols = []
+    for col in eq + (rng[:1] or order):
+        if col not in cols:
+            cols.append(col)
+    return cols
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def flags_for(plan):
+    out = []
+    for line in plan:
+        if line.startswith("SCAN ") and "INDEX" not in line:
+            out.append(("full-scan", line.split()[1]))
+        elif "USE TEMP B-TREE" in line:
+            out.append(("temp-btree", line))
+    return out
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the hot learning endpoints against a seeded throwaway test database "
+        "(never the serving one), "
+        "EXPLAIN QUERY PLAN every query, flag full scans / temp B-tree sorts and "
+        "propose composite indexes. --fail makes it a CI gate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=500, help="cards per deck")
+        parser.add_argument("--plans", action="store_true", help="print every plan")
+        parser.add_argument(
+            "--fail", action="store_true", help="exit 1 on unexpected flags"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("EXPLAIN QUERY PLAN parsing is SQLite-only.")
+
+        verbosity = max(0, options["verbosity"] - 1)
+        # created + migrated like `manage.py test` does (in memory for SQLite),
+        # so the run holds no lock on the serving database and finds it empty
+        old_config = setup_databases(
+            verbosity, False, aliases={"default"}, serialized_aliases=set()
+        )
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=["*"],
+                CACHES=ADVISOR_CACHES,
+                LEARNING_REPLICA_ALIAS="__primary_only__",
+                LEARNING_WRITE_BEHIND={"ENABLED": False},
+            ):
+                cache.clear()
+                ctx = self._seed(max(10, options["cards"]))
+                captured = self._exercise(ctx)
+                report = [
+                    (endpoint, sql, explain(sql))
+                    for endpoint, sql in captured
+                    if not sql.lstrip().upper().startswith(SKIP_SQL)
+                ]
+        finally:
+            teardown_databases(old_config, verbosity)
+
+        problems = proposals = 0
+        seen = set()
+        for endpoint, sql, plan in report:
+            flags = flags_for(plan)
+            if options["plans"] or flags:
+                self.stdout.write(f"\n[{endpoint}] {sql[:160]}")
+                for line in plan:
+                    self.stdout.write(f"    {line}")
+            for kind, what in flags:
+                table = what if kind == "full-scan" else self._main_table(sql)
+                cols = propose_index(sql, table) if table else []
+                allowed = ALLOWED.get(endpoint)
+                tag = "allowed" if allowed else "FLAG"
+                self.stdout.write(f"  {tag}: {kind} ({what})")
+                if allowed:
+                    self.stdout.write(f"    reason: {allowed}")
+                    continue
+                problems += 1
+                if kind == "temp-btree" and "id" in cols:
+                    # rows fetched by primary key: the sort is the Meta ordering
+                    self.stdout.write("    propose: .order_by() (rows fetched by pk)")
+                    continue
+                if cols and (table, tuple(cols)) not in seen:
+                    seen.add((table, tuple(cols)))
+                    proposals += 1
+                    self.stdout.write(
+                        f"    propose: models.Index(fields={cols!r})  on {table}"
+                    )
+
+        self.stdout.write(
+            f"\n{len(report)} queries, {problems} flagged, {proposals} index proposal(s)"
+        )
+        if options["fail"] and problems:
+            raise CommandError("index advisor found unexpected scans/sorts")
+
+    def _main_table(self, sql):
+        m = re.search(r'FROM "(\w+)"', sql)
+        return m.group(1) if m else None
+
+    def _seed(self, n_cards):
+        User = get_user_model()
+        user = User.objects.create_user(username="__index_advisor__", password=None)
+        other = User.objects.create_user(username="__index_advisor_2__", password=None)
+        now = timezone.now()
+
+        decks = []
+        for owner in (user, other):
+            for i in range(3):
+                deck = Deck.objects.create(
+                    owner=owner,
+                    title=f"deck {i}",
+                    source_lang="ja",
+                    target_lang="en",
+                    published=owner == other,
+                )
+                Card.objects.bulk_create(
+                    [
+                        Card(deck=deck, term=f"t{i}-{j}", meaning=f"m{j}")
+                        for j in range(n_cards)
+                    ],
+                    batch_size=500,
+                )
+                decks.append(deck)
+
+        cards = list(
+            Card.objects.filter(deck__owner=user)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        CardProgress.objects.bulk_create(
+            [
+                CardProgress(
+                    user=user,
+                    card_id=cid,
+                    due_at=now + timedelta(hours=(k % 48) - 24),
+                    difficulty_score=(k * 7) % 100,
+                    lapses=k % 5,
+                    interval_days=k % 40,
+                )
+                for k, cid in enumerate(cards[::2])
+            ],
+            batch_size=500,
+        )
+        session = StudySession.objects.create(user=user, deck=decks[0])
+        StudyAnswer.objects.bulk_create(
+            [
+                StudyAnswer(session=session, card_id=cid, is_correct=k % 3 != 0)
+                for k, cid in enumerate(cards[:50])
+            ]
+        )
+        # as the refresh_catalog job leaves a serving database
+        refresh_popularity()
+        return {"user": user, "deck": decks[0], "session": session, "card": cards[0]}
+
+    def _exercise(self, ctx):
+        client = APIClient()
+        client.force_authenticate(ctx["user"])
+        deck, session = ctx["deck"], ctx["session"]
+
+        calls = [
+            ("deck list", "get", "/api/decks/", None),
+            ("deck retrieve", "get", f"/api/decks/{deck.id}/", None),
+            ("deck cards", "get", f"/api/decks/{deck.id}/cards/", None),
+            ("deck stats", "get", f"/api/decks/{deck.id}/stats/", None),
+            (
+                "study start (core pick)",
+                "post",
+                f"/api/decks/{deck.id}/study/start/",
+                {},
+            ),
+            ("review start", "post", "/api/study/start/", {}),
+            (
+                "study answer",
+                "post",
+                "/api/study/answer/",
+                {"session_id": session.id, "card_id": ctx["card"], "is_correct": False},
+            ),
+            (
+                "study summary",
+                "get",
+                f"/api/study/summary/?session_id={session.id}",
+                None,
+            ),
+            ("session history", "get", "/api/study/sessions/", None),
+            ("hard cards", "get", "/api/cards/hard/", None),
+            ("deck catalog", "get", "/api/decks/catalog/", None),
+            (
+                "deck catalog (active, next page)",
+                "get",
+                "/api/decks/catalog/?sort=active&source_lang=ja&cursor="
+                + ActiveCatalogPagination().encode_cursor(
+                    {"active_learners": 0, "subscriber_count": 0, "id": 2**31}
+                ),
+                None,
+            ),
+            ("sync (full)", "post", "/api/sync/", {}),
+            (
+                "sync (delta)",
+                "post",
+                "/api/sync/",
+                {
+                    "cursor": (timezone.now() - timedelta(hours=1)).isoformat(),
+                    "answers": [
+                        {
+                            "key": "__index_advisor__",
+                            "card_id": ctx["card"],
+                            "is_correct": True,
+                        },
+                    ],
+                },
+            ),
+        ]
+
+        captured = []
+        for name, method, url, body in calls:
+            with CaptureQueriesContext(connection) as q:
+                if method == "get":
+                    response = client.get(url)
+                else:
+                    response = client.post(url, body, format="json")
+            if response.status_code >= 400:
+                raise CommandError(f"{name}: HTTP {response.status_code} {url}")
+            captured += [(name, query["sql"]) for query in q.captured_queries]
+        return captured
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from learning.sync import SYNC_HORIZON, purge_sync_state
+
+
+class Command(BaseCommand):
+    help = (
+        f"Delete sync idempotency receipts and progress tombstones older than "
+        f"{SYNC_HORIZON.days} days (older cursors get a full snapshot anyway). "
+        "Meant for cron."
+    )
+
+    def handle(self, *args, **options):
+        result = purge_sync_state()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {result['receipts']} receipt(s), "
+                f"{result['tombstones']} tombstone(s)."
+            )
+        )
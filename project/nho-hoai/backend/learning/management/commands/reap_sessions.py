@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from learning.reaper import IDLE_MINUTES_DEFAULT, REAP_CHUNK, reap_stale_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Close study sessions idle longer than --idle-minutes (ended_at = last "
+        "answer, counters recomputed) and delete the ones without answers. "
+        "Meant for cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--idle-minutes", type=int, default=IDLE_MINUTES_DEFAULT)
+        parser.add_argument("--chunk-size", type=int, default=REAP_CHUNK)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        result = reap_stale_sessions(
+            idle_minutes=max(1, options["idle_minutes"]),
+            chunk_size=max(1, options["chunk_size"]),
+            dry_run=options["dry_run"],
+        )
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Closed {result['closed']} session(s), "
+                f"deleted {result['deleted']} empty session(s)."
+            )
+        )
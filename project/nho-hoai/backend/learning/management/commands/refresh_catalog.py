@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from learning.catalog import ACTIVITY_WINDOW, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the popularity counters of published decks (subscribers, "
+        f"learners active in the last {ACTIVITY_WINDOW.days} days, cards) that "
+        "the catalog sorts on. Meant for cron, e.g. every 10 minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deck", type=int, action="append", default=[])
+
+    def handle(self, *args, **options):
+        changed = refresh_popularity(options["deck"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} deck(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from learning.groups import refresh_group_stats
+from learning.models import StudyGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-(class, card) aggregates from the members' "
+        "CardProgress. Answers keep them current; run periodically to fold in "
+        "resets and membership changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", type=int, action="append", default=[])
+
+    def handle(self, *args, **options):
+        groups = StudyGroup.objects.order_by("id")
+        if options["group"]:
+            groups = groups.filter(id__in=options["group"])
+        total = 0
+        for group_id in groups.values_list("id", flat=True):
+            total += refresh_group_stats(group_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} class/card row(s)."))
@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.replica import replica_alias, stamp_refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto the replica file with the "
+        "online backup API (local/test stand-in for real replication) and "
+        "stamp it, releasing users pinned to the primary by older writes."
+    )
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError("No replica database configured.")
+
+        primary = settings.DATABASES["default"]
+        replica = settings.DATABASES[alias]
+        for db in (primary, replica):
+            if "sqlite3" not in db["ENGINE"] and "sqlite_backend" not in db["ENGINE"]:
+                raise CommandError("Only SQLite primary/replica files are supported.")
+
+        # one-step backup: the copy is the primary as of its first page read
+        taken_at = time.time()
+        src = sqlite3.connect(str(primary["NAME"]))
+        dst = sqlite3.connect(str(replica["NAME"]))
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        stamp_refresh(taken_at, alias)
+        self.stdout.write(self.style.SUCCESS(f"Replica '{alias}' refreshed."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from learning.answer_log import replay_log_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the write-behind answer logs of dead processes into the DB "
+        "(crash recovery); logs of running workers are left alone and "
+        "already-flushed answers are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log-dir", default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        files, written = replay_log_dir(options["log_dir"], options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Replayed {files} log file(s), {written} answer(s).")
+        )
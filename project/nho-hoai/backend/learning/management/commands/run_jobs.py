@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+# pool processes import this module (for _init_worker) before django.setup(),
+# so learning.* is only imported inside handle()
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (learning.Job) in a process pool. "
+        "Several workers may poll the same DB; claims are atomic, running jobs "
+        "are kept alive by heartbeats and jobs of dead workers are requeued."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--poll", type=float, default=1.0, help="Seconds between polls."
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when the queue is empty."
+        )
+
+    def _new_pool(self, processes):
+        # spawn, not fork: children must not inherit the parent's DB connections
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def handle(self, *args, **options):
+        from learning.jobs import (
+            HEARTBEAT_INTERVAL,
+            claim_jobs,
+            fail_job,
+            heartbeat,
+            requeue_stale,
+            run_job,
+        )
+        from learning.models import Job
+
+        processes = max(1, options["processes"])
+        poll = max(0.1, options["poll"])
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        stale = requeue_stale()
+        if stale:
+            self.stdout.write(f"Requeued {stale} stale job(s).")
+
+        done_ok = done_failed = 0
+        pool = self._new_pool(processes)
+        inflight = {}
+        next_beat = time.monotonic() + HEARTBEAT_INTERVAL.total_seconds()
+        try:
+            while True:
+                if time.monotonic() >= next_beat:
+                    # from this loop, not the job: a hung pool process still
+                    # counts as alive, a dead run_jobs stops beating
+                    heartbeat(worker_id, list(inflight.values()))
+                    stale = requeue_stale()
+                    if stale:
+                        self.stdout.write(f"Requeued {stale} stale job(s).")
+                    next_beat = time.monotonic() + HEARTBEAT_INTERVAL.total_seconds()
+
+                broken = []  # claimed jobs a broken pool will never run
+                claimed = claim_jobs(worker_id, processes - len(inflight))
+                for i, job_id in enumerate(claimed):
+                    try:
+                        inflight[pool.submit(run_job, job_id)] = job_id
+                    except BrokenProcessPool:
+                        broken = claimed[i:]
+                        break
+
+                if not inflight and not broken:
+                    if options["once"]:
+                        break
+                    time.sleep(poll)
+                    continue
+
+                finished = ()
+                if not broken:
+                    finished, _ = wait(
+                        inflight, timeout=poll, return_when=FIRST_COMPLETED
+                    )
+                for future in finished:
+                    job_id = inflight.pop(future)
+                    try:
+                        _, ok = future.result()
+                    except BrokenProcessPool:
+                        broken.append(job_id)
+                        continue
+                    except Exception as exc:
+                        self.stderr.write(f"job {job_id}: failed to run ({exc})")
+                        fail_job(Job.objects.get(id=job_id), f"failed to run: {exc}")
+                        ok = False
+                    if ok:
+                        done_ok += 1
+                    else:
+                        done_failed += 1
+
+                if broken:
+                    # a pool process died (OOM kill, segfault): every job still
+                    # in the pool is lost with it, the pool refuses new work
+                    broken += inflight.values()
+                    inflight.clear()
+                    self.stderr.write(
+                        f"worker process died; retrying job(s) {sorted(broken)}"
+                    )
+                    # (jobs that finished before the pool broke are not RUNNING)
+                    lost = Job.objects.filter(
+                        id__in=broken, status=Job.RUNNING, locked_by=worker_id
+                    )
+                    for job in lost:
+                        fail_job(job, "worker process died", backoff=False)
+                        done_failed += 1
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool(processes)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Jobs done: {done_ok} succeeded, {done_failed} failed/retried."
+            )
+        )
@@ -0,0 +1,118 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# run in a fresh interpreter: this process has imported everything already
+CHILD = """
+import json, time
+started = time.perf_counter()
+import nho_hoai.wsgi
+import_ms = (time.perf_counter() - started) * 1000
+from nho_hoai.warmup import warm_up
+print(json.dumps({"import_ms": import_ms, "warmup": warm_up()}))
+"""
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def by_package(rows):
+    """Self time summed per top-level package, in microseconds."""
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import nho_hoai.wsgi in a fresh `python -X importtime` interpreter and "
+        "report where worker start-up goes: slowest packages and modules, and "
+        "each warm-up step. --max-ms makes it a CI gate, --json keeps the "
+        "numbers for tracking over time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--max-ms",
+            type=float,
+            default=None,
+            help="exit 1 if import + warm-up takes longer",
+        )
+        parser.add_argument("--json", metavar="PATH", help="also write a JSON report")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, NHO_HOAI_WARMUP="0")  # CHILD times it separately
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"start-up failed:\n{proc.stderr[-2000:]}")
+        timings = json.loads(proc.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(proc.stderr)
+        top = max(1, options["top"])
+
+        import_ms = timings["import_ms"]
+        warmup_ms = sum(timings["warmup"].values())
+        total_ms = import_ms + warmup_ms
+        packages = sorted(by_package(rows).items(), key=lambda p: -p[1])
+        modules = sorted(rows, key=lambda r: -r[1])
+
+        self.stdout.write(
+            f"{len(rows)} modules imported in {import_ms:.0f} ms, "
+            f"warm-up {warmup_ms:.0f} ms, total {total_ms:.0f} ms"
+        )
+        self.stdout.write("\nslowest packages (self time):")
+        for name, us in packages[:top]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {name}")
+        self.stdout.write("\nslowest modules (self time):")
+        for name, self_us, cumulative_us in modules[:top]:
+            self.stdout.write(
+                f"  {self_us / 1000:8.1f} ms  {name}  "
+                f"(cumulative {cumulative_us / 1000:.1f} ms)"
+            )
+        self.stdout.write("\nwarm-up steps:")
+        for name, ms in timings["warmup"].items():
+            self.stdout.write(f"  {ms:8.1f} ms  {name}")
+
+        if options["json"]:
+            report = {
+                "python": sys.version.split()[0],
+                "import_ms": round(import_ms, 1),
+                "warmup_ms": timings["warmup"],
+                "total_ms": round(total_ms, 1),
+                "modules": len(rows),
+                "packages_ms": {n: round(us / 1000, 1) for n, us in packages},
+                "slowest_modules_ms": {
+                    name: round(self_us / 1000, 1) for name, self_us, _ in modules[:top]
+                },
+            }
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+        max_ms = options["max_ms"]
+        if max_ms is not None and total_ms > max_ms:
+            raise CommandError(
+                f"start-up took {total_ms:.0f} ms, budget is {max_ms:.0f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS("OK"))
@@ -0,0 +1,230 @@
+"""
+Content-addressed card media (pronunciation audio, images).
+
+Uploads are streamed to a temp file while hashed, then moved to
+ROOT/ab/cd/<sha256> before the MediaBlob row is written (a crash in between
+leaves an unreferenced file, never a row without one); a second upload of
+the same bytes only links the existing MediaBlob. Blobs are immutable, so the hash is a strong ETag and
+responses may be cached forever. `blob_response` streams the file (or one
+byte range of it) in MEDIA_CHUNK pieces and never reads it whole.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+
+from .models import CardMedia, MediaBlob
+
+MEDIA_CHUNK = 64 * 1024
+GC_GRACE = timedelta(days=1)  # unreferenced blobs younger than this are kept
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class MediaError(Exception):
+    pass
+
+
+class BlobMissing(MediaError):
+    """The blob's row exists but its file does not (lost volume, bad restore)."""
+
+
+def media_root():
+    return Path(settings.LEARNING_MEDIA["ROOT"])
+
+
+def blob_path(sha256):
+    return media_root() / sha256[:2] / sha256[2:4] / sha256
+
+
+def kind_for(content_type):
+    """ "audio" / "image" for an accepted content type, else None."""
+    for kind, types in settings.LEARNING_MEDIA["CONTENT_TYPES"].items():
+        if content_type in types:
+            return kind
+    return None
+
+
+def store_blob(uploaded, content_type):
+    """Hash + store an UploadedFile; returns the (possibly existing) MediaBlob."""
+    max_bytes = settings.LEARNING_MEDIA["MAX_BYTES"]
+    tmp_dir = media_root() / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            for chunk in uploaded.chunks(MEDIA_CHUNK):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise MediaError(f"File is larger than {max_bytes} bytes.")
+                digest.update(chunk)
+                out.write(chunk)
+        sha256 = digest.hexdigest()
+
+        # file first, row second: a committed row always has its file
+        path = blob_path(sha256)
+        try:
+            # reused: a fresh mtime tells a running gc_media to keep the file
+            os.utime(path)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)  # atomic: readers never see half a file
+        # and a fresh linked_at keeps the row out of the next one
+        blob, created = MediaBlob.objects.get_or_create(
+            sha256=sha256, defaults={"size": size, "content_type": content_type}
+        )
+        if not created:
+            MediaBlob.objects.filter(sha256=sha256).update(linked_at=timezone.now())
+        return blob
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def attach_media(card, uploaded):
+    """Store `uploaded` and make it the card's audio/image; returns CardMedia."""
+    content_type = (uploaded.content_type or "").split(";")[0].strip().lower()
+    kind = kind_for(content_type)
+    if kind is None:
+        raise MediaError(f"Unsupported content type {content_type!r}.")
+    blob = store_blob(uploaded, content_type)
+    link, _ = CardMedia.objects.update_or_create(
+        card=card, kind=kind, defaults={"blob": blob}
+    )
+    return link
+
+
+def media_payload(link, blob=None):
+    blob = blob or link.blob
+    return {
+        "card_id": link.card_id,
+        "kind": link.kind,
+        "sha256": blob.sha256,
+        "size": blob.size,
+        "content_type": blob.content_type,
+        "url": reverse("media_blob", args=[blob.sha256]),
+    }
+
+
+def _parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to serve the
+    whole file (no/malformed/multi range), or "unsatisfiable".
+    """
+    m = RANGE_RE.match(header.strip()) if header else None
+    if m is None or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.groups()
+    if first == "":  # suffix: the last N bytes
+        if int(last) == 0:
+            return "unsatisfiable"
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return "unsatisfiable"
+    if end < start:
+        return None
+    return start, end
+
+
+def _iter_range(f, start, length):
+    with f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(MEDIA_CHUNK, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def blob_response(request, blob):
+    """
+    200 / 206 / 304 / 416 for a blob, honouring Range and If-Range.
+    Raises BlobMissing when the file is gone.
+    """
+    etag = f'"{blob.sha256}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        f = open(blob_path(blob.sha256), "rb")
+    except FileNotFoundError:
+        raise BlobMissing(blob.sha256)
+    byte_range = _parse_range(request.headers.get("Range"), blob.size)
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range.strip() != etag:
+        byte_range = None  # the client's partial copy is of other content
+
+    if byte_range == "unsatisfiable":
+        f.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{blob.size}"
+    elif byte_range is None:
+        response = FileResponse(f, content_type=blob.content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(f, start, length),
+            status=206,
+            content_type=blob.content_type,
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def gc_blobs(now=None, dry_run=False):
+    """Delete blobs no card links to (older than GC_GRACE); returns the count."""
+    cutoff = (now or timezone.now()) - GC_GRACE
+    orphans = MediaBlob.objects.filter(linked_at__lt=cutoff, card_links__isnull=True)
+    shas = list(orphans.values_list("sha256", flat=True))
+    if dry_run or not shas:
+        return len(shas)
+    with transaction.atomic():
+        # re-checked in the DELETE itself: a link may have appeared meanwhile
+        MediaBlob.objects.filter(
+            sha256__in=shas, linked_at__lt=cutoff, card_links__isnull=True
+        ).delete()
+    kept = set(
+        MediaBlob.objects.filter(sha256__in=shas).values_list("sha256", flat=True)
+    )
+    removed = 0
+    for sha256 in shas:
+        if sha256 in kept:
+            continue
+        path = blob_path(sha256)
+        doomed = path.with_name(f"{sha256}.gc")
+        try:
+            # an upload that finds the file gone from here on stores its own
+            os.rename(path, doomed)
+        except FileNotFoundError:
+            removed += 1
+            continue
+        # one that reused it before the rename touched it (store_blob)
+        reused = doomed.stat().st_mtime >= cutoff.timestamp()
+        if reused or MediaBlob.objects.filter(sha256=sha256).exists():
+            os.replace(doomed, path)  # same bytes if an upload re-created it
+            continue
+        doomed.unlink()
+        removed += 1
+    return removed
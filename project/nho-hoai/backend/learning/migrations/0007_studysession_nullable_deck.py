@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "learning",
+            "0006_rename_learning_ca_user_id_7f0c9a_idx_learning_ca_user_id_a61012_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="studysession",
+            name="deck",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="study_sessions",
+                to="learning.deck",
+            ),
+        ),
+    ]
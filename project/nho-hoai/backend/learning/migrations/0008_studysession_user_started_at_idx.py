@@ -0,0 +1,19 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0007_studysession_nullable_deck"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="studysession",
+            index=models.Index(
+                fields=["user", "started_at"], name="learning_st_user_id_f89b26_idx"
+            ),
+        ),
+    ]
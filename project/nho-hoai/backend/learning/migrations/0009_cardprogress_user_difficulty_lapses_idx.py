@@ -0,0 +1,24 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0008_studysession_user_started_at_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="cardprogress",
+            name="learning_ca_user_id_df3aa7_idx",
+        ),
+        migrations.AddIndex(
+            model_name="cardprogress",
+            index=models.Index(
+                fields=["user", "difficulty_score", "lapses"],
+                name="learning_ca_user_id_cdf6c5_idx",
+            ),
+        ),
+    ]
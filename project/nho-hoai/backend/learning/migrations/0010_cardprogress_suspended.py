@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0009_cardprogress_user_difficulty_lapses_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cardprogress",
+            name="suspended",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:23
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0010_cardprogress_suspended"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="cards_changed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
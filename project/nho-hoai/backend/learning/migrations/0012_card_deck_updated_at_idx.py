@@ -0,0 +1,19 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0011_deck_cards_changed_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="card",
+            index=models.Index(
+                fields=["deck", "updated_at"], name="learning_ca_deck_id_755903_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0013_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="studysession",
+            index=models.Index(
+                condition=models.Q(("ended_at__isnull", True)),
+                fields=["started_at"],
+                name="studysession_open_idx",
+            ),
+        ),
+    ]
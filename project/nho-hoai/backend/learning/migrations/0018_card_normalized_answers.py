@@ -0,0 +1,160 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:52
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# learning.grading as of this migration (frozen: later changes to the live
+# module must not change what this migration writes)
+
+# accepted answers are split on these: "to eat; to consume", "ăn / nuốt"
+ALT_SPLIT_RE = re.compile(r"[;,/、；，／]")
+PAREN_RE = re.compile(r"[(（][^)）]*[)）]")  # optional part: "(to) eat"
+SPACE_RE = re.compile(r"\s+")
+ALT_SEP = "\n"
+
+_KANA = {
+    "あ": "a", "い": "i", "う": "u", "え": "e", "お": "o",
+    "か": "ka", "き": "ki", "く": "ku", "け": "ke", "こ": "ko",
+    "さ": "sa", "し": "shi", "す": "su", "せ": "se", "そ": "so",
+    "た": "ta", "ち": "chi", "つ": "tsu", "て": "te", "と": "to",
+    "な": "na", "に": "ni", "ぬ": "nu", "ね": "ne", "の": "no",
+    "は": "ha", "ひ": "hi", "ふ": "fu", "へ": "he", "ほ": "ho",
+    "ま": "ma", "み": "mi", "む": "mu", "め": "me", "も": "mo",
+    "や": "ya", "ゆ": "yu", "よ": "yo",
+    "ら": "ra", "り": "ri", "る": "ru", "れ": "re", "ろ": "ro",
+    "わ": "wa", "ゐ": "i", "ゑ": "e", "を": "o", "ん": "n",
+    "が": "ga", "ぎ": "gi", "ぐ": "gu", "げ": "ge", "ご": "go",
+    "ざ": "za", "じ": "ji", "ず": "zu", "ぜ": "ze", "ぞ": "zo",
+    "だ": "da", "ぢ": "ji", "づ": "zu", "で": "de", "ど": "do",
+    "ば": "ba", "び": "bi", "ぶ": "bu", "べ": "be", "ぼ": "bo",
+    "ぱ": "pa", "ぴ": "pi", "ぷ": "pu", "ぺ": "pe", "ぽ": "po",
+    "ゔ": "vu",
+}  # fmt: skip
+_SMALL_Y = {"ゃ": "a", "ゅ": "u", "ょ": "o"}
+_SMALL_VOWEL = {"ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o", "ゎ": "a"}
+
+# typed-romaji spellings -> the Hepburn the kana table produces
+_ROMAJI_FOLDS = [
+    (re.compile(r"n'"), "n"),
+    (re.compile(r"nn"), "n"),
+    (re.compile(r"tch"), "cch"),
+    (re.compile(r"(?<![sc])hu"), "fu"),
+    (re.compile(r"(?<!s)si"), "shi"),
+    (re.compile(r"(?<![cs])ti"), "chi"),
+    (re.compile(r"(?<!s)tu"), "tsu"),
+    (re.compile(r"[zd]i"), "ji"),
+    (re.compile(r"du"), "zu"),
+    (re.compile(r"sy(?=[auo])"), "sh"),
+    (re.compile(r"[tc]y(?=[auo])"), "ch"),
+    (re.compile(r"[zjd]y(?=[auo])"), "j"),
+    (re.compile(r"wo"), "o"),
+]
+
+
+def _strip_latin_accents(text):
+    # only marks on Latin letters: が = か + dakuten must survive
+    out = []
+    for ch in unicodedata.normalize("NFD", text):
+        if unicodedata.combining(ch) and out and ord(out[-1]) < 0x0250:
+            continue
+        out.append(ch)
+    return unicodedata.normalize("NFC", "".join(out)).replace("đ", "d")
+
+
+def _to_hiragana(text):
+    return "".join(chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch for ch in text)
+
+
+def kana_to_romaji(text):
+    out = []
+    double_next = False
+    for ch in _to_hiragana(text):
+        if ch == "っ":
+            double_next = True
+            continue
+        if ch in _SMALL_Y and out and out[-1].endswith("i"):
+            prev = out.pop()
+            # しゃ sha, っしゃ ssha, っちゃ ccha; きゃ kya
+            out.append(
+                prev[:-1] + _SMALL_Y[ch]
+                if prev.endswith(("shi", "chi", "ji"))
+                else prev[:-1] + "y" + _SMALL_Y[ch]
+            )
+            continue
+        if ch in _SMALL_VOWEL and out and len(out[-1]) > 1:
+            out.append(out.pop()[:-1] + _SMALL_VOWEL[ch])  # ふぁ fa, てぃ ti
+            continue
+        if ch == "ー":
+            vowels = [c for c in "".join(out) if c in "aiueo"]
+            if vowels:
+                out.append(vowels[-1])
+            continue
+        roma = _KANA.get(ch) or _SMALL_VOWEL.get(ch) or _SMALL_Y.get(ch) or ch
+        if double_next and roma[:1].isalpha() and roma[:1] not in "aiueon":
+            roma = ("c" if roma.startswith("ch") else roma[0]) + roma
+        double_next = False
+        out.append(roma)
+    return "".join(out)
+
+
+def fold_romaji(text):
+    for pattern, repl in _ROMAJI_FOLDS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def normalize(text, lang=None):
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _strip_latin_accents(text)
+    if lang == "ja":
+        text = fold_romaji(kana_to_romaji(text))
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def accepted_forms(text, lang=None):
+    """Normalized alternatives of a card field, ALT_SEP-joined (stored)."""
+    forms = []
+    for alt in ALT_SPLIT_RE.split(text or ""):
+        for variant in (alt, PAREN_RE.sub(" ", alt)):
+            norm = normalize(variant, lang)
+            if norm and norm not in forms:
+                forms.append(norm)
+    return ALT_SEP.join(forms)
+
+
+def fill_norms(apps, schema_editor):
+    Card = apps.get_model("learning", "Card")
+    batch = []
+    for card in Card.objects.select_related("deck").iterator(chunk_size=1000):
+        card.term_norm = accepted_forms(card.term, card.deck.source_lang)
+        card.meaning_norm = accepted_forms(card.meaning, card.deck.target_lang)
+        batch.append(card)
+        if len(batch) >= 1000:
+            Card.objects.bulk_update(batch, ["term_norm", "meaning_norm"])
+            batch = []
+    if batch:
+        Card.objects.bulk_update(batch, ["term_norm", "meaning_norm"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0017_study_groups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="meaning_norm",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="term_norm",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_norms, migrations.RunPython.noop),
+    ]
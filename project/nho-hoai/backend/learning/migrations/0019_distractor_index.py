@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-19 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0018_card_normalized_answers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="distractor_ids",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="deck",
+            name="distractors_built_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.28 on 2026-10-19 16:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("learning", "0020_card_media"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProgressTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("card_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SyncReceipt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="cardprogress",
+            index=models.Index(
+                fields=["user", "updated_at"], name="learning_ca_user_id_1ca066_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncreceipt",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sync_receipts",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="progresstombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="progress_tombstones",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="syncreceipt",
+            constraint=models.UniqueConstraint(
+                fields=("user", "key"), name="uniq_sync_receipt"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="progresstombstone",
+            index=models.Index(
+                fields=["user", "deleted_at"], name="learning_pr_user_id_55770f_idx"
+            ),
+        ),
+    ]
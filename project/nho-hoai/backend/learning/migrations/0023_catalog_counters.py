@@ -0,0 +1,75 @@
+# Generated by Django 4.2.28 on 2026-10-19 16:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    # active_learners is left to the "refresh_catalog" job
+    Deck = apps.get_model("learning", "Deck")
+    DeckSubscription = apps.get_model("learning", "DeckSubscription")
+    Card = apps.get_model("learning", "Card")
+
+    def counts(model):
+        return dict(
+            model.objects.filter(deck__published=True)
+            .order_by()
+            .values("deck_id")
+            .annotate(n=Count("id"))
+            .values_list("deck_id", "n")
+        )
+
+    subscribers, cards = counts(DeckSubscription), counts(Card)
+    decks = list(Deck.objects.filter(published=True).only("id"))
+    for deck in decks:
+        deck.subscriber_count = subscribers.get(deck.id, 0)
+        deck.card_count = cards.get(deck.id, 0)
+    Deck.objects.bulk_update(decks, ["subscriber_count", "card_count"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0022_daily_budgets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="active_learners",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="deck",
+            name="card_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="deck",
+            name="subscriber_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="deck",
+            index=models.Index(
+                condition=models.Q(("published", True)),
+                fields=["subscriber_count", "active_learners", "id"],
+                name="deck_catalog_subscribers_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="deck",
+            index=models.Index(
+                condition=models.Q(("published", True)),
+                fields=["active_learners", "subscriber_count", "id"],
+                name="deck_catalog_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="studysession",
+            index=models.Index(
+                fields=["deck", "started_at"], name="learning_st_deck_id_28a019_idx"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
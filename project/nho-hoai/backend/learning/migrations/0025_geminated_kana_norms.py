@@ -0,0 +1,42 @@
+# Generated by Django 4.2.28 on 2026-10-19 16:26
+
+import re
+
+from django.db import migrations
+from django.db.models import Q
+
+# kana_to_romaji used to keep the "y" after a doubled shi/chi (っしょ -> "sshyo",
+# っちゃ -> "cchya"); fold_romaji leaves those alone, so stored forms differ
+# from what typed input normalizes to now ("ssho", "ccha")
+GEMINATED_Y_RE = re.compile(r"(ssh|cch)y(?=[auo])")
+
+
+def fix_norms(apps, schema_editor):
+    Card = apps.get_model("learning", "Card")
+    suspects = Card.objects.filter(
+        Q(deck__source_lang="ja", term_norm__regex=r"(ssh|cch)y")
+        | Q(deck__target_lang="ja", meaning_norm__regex=r"(ssh|cch)y")
+    ).select_related("deck")
+    batch = []
+    for card in suspects.iterator(chunk_size=1000):
+        if card.deck.source_lang == "ja":
+            card.term_norm = GEMINATED_Y_RE.sub(r"\1", card.term_norm)
+        if card.deck.target_lang == "ja":
+            card.meaning_norm = GEMINATED_Y_RE.sub(r"\1", card.meaning_norm)
+        batch.append(card)
+        if len(batch) >= 1000:
+            Card.objects.bulk_update(batch, ["term_norm", "meaning_norm"])
+            batch = []
+    if batch:
+        Card.objects.bulk_update(batch, ["term_norm", "meaning_norm"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0024_group_invites"),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_norms, migrations.RunPython.noop),
+    ]
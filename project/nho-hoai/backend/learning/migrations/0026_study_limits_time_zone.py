@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0025_geminated_kana_norms"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studylimits",
+            name="time_zone",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0026_study_limits_time_zone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studysession",
+            name="deck_scope",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.28 on 2026-10-19 17:05
+
+from django.db import migrations
+
+SECRET_KEYS = ("password", "uid", "token")
+
+
+def scrub_results(apps, schema_editor):
+    # provision_users jobs used to keep the plain credentials in Job.result
+    Job = apps.get_model("learning", "Job")
+    for job in Job.objects.filter(kind="provision_users").exclude(result=None):
+        users = job.result.get("users") if isinstance(job.result, dict) else None
+        if not users:
+            continue
+        job.result = {
+            **job.result,
+            "users": [
+                {k: v for k, v in u.items() if k not in SECRET_KEYS} for u in users
+            ],
+        }
+        job.save(update_fields=["result"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0028_job_heartbeat"),
+    ]
+
+    operations = [
+        migrations.RunPython(scrub_results, migrations.RunPython.noop),
+    ]
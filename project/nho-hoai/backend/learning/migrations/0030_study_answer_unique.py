@@ -0,0 +1,39 @@
+# Generated by Django 4.2.28 on 2026-10-19 16:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_answers(apps, schema_editor):
+    # concurrent write-behind flushes could insert the same answer twice
+    StudyAnswer = apps.get_model("learning", "StudyAnswer")
+    dupes = (
+        StudyAnswer.objects.order_by()
+        .values("session_id", "card_id", "answered_at")
+        .annotate(n=Count("id"), keep=Min("id"))
+        .filter(n__gt=1)
+    )
+    for d in dupes.iterator():
+        StudyAnswer.objects.filter(
+            session_id=d["session_id"],
+            card_id=d["card_id"],
+            answered_at=d["answered_at"],
+        ).exclude(id=d["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0029_scrub_provision_credentials"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="studyanswer",
+            constraint=models.UniqueConstraint(
+                fields=("session", "card", "answered_at"),
+                name="uniq_answer_session_card_time",
+            ),
+        ),
+    ]
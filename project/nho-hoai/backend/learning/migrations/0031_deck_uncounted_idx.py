@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-19 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("learning", "0030_study_answer_unique"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="deck",
+            index=models.Index(
+                condition=models.Q(("card_count", 0), ("published", True)),
+                fields=["id"],
+                name="deck_uncounted_idx",
+            ),
+        ),
+    ]
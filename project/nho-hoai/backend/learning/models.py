@@ -2,6 +2,8 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .grading import accepted_forms
+
 LANG_CHOICES = [
     ("en", "English"),
     ("ja", "Japanese"),
@@ -19,9 +21,41 @@ class Deck(models.Model):
     target_lang = models.CharField(max_length=2, choices=LANG_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # bumped on any card write: cheap validator for conditional GET
+    cards_changed_at = models.DateTimeField(default=timezone.now)
+    # published decks can be subscribed to (learning/sharing.py)
+    published = models.BooleanField(default=False)
+    # multiple-choice index (learning/distractors.py); stale when older
+    # than cards_changed_at
+    distractors_built_at = models.DateTimeField(null=True, blank=True)
+    # catalog popularity (learning/catalog.py): subscriber_count moves with
+    # subscribe/unsubscribe, the rest is recounted by "refresh_catalog"
+    subscriber_count = models.PositiveIntegerField(default=0, editable=False)
+    active_learners = models.PositiveIntegerField(default=0, editable=False)
+    card_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # catalog pages: WHERE published ORDER BY <counters>, id DESC
+            # (scanned backwards); published decks only
+            models.Index(
+                fields=["subscriber_count", "active_learners", "id"],
+                condition=models.Q(published=True),
+                name="deck_catalog_subscribers_idx",
+            ),
+            models.Index(
+                fields=["active_learners", "subscriber_count", "id"],
+                condition=models.Q(published=True),
+                name="deck_catalog_active_idx",
+            ),
+            # catalog.count_uncounted: published decks not counted yet
+            models.Index(
+                fields=["id"],
+                condition=models.Q(published=True, card_count=0),
+                name="deck_uncounted_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.source_lang}->{self.target_lang})"
@@ -33,6 +67,11 @@ class Card(models.Model):
     meaning = models.CharField(max_length=255)
     example = models.TextField(blank=True, default="")
     note = models.TextField(blank=True, default="")
+    # normalized accepted answers for typed-answer grading (learning/grading.py)
+    term_norm = models.TextField(blank=True, default="", editable=False)
+    meaning_norm = models.TextField(blank=True, default="", editable=False)
+    # ids of similar cards of the deck, for multiple-choice options
+    distractor_ids = models.JSONField(default=list, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -40,23 +79,139 @@ class Card(models.Model):
         ordering = ["-updated_at"]
         indexes = [
             models.Index(fields=["deck", "term"]),
+            # deck card list: WHERE deck_id = ? ORDER BY updated_at DESC
+            models.Index(fields=["deck", "updated_at"]),
         ]
 
+    def refresh_norms(self, deck=None):
+        # term is in the deck's source_lang, meaning in its target_lang
+        deck = deck or self.deck
+        self.term_norm = accepted_forms(self.term, deck.source_lang)
+        self.meaning_norm = accepted_forms(self.meaning, deck.target_lang)
+
+    def save(self, *args, **kwargs):
+        self.refresh_norms()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"term_norm", "meaning_norm"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.term} -> {self.meaning}"
 
 
+class DeckSubscription(models.Model):
+    """
+    A user studying someone else's published deck. The canonical cards are
+    shared; CardProgress stays per user and edits go to CardOverride.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="deck_subscriptions",
+    )
+    deck = models.ForeignKey(
+        Deck, on_delete=models.CASCADE, related_name="subscriptions"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "deck"], name="uniq_deck_subscription"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Subscription u{self.user_id} -> deck {self.deck_id}"
+
+
+class CardOverride(models.Model):
+    """
+    Subscriber's private edit of a shared card (copy-on-write): created on
+    first edit, NULL fields fall back to the canonical card.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="card_overrides",
+    )
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="overrides")
+    term = models.CharField(max_length=255, null=True, blank=True)
+    meaning = models.CharField(max_length=255, null=True, blank=True)
+    example = models.TextField(null=True, blank=True)
+    note = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "card"], name="uniq_user_card_override"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Override u{self.user_id}-c{self.card_id}"
+
+
+class MediaBlob(models.Model):
+    """
+    One stored file per distinct content (learning/media.py); identical
+    uploads share the row and the file.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # bumped on every upload of this content: gc_media grace period
+    linked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.content_type}, {self.size} B)"
+
+
+class CardMedia(models.Model):
+    AUDIO = "audio"
+    IMAGE = "image"
+    KIND_CHOICES = [(AUDIO, "Audio"), (IMAGE, "Image")]
+
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="media")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    blob = models.ForeignKey(
+        MediaBlob, on_delete=models.PROTECT, related_name="card_links"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["card", "kind"], name="uniq_card_media"),
+        ]
+
+    def __str__(self):
+        return f"Card {self.card_id} {self.kind} -> {self.blob_id[:12]}"
+
+
 class StudySession(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="study_sessions",
     )
+    # null = cross-deck review session ("review everything due")
     deck = models.ForeignKey(
         Deck,
         on_delete=models.CASCADE,
         related_name="study_sessions",
+        null=True,
+        blank=True,
     )
+    # review session narrowed to several decks (POST /api/study/start/
+    # deck_ids): their ids; null = every deck the user owns or subscribes to
+    deck_scope = models.JSONField(null=True, blank=True)
 
     started_at = models.DateTimeField(default=timezone.now)
     ended_at = models.DateTimeField(null=True, blank=True)
@@ -67,6 +222,18 @@ class StudySession(models.Model):
 
     class Meta:
         ordering = ["-started_at"]
+        indexes = [
+            # per-user history, newest first (scanned backwards)
+            models.Index(fields=["user", "started_at"]),
+            # catalog activity recount: WHERE deck_id IN (...) AND started_at >= ?
+            models.Index(fields=["deck", "started_at"]),
+            # open sessions only (reap_sessions); stays small once reaped
+            models.Index(
+                fields=["started_at"],
+                condition=models.Q(ended_at__isnull=True),
+                name="studysession_open_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Session {self.id} - {self.user_id} - deck {self.deck_id}"
@@ -92,12 +259,51 @@ class StudyAnswer(models.Model):
             models.Index(fields=["session", "card"]),
             models.Index(fields=["session", "answered_at"]),
         ]
+        constraints = [
+            # replayed write-behind / offline answers are deduplicated on it
+            models.UniqueConstraint(
+                fields=["session", "card", "answered_at"],
+                name="uniq_answer_session_card_time",
+            ),
+        ]
         ordering = ["answered_at"]
 
     def __str__(self):
         return f"Ans s{self.session_id} c{self.card_id} ok={self.is_correct}"
 
 
+class AnswerDaily(models.Model):
+    """
+    Compacted StudyAnswer history (learning/retention.py): one row per
+    (user, card, day). `outcomes` keeps the answers in order ("1" correct,
+    "0" wrong) so progress can still be replayed after the raw rows are gone.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="answer_days",
+    )
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="answer_days")
+    day = models.DateField()
+
+    total = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    outcomes = models.TextField(blank=True, default="")
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "card", "day"], name="uniq_answer_daily"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Daily u{self.user_id}-c{self.card_id} {self.day} {self.correct}/{self.total}"
+
+
 class CardProgress(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -127,6 +333,9 @@ class CardProgress(models.Model):
 
     last_answered_at = models.DateTimeField(null=True, blank=True)
 
+    # suspended cards are skipped by the session pickers
+    suspended = models.BooleanField(default=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -139,8 +348,217 @@ class CardProgress(models.Model):
         indexes = [
             models.Index(fields=["user", "due_at"]),
             models.Index(fields=["user", "card"]),
-            models.Index(fields=["user", "difficulty_score"]),
+            # hardest-first listing: ORDER BY difficulty_score, lapses, id (rowid)
+            models.Index(fields=["user", "difficulty_score", "lapses"]),
+            # delta sync: WHERE user_id = ? AND updated_at > cursor
+            models.Index(fields=["user", "updated_at"]),
         ]
 
     def __str__(self):
         return f"Progress u{self.user_id}-c{self.card_id} diff={self.difficulty_score}"
+
+
+class StudyLimits(models.Model):
+    """Per-user daily budgets (learning/budget.py); no row = the defaults."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="study_limits",
+    )
+    reviews_per_day = models.PositiveIntegerField()
+    new_per_day = models.PositiveIntegerField()
+    # IANA name; budgets roll over at the user's local midnight ("" = TIME_ZONE)
+    time_zone = models.CharField(max_length=64, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class DailyStudyCount(models.Model):
+    """Today's consumption: bumped with F() by every answer."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_study_counts",
+    )
+    day = models.DateField()
+    reviews = models.PositiveIntegerField(default=0)  # answers to due cards
+    new_cards = models.PositiveIntegerField(default=0)  # first-ever answers
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="uniq_daily_count"),
+        ]
+
+
+class SyncReceipt(models.Model):
+    """
+    Idempotency key of an answer uploaded by /api/sync/: a retried upload
+    finds its keys here (one lookup on the unique index) and is not counted
+    twice. Kept for SYNC_HORIZON (learning/sync.py).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="sync_receipts",
+    )
+    key = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="uniq_sync_receipt"),
+        ]
+
+
+class ProgressTombstone(models.Model):
+    """A deleted CardProgress row, so delta sync can tell clients to drop it."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="progress_tombstones",
+    )
+    card_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "deleted_at"])]
+
+
+class StudyGroup(models.Model):
+    """A class: a teacher (owner) and the students whose answers it follows."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="owned_groups",
+    )
+    name = models.CharField(max_length=120)
+    members = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, related_name="study_groups", blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.name} (owner {self.owner_id})"
+
+
+class GroupInvite(models.Model):
+    """Pending membership: a student joins a class only by accepting it."""
+
+    group = models.ForeignKey(
+        StudyGroup, on_delete=models.CASCADE, related_name="invites"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="group_invites",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["group", "user"], name="uniq_group_invite"),
+        ]
+
+    def __str__(self):
+        return f"Invite to group {self.group_id} for user {self.user_id}"
+
+
+class GroupCardStat(models.Model):
+    """
+    Per-(group, card) aggregate over the members (learning/groups.py):
+    bumped on every answer, rebuilt from CardProgress by refresh_group_stats.
+    """
+
+    group = models.ForeignKey(
+        StudyGroup, on_delete=models.CASCADE, related_name="card_stats"
+    )
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="group_stats")
+
+    attempts = models.PositiveIntegerField(default=0)
+    wrong = models.PositiveIntegerField(default=0)
+    wrong_rate = models.FloatField(default=0.0)  # wrong / attempts
+    learners = models.PositiveIntegerField(default=0)  # members with progress
+    difficulty_sum = models.IntegerField(default=0)  # sum of difficulty_score
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group", "card"], name="uniq_group_card_stat"
+            ),
+        ]
+        indexes = [
+            # hardest cards of a class: ORDER BY wrong_rate DESC (scanned backwards)
+            models.Index(fields=["group", "wrong_rate"]),
+        ]
+
+    @property
+    def avg_difficulty(self):
+        return self.difficulty_sum / self.learners if self.learners else 0.0
+
+    def __str__(self):
+        return (
+            f"Group {self.group_id} card {self.card_id}: {self.wrong}/{self.attempts}"
+        )
+
+
+class Job(models.Model):
+    """
+    Background job (learning/jobs.py), executed by `manage.py run_jobs`.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="jobs",
+        null=True,
+        blank=True,
+    )
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0..100
+    progress_message = models.CharField(max_length=255, blank=True, default="")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=128, blank=True, default="")
+    # bumped by the claiming worker while the job runs (jobs.heartbeat)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # worker poll: WHERE status = 'queued' AND run_after <= now
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.kind} [{self.status}]"
@@ -0,0 +1,121 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class SessionHistoryPagination(CursorPagination):
+    """Keyset pagination over StudySession(user, started_at)."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-started_at"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination on a fixed descending key, e.g.
+    ("difficulty_score", "lapses", "id"). The cursor holds the full key of
+    the last row, so ties never fall back to OFFSET and every page is an
+    index range scan. Rows may be model instances or values() dicts.
+    """
+
+    ordering = ()  # field names, all descending; last one must be unique
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    cursor_query_param = "cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, ""))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request, model):
+        """The cursor's key, each part cleaned by its model field's to_python()."""
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            key = json.loads(b64decode(raw.encode("ascii")).decode("utf-8"))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor.")
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise NotFound("Invalid cursor.")
+        if any(value is None or isinstance(value, bool) for value in key):
+            raise NotFound("Invalid cursor.")  # to_python() lets these through
+        try:
+            key = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, key)
+            ]
+        except (FieldDoesNotExist, ValidationError):
+            raise NotFound("Invalid cursor.")
+        return key
+
+    def encode_cursor(self, row):
+        key = [
+            row[f] if isinstance(row, dict) else getattr(row, f) for f in self.ordering
+        ]
+        return b64encode(json.dumps(key, default=str).encode("utf-8")).decode("ascii")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        key = self.decode_cursor(request, queryset.model)
+        if key is not None:
+            # (a, b, c) < (ka, kb, kc) spelled out for the ORM
+            after = Q()
+            for i, field in enumerate(self.ordering):
+                cond = Q(**{f"{field}__lt": key[i]})
+                for j in range(i):
+                    cond &= Q(**{self.ordering[j]: key[j]})
+                after |= cond
+            queryset = queryset.filter(after)
+
+        queryset = queryset.order_by(*[f"-{f}" for f in self.ordering])
+        rows = list(queryset[: page_size + 1])
+
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+class HardCardsPagination(KeysetPagination):
+    ordering = ("difficulty_score", "lapses", "id")
+
+
+class CatalogPagination(KeysetPagination):
+    ordering = ("subscriber_count", "active_learners", "id")
+    page_size = 24
+    max_page_size = 100
+
+
+class ActiveCatalogPagination(CatalogPagination):
+    ordering = ("active_learners", "subscriber_count", "id")
+
+
+# ?sort= of the deck catalog
+CATALOG_SORTS = {
+    "subscribers": CatalogPagination,
+    "active": ActiveCatalogPagination,
+}
@@ -1,10 +1,29 @@
-from rest_framework.permissions import BasePermission
+from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 class IsOwnerOfDeck(BasePermission):
     def has_object_permission(self, request, view, obj):
         return getattr(obj, "owner_id", None) == request.user.id
 
 
+class IsOwnerOrSubscriberOfDeck(BasePermission):
+    """
+    Owner: everything. Subscriber (the view's queryset already limits decks
+    to owned + subscribed): reads and the view's `subscriber_actions`.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if getattr(obj, "owner_id", None) == request.user.id:
+            return True
+        return request.method in SAFE_METHODS or view.action in getattr(
+            view, "subscriber_actions", ()
+        )
+
+
 class IsOwnerOfCardDeck(BasePermission):
     def has_object_permission(self, request, view, obj):
         return getattr(obj.deck, "owner_id", None) == request.user.id
+
+
+class IsOwnerOrSubscriberOfCardDeck(IsOwnerOrSubscriberOfDeck):
+    def has_object_permission(self, request, view, obj):
+        return super().has_object_permission(request, view, obj.deck)
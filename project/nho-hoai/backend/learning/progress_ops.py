@@ -0,0 +1,110 @@
+"""
+Set-based bulk operations on a user's CardProgress.
+
+Each op is one UPDATE/DELETE over the selected cards, so a 20k-card
+reschedule does not load or save() rows one by one, and card ids never leave
+the database. Suspend also has to create rows for never-studied cards: their
+ids are read and bulk-inserted INSERT_CHUNK at a time.
+"""
+
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .groups import refresh_member_card_stats
+from .models import CardProgress
+from .stats import invalidate_deck_stats
+from .sync import TOMBSTONE_CHUNK, record_progress_tombstones
+
+BULK_OPS = ("reset", "suspend", "unsuspend", "reschedule")
+
+# reschedule bounds (days), e.g. +14 after a vacation
+SHIFT_DAYS_MIN = -365
+SHIFT_DAYS_MAX = 365
+INSERT_CHUNK = 1000
+
+
+def _progress_qs(user, card_ids):
+    return CardProgress.objects.filter(user=user, card_id__in=card_ids)
+
+
+def reset_progress(user, card_ids):
+    """Forget scheduling: cards become "new" again."""
+    qs = _progress_qs(user, card_ids)
+    record_progress_tombstones(
+        user.id,
+        qs.values_list("card_id", flat=True).iterator(chunk_size=TOMBSTONE_CHUNK),
+    )
+    deleted, _ = qs.delete()
+    return {"deleted": deleted}
+
+
+def insert_missing_progress(user, card_ids, **values):
+    """
+    Create a CardProgress row (model defaults + `values`) for each card of the
+    `card_ids` subquery the user has none for, INSERT_CHUNK rows per
+    statement; returns how many rows were inserted (rows a concurrent
+    request inserted first are skipped).
+    """
+    progress = CardProgress.objects.filter(user=user)
+    before = progress.filter(card_id__in=card_ids).count()
+    missing = (
+        card_ids.exclude(id__in=progress.values("card_id"))
+        .values_list("id", flat=True)
+        .iterator(chunk_size=INSERT_CHUNK)
+    )
+    while chunk := list(islice(missing, INSERT_CHUNK)):
+        CardProgress.objects.bulk_create(
+            [CardProgress(user=user, card_id=cid, **values) for cid in chunk],
+            ignore_conflicts=True,
+        )
+    return progress.filter(card_id__in=card_ids).count() - before
+
+
+def set_suspended(user, card_ids, suspended: bool):
+    created = 0
+    if suspended:
+        # never-studied cards need a row to carry the flag
+        created = insert_missing_progress(user, card_ids, suspended=True)
+    updated = (
+        _progress_qs(user, card_ids)
+        .exclude(suspended=suspended)
+        .update(suspended=suspended, updated_at=timezone.now())
+    )
+    return {"created": created, "updated": updated}
+
+
+def shift_due(user, card_ids, days: int, *, only_due=False):
+    qs = _progress_qs(user, card_ids)
+    if only_due:
+        qs = qs.filter(due_at__lte=timezone.now())
+    updated = qs.update(
+        due_at=F("due_at") + timedelta(days=days), updated_at=timezone.now()
+    )
+    return {"updated": updated}
+
+
+def run_bulk_op(user, op, card_qs, *, shift_days=0, only_due=False):
+    """
+    Apply `op` to the cards of `card_qs` (already scoped to the user's decks)
+    in one transaction; returns the affected counts.
+    """
+    with transaction.atomic():
+        card_ids = card_qs.values("id")  # subquery, never materialized
+        if op == "reset":
+            result = reset_progress(user, card_ids)
+            refresh_member_card_stats(user.id, card_ids)
+        elif op == "suspend":
+            result = set_suspended(user, card_ids, True)
+        elif op == "unsuspend":
+            result = set_suspended(user, card_ids, False)
+        elif op == "reschedule":
+            result = shift_due(user, card_ids, shift_days, only_due=only_due)
+        else:
+            raise ValueError(f"unknown bulk op {op!r}")
+
+    invalidate_deck_stats(user.id, card_qs.values_list("deck_id", flat=True).distinct())
+    return result
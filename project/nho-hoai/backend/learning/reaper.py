@@ -0,0 +1,107 @@
+"""
+Close abandoned study sessions (`manage.py reap_sessions`).
+
+A session is stale when its last answer (or its start, if it has none) is
+older than the idle threshold. Stale sessions get ended_at = last answer and
+counters recomputed from StudyAnswer in one grouped query per chunk; stale
+sessions without any answer are deleted.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from . import answer_log
+from .models import StudyAnswer, StudySession
+
+IDLE_MINUTES_DEFAULT = 120
+REAP_CHUNK = 500
+
+
+def _sessions_in_answer_log():
+    # write-behind: answers not flushed yet keep their session alive
+    if not answer_log.is_enabled():
+        return set()
+    log_dir = answer_log.get_config()["LOG_DIR"]
+    return {
+        e["session_id"]
+        for path in log_dir.glob(answer_log.LOG_GLOB)
+        for e in answer_log.read_log_file(path)
+    }
+
+
+def reap_stale_sessions(
+    *, idle_minutes=IDLE_MINUTES_DEFAULT, chunk_size=REAP_CHUNK, now=None, dry_run=False
+):
+    """Returns {"closed": n, "deleted": n}."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(minutes=idle_minutes)
+    busy = _sessions_in_answer_log()
+
+    # open sessions started before the cutoff: served by the partial index,
+    # ids only (the open set stays small once the reaper runs regularly)
+    candidates = list(
+        StudySession.objects.filter(ended_at__isnull=True, started_at__lt=cutoff)
+        .order_by("started_at")
+        .values_list("id", flat=True)
+    )
+
+    closed = deleted = 0
+    for i in range(0, len(candidates), chunk_size):
+        ids = candidates[i : i + chunk_size]
+        totals = {
+            row["session_id"]: row
+            for row in StudyAnswer.objects.filter(session_id__in=ids)
+            .values("session_id")
+            .annotate(
+                last=Max("answered_at"),
+                total=Count("id"),
+                correct=Count("id", filter=Q(is_correct=True)),
+            )
+            .order_by()
+        }
+
+        to_close = []
+        empty = []
+        for sid in ids:
+            if sid in busy:
+                continue
+            row = totals.get(sid)
+            if row is None:
+                empty.append(sid)
+            elif row["last"] < cutoff:
+                to_close.append(
+                    StudySession(
+                        id=sid,
+                        ended_at=row["last"],
+                        total_answered=row["total"],
+                        correct_count=row["correct"],
+                        wrong_count=row["total"] - row["correct"],
+                    )
+                )
+
+        if dry_run:
+            closed += len(to_close)
+            deleted += len(empty)
+            continue
+
+        with transaction.atomic():
+            if to_close:
+                StudySession.objects.bulk_update(
+                    to_close,
+                    ["ended_at", "total_answered", "correct_count", "wrong_count"],
+                )
+            if empty:
+                # re-check inside the transaction: an answer may have landed
+                has_answers = Exists(StudyAnswer.objects.filter(session=OuterRef("pk")))
+                _, per_model = (
+                    StudySession.objects.filter(id__in=empty, ended_at__isnull=True)
+                    .exclude(has_answers)
+                    .delete()
+                )
+                deleted += per_model.get("learning.StudySession", 0)
+        closed += len(to_close)
+
+    return {"closed": closed, "deleted": deleted}
@@ -0,0 +1,179 @@
+"""
+Read-replica routing for read-heavy learning endpoints.
+
+- Views opt in with `with replica_reads(request.user): ...`; learning models
+  read inside the block go to settings.LEARNING_REPLICA_ALIAS ("replica").
+- Any write marks the request; PrimaryPinMiddleware then pins the user to the
+  primary so they read their own writes while the replica catches up.
+  Write-behind answers pin in answer_log (when logged and when flushed).
+- A replica refreshed by `manage.py refresh_sqlite_replica` carries a stamp
+  file with the time its copy was taken: a pin holds until a copy newer than
+  the write. Without a stamp (streaming replication) a pin lasts
+  LEARNING_REPLICA_PIN_SECONDS, which should cover the replication lag.
+- Without a "replica" entry in DATABASES everything stays on "default".
+- `read_snapshot(alias)` is the transaction for read-only blocks.
+"""
+
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+REPLICA_PIN_SECONDS_DEFAULT = 10
+
+_read_alias = ContextVar("learning_read_alias", default=None)
+_wrote = ContextVar("learning_wrote", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "LEARNING_REPLICA_ALIAS", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+def _pin_key(user_id):
+    return f"learning:pin-primary:{user_id}"
+
+
+def _pin_seconds():
+    return getattr(
+        settings, "LEARNING_REPLICA_PIN_SECONDS", REPLICA_PIN_SECONDS_DEFAULT
+    )
+
+
+def refresh_stamp_path(alias=None):
+    """Stamp file of a file-copied (SQLite) replica, or None."""
+    alias = alias or replica_alias()
+    if alias is None:
+        return None
+    db = settings.DATABASES[alias]
+    if "sqlite" not in db["ENGINE"]:
+        return None
+    return f"{db['NAME']}.refreshed"
+
+
+def replica_refreshed_at():
+    """Time the replica's current copy was taken, or None if not stamped."""
+    path = refresh_stamp_path()
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def stamp_refresh(taken_at, alias=None):
+    """Called by the refresh command once the copy taken at `taken_at` is in place."""
+    path = refresh_stamp_path(alias)
+    with open(path, "a"):
+        pass
+    os.utime(path, (taken_at, taken_at))
+
+
+def pin_primary(user_id, written_at=None):
+    """
+    Read `user_id` from the primary until the replica has data as of
+    `written_at` (default now).
+    """
+    written_at = time.time() if written_at is None else written_at
+    key = _pin_key(user_id)
+    pinned = cache.get(key)
+    if pinned is not None and pinned >= written_at:
+        return
+    # stamped replica: no expiry, is_pinned() drops the key after a refresh
+    timeout = None if replica_refreshed_at() is not None else _pin_seconds()
+    cache.set(key, written_at, timeout)
+
+
+def is_pinned(user_id):
+    written_at = cache.get(_pin_key(user_id))
+    if written_at is None:
+        return False
+    refreshed_at = replica_refreshed_at()
+    if refreshed_at is None:
+        return time.time() < written_at + _pin_seconds()
+    if refreshed_at > written_at:
+        cache.delete(_pin_key(user_id))
+        return False
+    return True
+
+
+def read_alias():
+    """DB alias the current block reads learning models from."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def replica_reads(user, *, primary=False):
+    """`primary=True`: the caller knows the replica cannot have what it needs."""
+    alias = replica_alias()
+    if primary or alias is None or (user is not None and is_pinned(user.id)):
+        alias = None
+    token = _read_alias.set(alias)
+    try:
+        yield alias or DEFAULT_DB_ALIAS
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def read_snapshot(using=DEFAULT_DB_ALIAS):
+    """
+    atomic() for read-only blocks whose reads must all see one snapshot.
+    On nho_hoai.sqlite_backend it opens DEFERRED (SQLite read transactions
+    are snapshots), so a summary never takes the write lock that
+    transaction_mode=IMMEDIATE would grab; on PostgreSQL it asks for
+    REPEATABLE READ, as READ COMMITTED takes a new snapshot per statement.
+    """
+    conn = connections[using]
+    outermost = not conn.in_atomic_block
+    deferred = getattr(conn, "deferred_transactions", None)
+    with deferred() if deferred else nullcontext(), transaction.atomic(using=using):
+        if outermost and conn.vendor == "postgresql":
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
+
+
+class ReplicaRouter:
+    route_app_labels = {"learning"}
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and model._meta.app_label in self.route_app_labels:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            return False
+        return None
+
+
+class PrimaryPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            # DRF copies the authenticated user back onto the HttpRequest
+            user = getattr(request, "user", None)
+            if _wrote.get() and user is not None and user.is_authenticated:
+                pin_primary(user.id)
+        finally:
+            _wrote.reset(token)
+        return response
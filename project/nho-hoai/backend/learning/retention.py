@@ -0,0 +1,185 @@
+"""
+StudyAnswer retention (`manage.py compact_answers`).
+
+Raw answers older than the retention window are folded into AnswerDaily
+(one row per user, card and day) and deleted in chunks. CardProgress already
+holds the scheduling state and StudySession its counters, so nothing that
+reads them changes; rebuild_progress replays AnswerDaily.outcomes first.
+
+Only answers of closed sessions are compacted: an open session is left for
+reap_sessions, which needs its answers to finalize it.
+"""
+
+import gzip
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AnswerDaily, StudyAnswer
+
+RETENTION_DAYS_DEFAULT = 180
+COMPACT_CHUNK = 2000
+
+
+def _fold(rows):
+    """Raw answer rows (answered_at order) -> {(user, card, day): aggregate}."""
+    folded = {}
+    for r in rows:
+        key = (r["user_id"], r["card_id"], timezone.localdate(r["answered_at"]))
+        agg = folded.get(key)
+        if agg is None:
+            agg = folded[key] = {
+                "total": 0,
+                "correct": 0,
+                "outcomes": [],
+                "first_at": r["answered_at"],
+                "last_at": r["answered_at"],
+            }
+        agg["total"] += 1
+        agg["correct"] += r["is_correct"]
+        agg["outcomes"].append("1" if r["is_correct"] else "0")
+        agg["last_at"] = r["answered_at"]
+    return folded
+
+
+def _merge_into_daily(folded):
+    existing = {
+        (d.user_id, d.card_id, d.day): d
+        for d in AnswerDaily.objects.filter(
+            user_id__in={k[0] for k in folded},
+            card_id__in={k[1] for k in folded},
+            day__in={k[2] for k in folded},
+        )
+    }
+    to_update = []
+    to_create = []
+    for (user_id, card_id, day), agg in folded.items():
+        outcomes = "".join(agg["outcomes"])
+        d = existing.get((user_id, card_id, day))
+        if d is None:
+            to_create.append(
+                AnswerDaily(
+                    user_id=user_id,
+                    card_id=card_id,
+                    day=day,
+                    total=agg["total"],
+                    correct=agg["correct"],
+                    outcomes=outcomes,
+                    first_at=agg["first_at"],
+                    last_at=agg["last_at"],
+                )
+            )
+            continue
+        d.total += agg["total"]
+        d.correct += agg["correct"]
+        if agg["first_at"] >= d.last_at:
+            d.outcomes += outcomes
+        else:
+            # out-of-order chunk (late flush): keep counts exact, order approximate
+            d.outcomes = outcomes + d.outcomes
+        d.first_at = min(d.first_at, agg["first_at"])
+        d.last_at = max(d.last_at, agg["last_at"])
+        to_update.append(d)
+
+    if to_create:
+        AnswerDaily.objects.bulk_create(to_create, batch_size=500)
+    if to_update:
+        AnswerDaily.objects.bulk_update(
+            to_update,
+            ["total", "correct", "outcomes", "first_at", "last_at"],
+            batch_size=500,
+        )
+    return len(to_create), len(to_update)
+
+
+def _archive_path(archive_dir):
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+    return archive_dir / f"answers-{stamp}.jsonl.gz"
+
+
+def compact_answers(
+    *,
+    days=RETENTION_DAYS_DEFAULT,
+    chunk_size=COMPACT_CHUNK,
+    archive_dir=None,
+    now=None,
+):
+    """
+    Fold + delete StudyAnswer rows older than `days`, one transaction per
+    chunk. With `archive_dir`, raw rows are appended to a gzipped JSONL file
+    before their chunk is deleted. Returns counts.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=days)
+    archive = gzip.open(_archive_path(archive_dir), "at") if archive_dir else None
+
+    stats = {"answers": 0, "created": 0, "updated": 0}
+    last_id = 0
+    try:
+        while True:
+            # id order ~ answered_at order (append-only table)
+            rows = list(
+                StudyAnswer.objects.filter(
+                    id__gt=last_id,
+                    answered_at__lt=cutoff,
+                    session__ended_at__isnull=False,
+                )
+                .order_by("id")
+                .values(
+                    "id",
+                    "session_id",
+                    "card_id",
+                    "is_correct",
+                    "answered_at",
+                    user_id=F("session__user_id"),
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            rows.sort(key=lambda r: (r["answered_at"], r["id"]))
+
+            if archive is not None:
+                for r in rows:
+                    archive.write(
+                        json.dumps(
+                            {**r, "answered_at": r["answered_at"].isoformat()},
+                            separators=(",", ":"),
+                        )
+                        + "\n"
+                    )
+                archive.flush()
+
+            with transaction.atomic():
+                created, updated = _merge_into_daily(_fold(rows))
+                StudyAnswer.objects.filter(id__in=[r["id"] for r in rows]).delete()
+
+            stats["answers"] += len(rows)
+            stats["created"] += created
+            stats["updated"] += updated
+    finally:
+        if archive is not None:
+            archive.close()
+    return stats
+
+
+def compacted_events(user_id, card_ids):
+    """
+    (card_id, is_correct, answered_at) from AnswerDaily, in order per card,
+    for replay. Answers inside a day are spread between first_at and last_at.
+    """
+    for d in (
+        AnswerDaily.objects.filter(user_id=user_id, card__in=card_ids)
+        .order_by("first_at", "id")
+        .iterator()
+    ):
+        n = len(d.outcomes)
+        step = (d.last_at - d.first_at) / (n - 1) if n > 1 else timedelta(0)
+        for i, ch in enumerate(d.outcomes):
+            yield d.card_id, ch == "1", d.first_at + step * i
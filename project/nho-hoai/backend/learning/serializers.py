@@ -1,9 +1,54 @@
-from rest_framework import serializers
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from .models import Card, CardProgress, Deck, StudySession
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
+from .budget import LIMIT_MAX
+from .models import (
+    Card,
+    CardProgress,
+    Deck,
+    Job,
+    StudyGroup,
+    StudyLimits,
+    StudySession,
+)
 
-class DeckSerializer(serializers.ModelSerializer):
+
+def requested_fields(request, allowed):
+    """`?fields=a,b` -> those of `allowed` (declared order), or None."""
+    if request is None:
+        return None
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    wanted = {f.strip() for f in raw.split(",") if f.strip()}
+    return [f for f in allowed if f in wanted] or None
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: `fields=[...]` kwarg, or `?fields=id,term` on GET
+    requests (via context["request"]), drops every other field.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is None:
+            request = self.context.get("request")
+            if request is not None and request.method in ("GET", "HEAD"):
+                fields = requested_fields(request, list(self.fields))
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class DeckSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     cards_count = serializers.IntegerField(read_only=True)
 
     class Meta:
@@ -14,10 +59,12 @@ class DeckSerializer(serializers.ModelSerializer):
             "source_lang",
             "target_lang",
             "cards_count",
+            "owner",
+            "published",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "cards_count", "created_at", "updated_at"]
+        read_only_fields = ["id", "cards_count", "owner", "created_at", "updated_at"]
 
     def validate(self, attrs):
         src = attrs.get("source_lang", getattr(self.instance, "source_lang", None))
@@ -29,7 +76,7 @@ class DeckSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class CardSerializer(serializers.ModelSerializer):
+class CardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     deck_id = serializers.IntegerField(write_only=True, required=False)
 
     class Meta:
@@ -63,7 +110,20 @@ class CardSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class StudySessionSerializer(serializers.ModelSerializer):
+# read shape of CardSerializer, for values()-based listings
+CARD_FIELDS = [
+    "id",
+    "deck",
+    "term",
+    "meaning",
+    "example",
+    "note",
+    "created_at",
+    "updated_at",
+]
+
+
+class StudySessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = StudySession
         fields = [
@@ -78,7 +138,32 @@ class StudySessionSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class CardProgressSerializer(serializers.ModelSerializer):
+class StudySessionHistorySerializer(StudySessionSerializer):
+    last_answered_at = serializers.DateTimeField(read_only=True)
+    accuracy = serializers.SerializerMethodField()
+    duration_seconds = serializers.SerializerMethodField()
+
+    class Meta(StudySessionSerializer.Meta):
+        fields = StudySessionSerializer.Meta.fields + [
+            "last_answered_at",
+            "accuracy",
+            "duration_seconds",
+        ]
+        read_only_fields = fields
+
+    def get_accuracy(self, obj):
+        if not obj.total_answered:
+            return None
+        return round(obj.correct_count / obj.total_answered, 3)
+
+    def get_duration_seconds(self, obj):
+        end = obj.ended_at or getattr(obj, "last_answered_at", None)
+        if end is None:
+            return 0
+        return max(0, int((end - obj.started_at).total_seconds()))
+
+
+class CardProgressSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CardProgress
         fields = [
@@ -95,7 +180,127 @@ class CardProgressSerializer(serializers.ModelSerializer):
             "total_correct",
             "total_wrong",
             "last_answered_at",
+            "suspended",
             "created_at",
             "updated_at",
         ]
         read_only_fields = fields
+
+
+class StudyGroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    members_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = StudyGroup
+        fields = ["id", "name", "members_count", "created_at"]
+        read_only_fields = ["id", "members_count", "created_at"]
+
+
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "progress_message",
+            "result",
+            "error",
+            "attempts",
+            "max_attempts",
+            "run_after",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class StudyLimitsSerializer(serializers.ModelSerializer):
+    reviews_per_day = serializers.IntegerField(min_value=0, max_value=LIMIT_MAX)
+    new_per_day = serializers.IntegerField(min_value=0, max_value=LIMIT_MAX)
+
+    class Meta:
+        model = StudyLimits
+        fields = ["reviews_per_day", "new_per_day", "time_zone"]
+
+    def validate_time_zone(self, value):
+        if value:
+            try:
+                ZoneInfo(value)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise serializers.ValidationError("Unknown time zone.")
+        return value
+
+
+# --- hot paths: hand-written equivalents of the serializers above ---
+
+
+# hand-built payloads render datetimes like DateTimeField does
+# (DATETIME_FORMAT, current time zone), not like the JSON encoder
+_DATETIME = serializers.DateTimeField()
+
+
+def format_datetime(value):
+    return _DATETIME.to_representation(value)
+
+
+def _row_datetime_formatter():
+    # DateTimeField.to_representation, minus its per-value setting lookups
+    if api_settings.DATETIME_FORMAT != ISO_8601 or not settings.USE_TZ:
+        return format_datetime
+    tz = timezone.get_current_timezone()
+
+    def fmt(value):
+        if timezone.is_naive(value):
+            return format_datetime(value)
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return fmt
+
+
+def format_row_datetimes(rows):
+    """values() rows, in place: datetimes as their serializer renders them."""
+    fmt = _row_datetime_formatter()
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, datetime):
+                row[key] = fmt(value)
+    return rows
+
+
+def session_payload(session):
+    """Same shape as StudySessionSerializer(session).data."""
+    return {
+        "id": session.id,
+        "deck": session.deck_id,
+        "started_at": format_datetime(session.started_at),
+        "ended_at": format_datetime(session.ended_at),
+        "total_answered": session.total_answered,
+        "correct_count": session.correct_count,
+        "wrong_count": session.wrong_count,
+    }
+
+
+def progress_payload(progress):
+    """Same shape as CardProgressSerializer(progress).data."""
+    return {
+        "id": progress.id,
+        "user": progress.user_id,
+        "card": progress.card_id,
+        "ease": progress.ease,
+        "interval_days": progress.interval_days,
+        "due_at": format_datetime(progress.due_at),
+        "difficulty_score": progress.difficulty_score,
+        "lapses": progress.lapses,
+        "wrong_streak": progress.wrong_streak,
+        "correct_streak": progress.correct_streak,
+        "total_correct": progress.total_correct,
+        "total_wrong": progress.total_wrong,
+        "last_answered_at": format_datetime(progress.last_answered_at),
+        "suspended": progress.suspended,
+        "created_at": format_datetime(progress.created_at),
+        "updated_at": format_datetime(progress.updated_at),
+    }
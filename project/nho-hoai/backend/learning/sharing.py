@@ -0,0 +1,108 @@
+"""
+Copy-on-write shared decks.
+
+Subscribing to a published deck is one DeckSubscription row; subscribers
+read the owner's Card rows directly. A subscriber's edit creates (or
+updates) a CardOverride for that user only, and every card payload served
+to a subscriber goes through `overlay_overrides`.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+
+from .catalog import adjust_subscriber_count
+from .models import CardOverride, Deck, DeckSubscription
+
+OVERRIDE_FIELDS = ("term", "meaning", "example", "note")
+
+
+def subscribed_deck_ids(user):
+    """Subquery of the deck ids `user` subscribes to."""
+    return DeckSubscription.objects.filter(user=user).values("deck_id")
+
+
+def readable_decks(user):
+    """Decks `user` owns or subscribes to."""
+    return Deck.objects.filter(Q(owner=user) | Q(id__in=subscribed_deck_ids(user)))
+
+
+def readable_cards_q(user, prefix=""):
+    """Q over Card (or `prefix`="card__" from a related model) for readable cards."""
+    return Q(**{f"{prefix}deck__owner": user}) | Q(
+        **{f"{prefix}deck_id__in": subscribed_deck_ids(user)}
+    )
+
+
+def subscribe(user, deck):
+    """Single-row insert (+ the catalog counter); returns (subscription, created)."""
+    with transaction.atomic():
+        sub, created = DeckSubscription.objects.get_or_create(user=user, deck=deck)
+        if created:
+            adjust_subscriber_count(deck.id, 1)
+    return sub, created
+
+
+def unsubscribe(user, deck):
+    """Drops the subscription and the user's overrides; progress is kept."""
+    with transaction.atomic():
+        deleted, _ = DeckSubscription.objects.filter(user=user, deck=deck).delete()
+        CardOverride.objects.filter(user=user, card__deck=deck).delete()
+        if deleted:
+            adjust_subscriber_count(deck.id, -1)
+    return bool(deleted)
+
+
+def save_override(user, card, data):
+    """Copy-on-write edit of a shared card; returns the override."""
+    values = {f: data[f] for f in OVERRIDE_FIELDS if f in data}
+    override, created = CardOverride.objects.get_or_create(
+        user=user, card=card, defaults=values
+    )
+    if not created and values:
+        for f, v in values.items():
+            setattr(override, f, v)
+        override.save(update_fields=list(values) + ["updated_at"])
+    return override
+
+
+def overlay_overrides(user, rows, *, key="id"):
+    """
+    Apply `user`'s overrides to card dicts in place (one query). `key` is
+    the dict key holding the card id ("card_id" for progress rows).
+    """
+    ids = [r[key] for r in rows]
+    if not ids:
+        return rows
+    overrides = {
+        o["card_id"]: o
+        for o in CardOverride.objects.filter(user=user, card_id__in=ids).values(
+            "card_id", *OVERRIDE_FIELDS
+        )
+    }
+    if not overrides:
+        return rows
+    for r in rows:
+        o = overrides.get(r[key])
+        if o is None:
+            continue
+        for f in OVERRIDE_FIELDS:
+            if f in r and o[f] is not None:
+                r[f] = o[f]
+    return rows
+
+
+def apply_override(card, override):
+    """Copy the non-NULL fields of `override` onto `card` (not saved)."""
+    for f in OVERRIDE_FIELDS:
+        value = getattr(override, f)
+        if value is not None:
+            setattr(card, f, value)
+    return card
+
+
+def overlay_card(user, card):
+    """Same as overlay_overrides for one Card instance."""
+    override = CardOverride.objects.filter(user=user, card=card).first()
+    if override is not None:
+        apply_override(card, override)
+    return card
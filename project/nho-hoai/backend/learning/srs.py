@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Card, CardProgress
+
+# --- Difficulty policy (Option 2 persisted) ---
+DIFF_MIN = 0
+DIFF_MAX = 100
+DIFF_INC_WRONG = 20
+DIFF_DEC_CORRECT = 10
+HARD_THRESHOLD = 40
+
+
+def clamp_int(n: int, lo: int, hi: int) -> int:
+    return max(lo, min(hi, n))
+
+
+def ensure_progress(user, card: Card) -> CardProgress:
+    progress, _ = CardProgress.objects.get_or_create(
+        user=user,
+        card=card,
+        defaults={
+            "due_at": timezone.now(),
+            "ease": 2.5,
+            "interval_days": 0,
+            "difficulty_score": 0,
+        },
+    )
+    return progress
+
+
+def apply_srs(progress: CardProgress, is_correct: bool, *, now=None, save=True):
+    """
+    - scheduling: simple SM-2-ish
+    - difficulty_score (0..100): wrong +20, correct -10
+
+    `now` lets replayed answers (write-behind log) keep their original time,
+    `save=False` leaves persisting to the caller (bulk_update / projection).
+    """
+    if now is None:
+        now = timezone.now()
+    progress.last_answered_at = now
+
+    # persistent difficulty
+    if is_correct:
+        progress.difficulty_score = clamp_int(
+            progress.difficulty_score - DIFF_DEC_CORRECT, DIFF_MIN, DIFF_MAX
+        )
+    else:
+        progress.difficulty_score = clamp_int(
+            progress.difficulty_score + DIFF_INC_WRONG, DIFF_MIN, DIFF_MAX
+        )
+
+    if is_correct:
+        progress.total_correct += 1
+        progress.correct_streak += 1
+        progress.wrong_streak = 0
+
+        progress.ease = max(1.3, progress.ease + 0.1)
+        if progress.interval_days == 0:
+            progress.interval_days = 1
+        elif progress.interval_days == 1:
+            progress.interval_days = 3
+        else:
+            progress.interval_days = max(
+                1, int(round(progress.interval_days * progress.ease))
+            )
+
+        progress.due_at = now + timedelta(days=progress.interval_days)
+
+    else:
+        progress.total_wrong += 1
+        progress.lapses += 1
+        progress.wrong_streak += 1
+        progress.correct_streak = 0
+
+        progress.ease = max(1.3, progress.ease - 0.2)
+        progress.interval_days = 0
+        progress.due_at = now + timedelta(minutes=10)
+
+    if save:
+        progress.save()
+
+
+def count_late_answer(progress: CardProgress, is_correct: bool):
+    """
+    An answer older than progress.last_answered_at (uploaded late by an
+    offline client): counted in the totals, the schedule left as the newer
+    answers set it.
+    """
+    if is_correct:
+        progress.total_correct += 1
+    else:
+        progress.total_wrong += 1
+
+
+# fields touched by apply_srs (for bulk_update)
+SRS_FIELDS = [
+    "last_answered_at",
+    "difficulty_score",
+    "total_correct",
+    "total_wrong",
+    "correct_streak",
+    "wrong_streak",
+    "lapses",
+    "ease",
+    "interval_days",
+    "due_at",
+    "updated_at",
+]
@@ -0,0 +1,116 @@
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Avg, Count, FilteredRelation, Q
+from django.utils import timezone
+
+from .models import Card
+from .replica import read_alias, replica_alias
+from .srs import HARD_THRESHOLD
+
+# interval (days) from which a card counts as "mature" (Anki convention)
+MATURE_INTERVAL_DAYS = 21
+
+DECK_STATS_TTL = 300  # seconds; "due" drifts with time, answers invalidate
+# computed on the replica: the invalidation on a write may come before the
+# replica has the write, so such entries are kept apart and briefly
+DECK_STATS_REPLICA_TTL = 30
+
+
+def _deck_stats_key(user_id, deck_id, alias=DEFAULT_DB_ALIAS, version=0):
+    return f"learning:deck-stats:{alias}:{deck_id}:{version}:{user_id}"
+
+
+def _deck_version_key(deck_id):
+    return f"learning:deck-stats-version:{deck_id}"
+
+
+def _deck_version(deck_id):
+    """
+    Part of every learner's stats key of the deck; bumped when its cards
+    change. A lost version is replaced by a fresh one, never by an old one.
+    """
+    key = _deck_version_key(deck_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def compute_deck_stats(user, deck):
+    """
+    Mastery distribution of `deck` for `user` in one aggregate query:
+    Card LEFT JOIN CardProgress (this user only) with conditional buckets.
+    """
+    now = timezone.now()
+    row = (
+        Card.objects.filter(deck=deck)
+        .annotate(my=FilteredRelation("progress", condition=Q(progress__user=user)))
+        .aggregate(
+            total=Count("id"),
+            new=Count("id", filter=Q(my__id__isnull=True)),
+            learning=Count("id", filter=Q(my__interval_days__lt=MATURE_INTERVAL_DAYS)),
+            mature=Count("id", filter=Q(my__interval_days__gte=MATURE_INTERVAL_DAYS)),
+            hard=Count("id", filter=Q(my__difficulty_score__gte=HARD_THRESHOLD)),
+            due=Count("id", filter=Q(my__due_at__lte=now, my__suspended=False)),
+            suspended=Count("id", filter=Q(my__suspended=True)),
+            avg_ease=Avg("my__ease"),
+            avg_difficulty=Avg("my__difficulty_score"),
+        )
+    )
+
+    return {
+        "deck_id": deck.id,
+        "total": row["total"],
+        "new": row["new"],
+        "learning": row["learning"],
+        "mature": row["mature"],
+        "hard": row["hard"],
+        "due": row["due"],
+        "suspended": row["suspended"],
+        "avg_ease": round(row["avg_ease"], 2) if row["avg_ease"] is not None else None,
+        "avg_difficulty": (
+            round(row["avg_difficulty"], 1)
+            if row["avg_difficulty"] is not None
+            else None
+        ),
+        "policy": {
+            "mature_interval_days": MATURE_INTERVAL_DAYS,
+            "hard_threshold": HARD_THRESHOLD,
+        },
+        "computed_at": now,
+    }
+
+
+def deck_stats(user, deck):
+    """compute_deck_stats() cached per database alias it was read from."""
+    alias = read_alias()
+    key = _deck_stats_key(user.id, deck.id, alias, _deck_version(deck.id))
+    data = cache.get(key)
+    if data is None:
+        data = compute_deck_stats(user, deck)
+        ttl = DECK_STATS_TTL if alias == DEFAULT_DB_ALIAS else DECK_STATS_REPLICA_TTL
+        cache.set(key, data, ttl)
+    return data
+
+
+def invalidate_deck_stats(user_id, deck_ids):
+    """One learner's progress in `deck_ids` changed."""
+    deck_ids = {d for d in deck_ids if d}
+    versions = cache.get_many([_deck_version_key(d) for d in deck_ids])
+    aliases = {DEFAULT_DB_ALIAS, replica_alias()} - {None}
+    cache.delete_many(
+        [
+            _deck_stats_key(user_id, d, alias, version)
+            for d in deck_ids
+            if (version := versions.get(_deck_version_key(d))) is not None
+            for alias in aliases
+        ]
+    )
+
+
+def invalidate_deck_card_stats(*deck_ids):
+    """The cards of `deck_ids` changed: drop every learner's (owner, subscribers)."""
+    cache.set_many({_deck_version_key(d): time.time_ns() for d in deck_ids if d}, None)
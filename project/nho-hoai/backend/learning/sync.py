@@ -0,0 +1,355 @@
+"""
+Delta sync for offline-capable clients (POST /api/sync/).
+
+Up: answers studied offline, each with a client-generated idempotency key.
+Keys already in SyncReceipt (unique (user, key)) are reported as duplicates
+and skipped, so a retried upload never counts twice; new answers go through
+answer_log.write_entries (the write-behind batch writer) in answer order,
+and one it skips (same session, card and time already stored) is a
+duplicate too.
+An answer older than the card's last answer (another device synced first)
+is recorded and counted but does not reschedule the card.
+
+Down: everything changed since the client's cursor (a server timestamp):
+decks, cards of decks whose cards changed (+ their full id list, so deleted
+cards can be dropped), the user's card overrides, CardProgress rows and
+ProgressTombstone ids of deleted progress. A missing or too old cursor gets a
+full snapshot (`full: true`). Cards (in (deck, id) order, the deck index's
+own) and progress (in card order) come SYNC_PAGE_SIZE rows at a time: while `next_page` is set the client posts it back (with
+no cursor) for the rest; decks, card id lists and removals come with the
+first page, and every page carries the cursor taken on the first.
+"""
+
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .answer_log import write_entries
+from .models import (
+    Card,
+    CardOverride,
+    CardProgress,
+    DeckSubscription,
+    ProgressTombstone,
+    StudySession,
+    SyncReceipt,
+)
+from .serializers import CARD_FIELDS
+from .sharing import overlay_overrides, readable_cards_q, readable_decks
+
+SYNC_MAX_ANSWERS = 1000  # per request
+SYNC_KEY_MAX = 64
+# a cursor older than this gets a full snapshot; receipts/tombstones live as long
+SYNC_HORIZON = timedelta(days=30)
+# changes committed by transactions still open when the cursor was taken
+SYNC_OVERLAP = timedelta(seconds=5)
+TOMBSTONE_CHUNK = 1000
+SYNC_PAGE_SIZE = 2000  # cards, and progress rows, per response
+
+DECK_SYNC_FIELDS = [
+    "id",
+    "title",
+    "source_lang",
+    "target_lang",
+    "owner",
+    "published",
+    "updated_at",
+]
+PROGRESS_SYNC_FIELDS = [
+    "card_id",
+    "ease",
+    "interval_days",
+    "due_at",
+    "difficulty_score",
+    "lapses",
+    "wrong_streak",
+    "correct_streak",
+    "total_correct",
+    "total_wrong",
+    "last_answered_at",
+    "suspended",
+    "updated_at",
+]
+
+
+class SyncConflict(Exception):
+    """A concurrent upload with the same keys committed first; retry."""
+
+
+def parse_cursor(raw, now):
+    """Datetime to diff from, or None for a full snapshot."""
+    since = parse_datetime(raw) if isinstance(raw, str) else None
+    if since is None or timezone.is_naive(since) or since < now - SYNC_HORIZON:
+        return None
+    return min(since, now) - SYNC_OVERLAP
+
+
+def encode_page(taken_at, since, after):
+    """`next_page` token: the first page's cursor + where cards/progress stop."""
+    page = {
+        "at": taken_at.isoformat(),
+        "since": since.isoformat() if since else None,
+        "card": after[0],
+        "progress": after[1],
+    }
+    return b64encode(json.dumps(page).encode("utf-8")).decode("ascii")
+
+
+def parse_page(raw):
+    """
+    (taken_at, since, ((deck id, card id), progress card id)); ValueError if
+    the token is not one of ours.
+    """
+    try:
+        page = json.loads(b64decode(str(raw).encode("ascii")).decode("utf-8"))
+        taken_at = datetime.fromisoformat(page["at"])
+        since = datetime.fromisoformat(page["since"]) if page["since"] else None
+        deck_id, card_id = page["card"]
+        after = ((int(deck_id), int(card_id)), int(page["progress"]))
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValueError("invalid page token")
+    if timezone.is_naive(taken_at) or (since and timezone.is_naive(since)):
+        raise ValueError("invalid page token")
+    return taken_at, since, after
+
+
+def record_progress_tombstones(user_id, card_ids):
+    """
+    Remember deleted CardProgress rows (resets, rebuilds) for delta sync.
+    `card_ids` may be a lazy iterator: it is consumed TOMBSTONE_CHUNK at a time.
+    """
+    card_ids = iter(card_ids)
+    while chunk := list(islice(card_ids, TOMBSTONE_CHUNK)):
+        ProgressTombstone.objects.bulk_create(
+            [ProgressTombstone(user_id=user_id, card_id=cid) for cid in chunk]
+        )
+
+
+def _clean_answers(raw_answers, now):
+    """(valid entries, rejected [{key, detail}]); one entry per key."""
+    valid, rejected, keys = [], [], set()
+    for a in raw_answers:
+        key = a.get("key") if isinstance(a, dict) else None
+        if not isinstance(key, str) or not 0 < len(key) <= SYNC_KEY_MAX:
+            rejected.append({"key": key, "detail": "key must be 1-64 chars."})
+            continue
+        if key in keys:
+            continue
+        card_id = a.get("card_id")
+        is_correct = a.get("is_correct")
+        if not isinstance(card_id, int) or not isinstance(is_correct, bool):
+            rejected.append({"key": key, "detail": "card_id, is_correct required."})
+            continue
+        answered_at = parse_datetime(str(a.get("answered_at") or ""))
+        if answered_at is None or timezone.is_naive(answered_at):
+            answered_at = now
+        session_id = a.get("session_id")
+        keys.add(key)
+        valid.append(
+            {
+                "key": key,
+                "card_id": card_id,
+                "is_correct": is_correct,
+                # offline clocks drift: never in the future, never past the horizon
+                "answered_at": max(min(answered_at, now), now - SYNC_HORIZON),
+                "session_id": session_id if isinstance(session_id, int) else None,
+            }
+        )
+    return valid, rejected
+
+
+def upload_answers(user, raw_answers):
+    """
+    Apply offline answers; returns {accepted, duplicates, rejected}: only
+    answers actually written are accepted.
+    Raises SyncConflict when a concurrent request inserted the same keys.
+    """
+    now = timezone.now()
+    answers, rejected = _clean_answers(raw_answers, now)
+    result = {"accepted": [], "duplicates": [], "rejected": rejected}
+    if not answers:
+        return result
+
+    try:
+        with transaction.atomic():
+            seen = set(
+                SyncReceipt.objects.filter(
+                    user=user, key__in=[a["key"] for a in answers]
+                ).values_list("key", flat=True)
+            )
+            result["duplicates"] = [a["key"] for a in answers if a["key"] in seen]
+            answers = [a for a in answers if a["key"] not in seen]
+
+            card_decks = dict(
+                Card.objects.filter(
+                    readable_cards_q(user), id__in={a["card_id"] for a in answers}
+                )
+                .order_by()
+                .values_list("id", "deck_id")
+            )
+            session_decks = {
+                sid: {deck_id} if deck_id else set(scope or ())
+                for sid, deck_id, scope in StudySession.objects.filter(
+                    user=user, id__in={a["session_id"] for a in answers}
+                ).values_list("id", "deck_id", "deck_scope")
+            }
+            todo = []
+            for a in answers:
+                if a["card_id"] not in card_decks:
+                    rejected.append({"key": a["key"], "detail": "Card not found."})
+                    continue
+                decks = session_decks.get(a["session_id"])
+                if decks is None or (decks and card_decks[a["card_id"]] not in decks):
+                    a["session_id"] = None  # studied offline: sync session below
+                todo.append(a)
+
+            orphans = [a for a in todo if a["session_id"] is None]
+            if orphans:
+                deck_ids = sorted({card_decks[a["card_id"]] for a in orphans})
+                session = StudySession.objects.create(
+                    user=user,
+                    deck_id=deck_ids[0] if len(deck_ids) == 1 else None,
+                    deck_scope=deck_ids if len(deck_ids) > 1 else None,
+                    started_at=min(a["answered_at"] for a in orphans),
+                    ended_at=max(a["answered_at"] for a in orphans),
+                )
+                for a in orphans:
+                    a["session_id"] = session.id
+
+            SyncReceipt.objects.bulk_create(
+                [SyncReceipt(user=user, key=a["key"]) for a in todo]
+            )
+            written = write_entries(
+                [
+                    {
+                        "key": a["key"],
+                        "session_id": a["session_id"],
+                        "user_id": user.id,
+                        "card_id": a["card_id"],
+                        "is_correct": a["is_correct"],
+                        "answered_at": a["answered_at"],
+                    }
+                    for a in todo
+                ]
+            )
+    except IntegrityError as e:
+        raise SyncConflict() from e
+
+    accepted = {e["key"] for e in written}
+    result["accepted"] = [a["key"] for a in todo if a["key"] in accepted]
+    # e.g. answered online, then uploaded again under a new key
+    result["duplicates"] += [a["key"] for a in todo if a["key"] not in accepted]
+    return result
+
+
+def changes_since(user, since, after=None):
+    """
+    The download half; `since` None = full snapshot. `after` ((deck id,
+    card id), progress card id) continues a paged response; `next_page` in
+    the result is where the next one starts, None on the last page.
+    """
+    first = after is None
+    (after_deck, after_card), after_progress = after or ((0, 0), 0)
+    decks = list(
+        readable_decks(user).order_by().values(*DECK_SYNC_FIELDS, "cards_changed_at")
+    )
+    new_subs = set()
+    if since is not None:
+        new_subs = set(
+            DeckSubscription.objects.filter(
+                user=user, created_at__gt=since
+            ).values_list("deck_id", flat=True)
+        )
+
+    def changed(d, field):
+        return since is None or d["id"] in new_subs or d[field] > since
+
+    cards_changed = [d["id"] for d in decks if changed(d, "cards_changed_at")]
+    shared = {d["id"] for d in decks if d["owner"] != user.id}
+
+    card_ids = {deck_id: [] for deck_id in cards_changed}
+    if first:
+        rows = Card.objects.filter(deck_id__in=cards_changed).order_by()
+        for deck_id, card_id in rows.values_list("deck_id", "id"):
+            card_ids[deck_id].append(card_id)
+
+    cards_q = Q(deck_id__in=cards_changed)
+    if since is not None:
+        fresh = [d for d in cards_changed if d not in new_subs]
+        cards_q = Q(deck_id__in=fresh, updated_at__gt=since) | Q(deck_id__in=new_subs)
+        # subscriber edits since the cursor re-send the (overlaid) card
+        cards_q |= Q(
+            id__in=CardOverride.objects.filter(user=user, updated_at__gt=since).values(
+                "card_id"
+            ),
+            deck_id__in=shared,
+        )
+    cards_q &= Q(deck_id__gt=after_deck) | Q(deck_id=after_deck, id__gt=after_card)
+    cards = list(
+        Card.objects.filter(cards_q)
+        .order_by("deck_id", "id")
+        .values(*CARD_FIELDS)[: SYNC_PAGE_SIZE + 1]
+    )
+    more_cards = len(cards) > SYNC_PAGE_SIZE
+    cards = cards[:SYNC_PAGE_SIZE]
+    overlay_overrides(user, [c for c in cards if c["deck"] in shared])
+
+    progress = CardProgress.objects.filter(user=user)
+    removed = ProgressTombstone.objects.filter(user=user)
+    if since is not None:
+        progress = progress.filter(updated_at__gt=since)
+        removed = removed.filter(deleted_at__gt=since)
+
+    progress = list(
+        progress.filter(card_id__gt=after_progress)
+        .order_by("card_id")
+        .values(*PROGRESS_SYNC_FIELDS)[: SYNC_PAGE_SIZE + 1]
+    )
+    more_progress = len(progress) > SYNC_PAGE_SIZE
+    progress = progress[:SYNC_PAGE_SIZE]
+    next_page = None
+    if more_cards or more_progress:
+        # a list that is done stays done: start past the last possible id
+        last = 2**63 - 1
+        next_page = (
+            (cards[-1]["deck"], cards[-1]["id"]) if more_cards else (last, last),
+            progress[-1]["card_id"] if more_progress else last,
+        )
+
+    removed_ids = set()
+    if since is not None and first:
+        # a reset card answered again since is sent as progress, not removed
+        removed_ids = set(removed.values_list("card_id", flat=True))
+        removed_ids -= {p["card_id"] for p in progress}
+
+    for d in decks:
+        del d["cards_changed_at"]
+    if not first:
+        return {
+            "cards": cards,
+            "progress": progress,
+            "next_page": next_page,
+        }
+    return {
+        "deck_ids": [d["id"] for d in decks],
+        "decks": [d for d in decks if changed(d, "updated_at")],
+        "cards": cards,
+        "card_ids": card_ids,
+        "progress": progress,
+        "removed_progress": sorted(removed_ids),
+        "next_page": next_page,
+    }
+
+
+def purge_sync_state(now=None):
+    """Drop receipts/tombstones older than SYNC_HORIZON; returns the counts."""
+    cutoff = (now or timezone.now()) - SYNC_HORIZON
+    receipts, _ = SyncReceipt.objects.filter(created_at__lt=cutoff).delete()
+    tombstones, _ = ProgressTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return {"receipts": receipts, "tombstones": tombstones}
@@ -0,0 +1,128 @@
+"""
+Job handlers (see learning/jobs.py). Imported by LearningConfig.ready() so
+the registry is filled in web and worker processes alike.
+"""
+
+from itertools import chain
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalog, distractors, groups
+from .jobs import register
+from .models import AnswerDaily, Card, CardProgress, Job, StudyAnswer
+from .retention import compacted_events
+from .sharing import readable_cards_q
+from .srs import apply_srs
+from .stats import invalidate_deck_stats
+from .sync import record_progress_tombstones
+
+REBUILD_CHUNK = 2000  # answers read per round trip / progress report
+
+
+@register("rebuild_progress")
+def rebuild_progress(ctx, user_id, deck_id=None):
+    """
+    Recompute the user's CardProgress by replaying the answer history
+    (AnswerDaily + StudyAnswer) in order, after an SRS policy change or a bad
+    import. `suspended` is kept.
+    """
+    cards = Card.objects.filter(readable_cards_q(user_id))
+    if deck_id is not None:
+        cards = cards.filter(deck_id=deck_id)
+    answers = StudyAnswer.objects.filter(session__user_id=user_id, card__in=cards)
+
+    # compacted days (older) first, then the raw answers
+    total = answers.count() + sum(
+        len(o)
+        for o in AnswerDaily.objects.filter(
+            user_id=user_id, card__in=cards
+        ).values_list("outcomes", flat=True)
+    )
+    events = chain(
+        compacted_events(user_id, cards),
+        answers.order_by("answered_at", "id")
+        .values_list("card_id", "is_correct", "answered_at")
+        .iterator(chunk_size=REBUILD_CHUNK),
+    )
+    rebuilt = {}
+    for i, (card_id, is_correct, answered_at) in enumerate(events, start=1):
+        p = rebuilt.get(card_id)
+        if p is None:
+            p = rebuilt[card_id] = CardProgress(user_id=user_id, card_id=card_id)
+        apply_srs(p, is_correct, now=answered_at, save=False)
+        if i % REBUILD_CHUNK == 0:
+            ctx.progress(90 * i // total, f"{i}/{total} answers")
+
+    ctx.progress(90, "writing progress")
+    with transaction.atomic():
+        old = CardProgress.objects.filter(user_id=user_id, card__in=cards)
+        suspended = set(old.filter(suspended=True).values_list("card_id", flat=True))
+        old_ids = set(old.values_list("card_id", flat=True))
+        old.delete()
+        now = timezone.now()
+        for card_id in suspended:
+            p = rebuilt.get(card_id)
+            if p is None:
+                p = rebuilt[card_id] = CardProgress(user_id=user_id, card_id=card_id)
+            p.suspended = True
+        for p in rebuilt.values():
+            p.updated_at = now
+        CardProgress.objects.bulk_create(rebuilt.values(), batch_size=500)
+        record_progress_tombstones(user_id, old_ids - set(rebuilt))
+        groups.refresh_member_card_stats(user_id, cards.values("id"))
+
+    invalidate_deck_stats(user_id, cards.values_list("deck_id", flat=True).distinct())
+    return {"answers": total, "cards": len(rebuilt)}
+
+
+@register("refresh_group_stats")
+def refresh_group_stats(ctx, group_id):
+    """Rebuild a class' GroupCardStat rows (after membership changes)."""
+    return {"cards": groups.refresh_group_stats(group_id)}
+
+
+@register("build_distractors")
+def build_distractors(ctx, deck_id):
+    """Rebuild a deck's multiple-choice index (scheduled on card writes)."""
+    return {"cards": distractors.build_deck_distractors(deck_id)}
+
+
+@register("refresh_catalog")
+def refresh_catalog(ctx, deck_id=None):
+    """Recount catalog popularity (one newly published deck, or all)."""
+    deck_ids = None if deck_id is None else [deck_id]
+    return {"decks": catalog.refresh_popularity(deck_ids)}
+
+
+@register("provision_users")
+def provision_users(ctx, rows, mode="password", template_deck_ids=()):
+    """
+    Create a roster's users (POST /api/auth/provision/). The result only
+    lists ids and usernames; the passwords / activation tokens are fetched
+    once from GET /api/auth/provision/{job_id}/credentials/.
+    """
+    from django.urls import reverse
+
+    from accounts.provisioning import RosterError
+    from accounts.provisioning import provision_users as create_users
+    from accounts.provisioning import save_credentials
+
+    ctx.progress(0, f"creating {len(rows)} users")
+    try:
+        users = create_users(rows, mode=mode, template_deck_ids=template_deck_ids)
+    except RosterError as e:
+        # a username was taken after the view validated the roster
+        return {"created": 0, "errors": e.errors}
+    finally:
+        # roster passwords stay in the queue only while the job runs
+        scrubbed = [{**r, "password": ""} for r in rows]
+        Job.objects.filter(id=ctx.job.id).update(
+            payload={**ctx.job.payload, "rows": scrubbed}
+        )
+    save_credentials(ctx.job.id, users)
+    return {
+        "created": len(users),
+        "users": [{"id": u["id"], "username": u["username"]} for u in users],
+        "credentials_url": reverse("provision_credentials", args=[ctx.job.id]),
+    }
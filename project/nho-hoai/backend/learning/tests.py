@@ -1,3 +1,945 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, close_old_connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import answer_log, media
+from .budget import UsageDeltas, bump_daily_counts, remaining_budget, today_counts
+from .grading import accepted_forms, grade, kana_to_romaji
+from .groups import invalidate_user_groups, refresh_group_stats
+from .jobs import STALE_AFTER, claim_jobs, enqueue, requeue_stale, run_job
+from .management.commands.run_jobs import Command as RunJobsCommand
+from .models import (
+    Card,
+    CardOverride,
+    CardProgress,
+    DailyStudyCount,
+    Deck,
+    GroupCardStat,
+    Job,
+    MediaBlob,
+    ProgressTombstone,
+    StudyAnswer,
+    StudyGroup,
+    StudyLimits,
+    StudySession,
+)
+from .serializers import (
+    CardProgressSerializer,
+    CardSerializer,
+    StudySessionSerializer,
+    progress_payload,
+    session_payload,
+)
+from .sharing import subscribe
+
+User = get_user_model()
+
+
+def make_deck(owner, n=3):
+    deck = Deck.objects.create(
+        owner=owner, title="Deck", source_lang="en", target_lang="ja"
+    )
+    cards = Card.objects.bulk_create(
+        [Card(deck=deck, term=f"term{i}", meaning=f"meaning{i}") for i in range(n)]
+    )
+    return deck, cards
+
+
+class KanaRomajiTests(SimpleTestCase):
+    CASES = [
+        ("すし", "sushi"),
+        ("しゃしん", "shashin"),
+        ("きょう", "kyou"),
+        ("ちょっと", "chotto"),
+        ("じゃあ", "jaa"),
+        ("きって", "kitte"),
+        ("まっちゃ", "maccha"),
+        ("いっしょ", "issho"),
+        ("ざっし", "zasshi"),
+        ("マッチャ", "maccha"),
+        ("コーヒー", "koohii"),
+        ("ファン", "fan"),
+    ]
+
+    def test_kana_to_romaji(self):
+        for kana, romaji in self.CASES:
+            with self.subTest(kana=kana):
+                self.assertEqual(kana_to_romaji(kana), romaji)
+
+    def test_kana_answer_matches_typed_romaji(self):
+        for kana, typed in [("いっしょ", "issyo"), ("まっちゃ", "matcha")]:
+            with self.subTest(kana=kana):
+                self.assertEqual(
+                    grade(typed, accepted_forms(kana, "ja"), "ja"), (True, 0)
+                )
+
+
+class PayloadFormatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("payload", password="pw")
+        self.deck, self.cards = make_deck(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_hand_built_payloads_match_the_serializers(self):
+        now = timezone.now().replace(microsecond=123456)
+        session = StudySession.objects.create(user=self.user, deck=self.deck)
+        StudySession.objects.filter(id=session.id).update(ended_at=now)
+        session.refresh_from_db()
+        progress = CardProgress.objects.create(
+            user=self.user, card=self.cards[0], due_at=now, last_answered_at=now
+        )
+
+        self.assertEqual(session_payload(session), StudySessionSerializer(session).data)
+        self.assertEqual(
+            progress_payload(progress), CardProgressSerializer(progress).data
+        )
+        self.assertTrue(progress_payload(progress)["due_at"].endswith(".123456Z"))
+
+    def test_card_rows_match_the_serializer(self):
+        cards = Card.objects.filter(deck=self.deck).order_by("-updated_at")
+        for tz in ("UTC", "Asia/Ho_Chi_Minh"):
+            with self.subTest(tz=tz), timezone.override(tz):
+                response = self.client.get(f"/api/decks/{self.deck.id}/cards/")
+                self.assertEqual(response.data, CardSerializer(cards, many=True).data)
+
+
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        self.log_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        settings = override_settings(
+            LEARNING_WRITE_BEHIND={
+                "ENABLED": True,
+                "LOG_DIR": self.log_dir,
+                "FLUSH_INTERVAL": 3600,  # flushed by the tests only
+                "BATCH_SIZE": 500,
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        answer_log._log = None
+        self.addCleanup(setattr, answer_log, "_log", None)
+
+        self.user = User.objects.create_user("learner", password="pw")
+        self.deck, self.cards = make_deck(self.user)
+        self.session = StudySession.objects.create(user=self.user, deck=self.deck)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def entry(self, card, is_correct, seconds=0):
+        return {
+            "session_id": self.session.id,
+            "user_id": self.user.id,
+            "card_id": card.id,
+            "is_correct": is_correct,
+            "answered_at": timezone.now() + timedelta(seconds=seconds),
+        }
+
+    def answer(self, card, is_correct):
+        response = self.client.post(
+            "/api/study/answer/",
+            {
+                "session_id": self.session.id,
+                "card_id": card.id,
+                "is_correct": is_correct,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def summary(self):
+        response = self.client.get(
+            "/api/study/summary/", {"session_id": self.session.id}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def test_flush_writes_each_entry_once(self):
+        entries = [self.entry(self.cards[0], True), self.entry(self.cards[1], False, 1)]
+        answer_log.write_entries(entries)
+        answer_log.write_entries(entries)
+
+        self.assertEqual(StudyAnswer.objects.filter(session=self.session).count(), 2)
+        self.session.refresh_from_db()
+        self.assertEqual(
+            (
+                self.session.total_answered,
+                self.session.correct_count,
+                self.session.wrong_count,
+            ),
+            (2, 1, 1),
+        )
+        progress = CardProgress.objects.get(user=self.user, card=self.cards[0])
+        self.assertEqual((progress.total_correct, progress.total_wrong), (1, 0))
+
+    def test_replay_is_idempotent(self):
+        entries = [self.entry(self.cards[0], True), self.entry(self.cards[0], False, 1)]
+        path = self.log_dir / "answers-999999.jsonl"
+        lines = "".join(answer_log._encode(e) + "\n" for e in entries)
+        path.write_text(lines + '{"session_id": 1, "torn', encoding="utf-8")
+        answer_log.write_entries(entries[:1])  # flushed before the crash
+
+        self.assertEqual(answer_log.replay_log_dir(self.log_dir), (1, 1))
+        self.assertFalse(path.exists())
+        path.write_text(lines, encoding="utf-8")
+        self.assertEqual(answer_log.replay_log_dir(self.log_dir), (1, 0))
+
+        self.assertEqual(StudyAnswer.objects.filter(session=self.session).count(), 2)
+        progress = CardProgress.objects.get(user=self.user, card=self.cards[0])
+        self.assertEqual((progress.total_correct, progress.total_wrong), (1, 1))
+
+    def write_log(self, pid, entries):
+        path = self.log_dir / f"answers-{pid}.jsonl"
+        path.write_text(
+            "".join(answer_log._encode(e) + "\n" for e in entries), encoding="utf-8"
+        )
+        return path
+
+    def test_replay_leaves_live_logs_alone(self):
+        live = self.write_log(999998, [self.entry(self.cards[0], True)])
+        dead = self.write_log(999999, [self.entry(self.cards[1], True)])
+        fd = answer_log._lock_file(answer_log._lock_path(live))
+        self.addCleanup(os.close, fd)
+
+        self.assertEqual(answer_log.replay_log_dir(self.log_dir), (1, 1))
+        self.assertTrue(live.exists())
+        self.assertFalse(dead.exists())
+        self.assertEqual(
+            list(StudyAnswer.objects.values_list("card_id", flat=True)),
+            [self.cards[1].id],
+        )
+
+    def test_start_takes_over_dead_logs(self):
+        dead = self.write_log(999999, [self.entry(self.cards[0], False)])
+        log = answer_log.get_answer_log()
+        self.assertFalse(dead.exists())
+        self.assertEqual(len(log.pending_for(self.session.id)), 1)
+        # the entries survive another crash: they are in this process' log
+        self.assertEqual(len(answer_log.read_log_file(log.path)), 1)
+        log.flush_all()
+        self.assertEqual(StudyAnswer.objects.count(), 1)
+
+    def test_answer_rows_are_unique(self):
+        entry = self.entry(self.cards[0], True)
+        answer_log.write_entries([entry])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StudyAnswer.objects.create(
+                session=self.session,
+                card=self.cards[0],
+                is_correct=True,
+                answered_at=entry["answered_at"],
+            )
+
+    def test_summary_counts_pending_answers_once(self):
+        self.answer(self.cards[0], True)
+        self.answer(self.cards[0], False)
+        response = self.answer(self.cards[1], True)
+        self.assertEqual(response.data["session"]["total_answered"], 3)
+        self.assertFalse(StudyAnswer.objects.exists())
+
+        before = self.summary()
+        answer_log.get_answer_log().flush_all()
+        self.assertEqual(StudyAnswer.objects.count(), 3)
+        after = self.summary()
+
+        for data in (before, after):
+            self.assertEqual(data["session"]["total_answered"], 3)
+            self.assertEqual(data["session"]["correct_count"], 2)
+            rows = {r["cardId"]: r for r in data["rows"]}
+            self.assertEqual(
+                (rows[self.cards[0].id]["correct"], rows[self.cards[0].id]["wrong"]),
+                (1, 1),
+            )
+        self.assertEqual(before["rows"], after["rows"])
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("offline", password="pw")
+        self.deck, self.cards = make_deck(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, *answers):
+        response = self.client.post(
+            "/api/sync/", {"answers": list(answers)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data["answers"]
+
+    def answer(self, key, is_correct, answered_at, card=None):
+        return {
+            "key": key,
+            "card_id": (card or self.cards[0]).id,
+            "is_correct": is_correct,
+            "answered_at": answered_at.isoformat(),
+        }
+
+    def progress(self):
+        return CardProgress.objects.get(user=self.user, card=self.cards[0])
+
+    def test_duplicate_keys_count_once(self):
+        now = timezone.now()
+        first = self.answer("k1", True, now - timedelta(minutes=5))
+        result = self.sync(first, first, self.answer("k2", False, now))
+        self.assertEqual(result["accepted"], ["k1", "k2"])
+
+        retry = self.sync(first, self.answer("k2", False, now))
+        self.assertEqual(retry["accepted"], [])
+        self.assertEqual(retry["duplicates"], ["k1", "k2"])
+
+        self.assertEqual(StudyAnswer.objects.count(), 2)
+        progress = self.progress()
+        self.assertEqual((progress.total_correct, progress.total_wrong), (1, 1))
+        session = StudySession.objects.get(user=self.user)
+        self.assertEqual(session.total_answered, 2)
+
+    def test_answer_already_stored_is_a_duplicate(self):
+        session = StudySession.objects.create(user=self.user, deck=self.deck)
+        answered_at = timezone.now() - timedelta(minutes=1)
+        answer = {**self.answer("k1", True, answered_at), "session_id": session.id}
+        self.assertEqual(self.sync(answer)["accepted"], ["k1"])
+
+        # the same answer re-sent under a new key (client lost its receipts)
+        result = self.sync({**answer, "key": "k1-again"})
+        self.assertEqual(result["accepted"], [])
+        self.assertEqual(result["duplicates"], ["k1-again"])
+        self.assertEqual(StudyAnswer.objects.count(), 1)
+
+    def test_full_snapshot_is_paged(self):
+        more = Card.objects.bulk_create(
+            [Card(deck=self.deck, term=f"extra{i}", meaning="m") for i in range(3)]
+        )
+        cards = self.cards + more
+        for card in cards:
+            CardProgress.objects.create(user=self.user, card=card)
+
+        pages = []
+        body = {}
+        with mock.patch("learning.sync.SYNC_PAGE_SIZE", 4):
+            while True:
+                response = self.client.post("/api/sync/", body, format="json")
+                self.assertEqual(response.status_code, 200, response.content)
+                pages.append(response.data)
+                if not response.data["next_page"]:
+                    break
+                body = {"page": response.data["next_page"]}
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual({p["cursor"] for p in pages}, {pages[0]["cursor"]})
+        self.assertTrue(all(p["full"] for p in pages))
+        self.assertEqual(pages[0]["card_ids"], {self.deck.id: [c.id for c in cards]})
+        self.assertEqual(
+            [c["id"] for p in pages for c in p["cards"]], [c.id for c in cards]
+        )
+        self.assertEqual(
+            [r["card_id"] for p in pages for r in p["progress"]],
+            [c.id for c in cards],
+        )
+
+        response = self.client.post("/api/sync/", {"page": "garbage"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_late_upload_does_not_move_schedule_back(self):
+        now = timezone.now()
+        self.sync(self.answer("phone", True, now - timedelta(minutes=1)))
+        scheduled = self.progress()
+
+        # a second device syncs an older wrong answer afterwards
+        self.sync(self.answer("tablet", False, now - timedelta(hours=2)))
+        progress = self.progress()
+
+        self.assertEqual(StudyAnswer.objects.count(), 2)
+        self.assertEqual((progress.total_correct, progress.total_wrong), (1, 1))
+        self.assertEqual(progress.last_answered_at, scheduled.last_answered_at)
+        self.assertEqual(progress.due_at, scheduled.due_at)
+        self.assertEqual(progress.interval_days, scheduled.interval_days)
+        self.assertEqual(progress.difficulty_score, scheduled.difficulty_score)
+
+
+class InlinePool:
+    """ProcessPoolExecutor stand-in: runs jobs inline, or is broken."""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("a process died"))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class JobRunnerTests(TestCase):
+    def test_a_job_is_claimed_once(self):
+        job = enqueue("refresh_catalog")
+        self.assertEqual(claim_jobs("w1", 5), [job.id])
+        self.assertEqual(claim_jobs("w2", 5), [])
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.locked_by, job.attempts), (Job.RUNNING, "w1", 1)
+        )
+
+    def test_requeue_follows_the_heartbeat(self):
+        now = timezone.now()
+        alive = enqueue("refresh_catalog")
+        dead = enqueue("refresh_catalog")
+        claim_jobs("w1", 5)
+        # running for hours, but its worker still beats
+        Job.objects.filter(id=alive.id).update(
+            started_at=now - timedelta(hours=3), heartbeat_at=now
+        )
+        Job.objects.filter(id=dead.id).update(
+            heartbeat_at=now - STALE_AFTER - timedelta(seconds=1)
+        )
+
+        self.assertEqual(requeue_stale(now), 1)
+        self.assertEqual(Job.objects.get(id=alive.id).status, Job.RUNNING)
+        self.assertEqual(Job.objects.get(id=dead.id).status, Job.QUEUED)
+
+    def test_run_job_records_the_result(self):
+        job = enqueue("refresh_catalog")
+        claim_jobs("w1", 1)
+        self.assertEqual(run_job(job.id), (job.id, True))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {"decks": 0}))
+
+    def test_broken_pool_requeues_its_jobs_and_is_replaced(self):
+        jobs = [enqueue("refresh_catalog") for _ in range(2)]
+        pools = [InlinePool(broken=True), InlinePool()]
+        err = StringIO()
+        with mock.patch.object(
+            RunJobsCommand, "_new_pool", side_effect=lambda n: pools.pop(0)
+        ):
+            call_command(
+                "run_jobs", "--once", "--processes", "2", stdout=StringIO(), stderr=err
+            )
+
+        self.assertIn("worker process died", err.getvalue())
+        self.assertEqual(pools, [])
+        for job in jobs:
+            job.refresh_from_db()
+            # the lost attempt counts, the retry ran in the new pool
+            self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 2))
+
+
+class MediaTests(TestCase):
+    AUDIO = bytes(range(256)) * 4
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(
+            LEARNING_MEDIA={
+                "ROOT": root,
+                "MAX_BYTES": 1024 * 1024,
+                "CONTENT_TYPES": {"audio": ["audio/mpeg"], "image": ["image/png"]},
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user("listener", password="pw")
+        self.deck, self.cards = make_deck(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, card):
+        response = self.client.post(
+            f"/api/cards/{card.id}/media/",
+            {"file": SimpleUploadedFile("a.mp3", self.AUDIO, "audio/mpeg")},
+            format="multipart",
+        )
+        self.assertIn(response.status_code, (200, 201), response.content)
+        return response.data["url"], media.blob_path(response.data["sha256"])
+
+    def test_range_request(self):
+        url, _ = self.upload(self.cards[0])
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.AUDIO)}")
+        self.assertEqual(b"".join(response.streaming_content), self.AUDIO[10:20])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(self.AUDIO)}-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_missing_file_is_gone(self):
+        url, path = self.upload(self.cards[0])
+        path.unlink()
+        with self.assertLogs("learning.views", "ERROR"):
+            self.assertEqual(self.client.get(url).status_code, 410)
+
+    def test_gc_keeps_a_file_an_upload_just_reused(self):
+        _, path = self.upload(self.cards[0])
+        MediaBlob.objects.update(linked_at=timezone.now() - timedelta(days=2))
+        self.cards[0].delete()  # unreferenced and past the grace period
+
+        # the same bytes uploaded while gc runs: file touched, row not yet back
+        self.assertEqual(media.gc_blobs(), 0)
+        self.assertTrue(path.exists())
+
+        old = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(path, (old, old))
+        MediaBlob.objects.create(
+            sha256=path.name,
+            size=len(self.AUDIO),
+            content_type="audio/mpeg",
+            linked_at=timezone.now() - timedelta(days=2),
+        )
+        self.assertEqual(media.gc_blobs(), 1)
+        self.assertFalse(path.exists())
+
+
+class BulkProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("bulk", password="pw")
+        self.deck, self.cards = make_deck(self.user, n=4)
+        self.other_deck, self.other_cards = make_deck(self.user, n=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def op(self, op, deck=None, expect=200, **body):
+        response = self.client.post(
+            f"/api/decks/{(deck or self.deck).id}/progress/{op}/", body, format="json"
+        )
+        self.assertEqual(response.status_code, expect, response.content)
+        return response.data
+
+    def progress(self, card):
+        return CardProgress.objects.filter(user=self.user, card=card).first()
+
+    def test_suspend_creates_missing_rows_once(self):
+        CardProgress.objects.create(user=self.user, card=self.cards[0])
+        ids = [c.id for c in self.cards[:3]] + [self.other_cards[0].id]
+
+        result = self.op("suspend", card_ids=ids)
+        self.assertEqual((result["created"], result["updated"]), (2, 1))
+        self.assertTrue(all(self.progress(c).suspended for c in self.cards[:3]))
+        # a card of another deck is not touched through this one
+        self.assertIsNone(self.progress(self.other_cards[0]))
+        self.assertIsNone(self.progress(self.cards[3]))
+
+        again = self.op("suspend", card_ids=ids)
+        self.assertEqual((again["created"], again["updated"]), (0, 0))
+
+        result = self.op("unsuspend")
+        self.assertEqual((result["created"], result["updated"]), (0, 3))
+
+    def test_reset_deletes_and_records_tombstones(self):
+        for card in self.cards[:2] + self.other_cards:
+            CardProgress.objects.create(user=self.user, card=card)
+
+        self.assertEqual(self.op("reset")["deleted"], 2)
+        self.assertEqual(self.op("reset")["deleted"], 0)
+        self.assertEqual(
+            set(ProgressTombstone.objects.values_list("card_id", flat=True)),
+            {c.id for c in self.cards[:2]},
+        )
+        self.assertIsNotNone(self.progress(self.other_cards[0]))
+
+    def group_with_classmate(self):
+        classmate = User.objects.create_user("classmate", password="pw")
+        group = StudyGroup.objects.create(owner=self.user, name="Class")
+        group.members.add(self.user, classmate)
+        members = [self.user.id, classmate.id]
+        invalidate_user_groups(members)
+        # the membership cache outlives the test's transaction
+        self.addCleanup(invalidate_user_groups, members)
+        for user, wrong in ((self.user, 3), (classmate, 1)):
+            for card in self.cards[:2]:
+                CardProgress.objects.create(
+                    user=user, card=card, total_correct=1, total_wrong=wrong
+                )
+        refresh_group_stats(group.id)
+        return group
+
+    def group_stats(self, group):
+        return dict(
+            GroupCardStat.objects.filter(group=group).values_list("card_id", "attempts")
+        )
+
+    def test_reset_updates_group_stats(self):
+        group = self.group_with_classmate()
+        self.assertEqual(self.group_stats(group), {c.id: 6 for c in self.cards[:2]})
+
+        self.op("reset", card_ids=[self.cards[0].id])
+        self.assertEqual(
+            self.group_stats(group), {self.cards[0].id: 2, self.cards[1].id: 6}
+        )
+
+    def test_rebuild_updates_group_stats(self):
+        group = self.group_with_classmate()
+        # no answer history: the rebuild leaves the student without progress
+        job = enqueue(
+            "rebuild_progress",
+            user=self.user,
+            user_id=self.user.id,
+            deck_id=self.deck.id,
+        )
+        self.assertEqual(run_job(job.id), (job.id, True))
+        self.assertEqual(self.group_stats(group), {c.id: 2 for c in self.cards[:2]})
+
+    def test_reschedule_only_due(self):
+        now = timezone.now()
+        due = CardProgress.objects.create(
+            user=self.user, card=self.cards[0], due_at=now - timedelta(hours=1)
+        )
+        later = CardProgress.objects.create(
+            user=self.user, card=self.cards[1], due_at=now + timedelta(days=3)
+        )
+
+        result = self.op("reschedule", shift_days=2, only_due="true")
+        self.assertEqual(result["updated"], 1)
+        due.refresh_from_db()
+        later.refresh_from_db()
+        self.assertGreater(due.due_at, now + timedelta(days=1))
+        self.assertGreater(later.due_at, now + timedelta(days=2, hours=23))
+        self.assertLess(later.due_at, now + timedelta(days=3, minutes=1))
+
+        # "false" is not truthy here
+        self.assertEqual(
+            self.op("reschedule", shift_days=1, only_due="false")["updated"], 2
+        )
+        self.op("reschedule", expect=400, shift_days=1, only_due="sometimes")
+        self.op("reschedule", expect=400)
+
+    def test_other_users_decks_are_out_of_reach(self):
+        stranger = User.objects.create_user("stranger", password="pw")
+        CardProgress.objects.create(user=stranger, card=self.cards[0])
+        self.client.force_authenticate(stranger)
+        self.op("reset", expect=404)
+        self.assertTrue(CardProgress.objects.filter(user=stranger).exists())
+
+
+class DeckPermissionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", password="pw")
+        self.subscriber = User.objects.create_user("subscriber", password="pw")
+        self.stranger = User.objects.create_user("stranger", password="pw")
+        self.deck, self.cards = make_deck(self.owner)
+        Deck.objects.filter(id=self.deck.id).update(published=True)
+        subscribe(self.subscriber, self.deck)
+        self.client = APIClient()
+
+    def call(self, user, method, url, data=None):
+        self.client.force_authenticate(user)
+        return getattr(self.client, method)(url, data, format="json").status_code
+
+    def test_deck_access(self):
+        url = f"/api/decks/{self.deck.id}/"
+        for user, expected in [
+            (self.stranger, {"get": 404, "patch": 404, "delete": 404}),
+            (self.subscriber, {"get": 200, "patch": 403, "delete": 403}),
+            (self.owner, {"get": 200, "patch": 200, "delete": 204}),
+        ]:
+            for method in ("get", "patch", "delete"):
+                with self.subTest(user=user.username, method=method):
+                    data = {"title": "Renamed"} if method == "patch" else None
+                    self.assertEqual(
+                        self.call(user, method, url, data), expected[method]
+                    )
+
+    def test_card_access(self):
+        card = self.cards[0]
+        url = f"/api/cards/{card.id}/"
+        for user, expected in [
+            (self.stranger, {"get": 404, "patch": 404, "delete": 404}),
+            (self.subscriber, {"get": 200, "patch": 200, "delete": 403}),
+        ]:
+            for method in ("get", "patch", "delete"):
+                with self.subTest(user=user.username, method=method):
+                    data = {"meaning": "mine"} if method == "patch" else None
+                    self.assertEqual(
+                        self.call(user, method, url, data), expected[method]
+                    )
+
+        # the subscriber's edit is private: the shared card is unchanged
+        card.refresh_from_db()
+        self.assertEqual(card.meaning, "meaning0")
+        override = CardOverride.objects.get(user=self.subscriber, card=card)
+        self.assertEqual(override.meaning, "mine")
+        self.client.force_authenticate(self.subscriber)
+        self.assertEqual(self.client.get(url).data["meaning"], "mine")
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(url).data["meaning"], "meaning0")
+
+        self.assertEqual(self.call(self.owner, "patch", url, {"meaning": "new"}), 200)
+        self.assertEqual(self.call(self.owner, "delete", url), 204)
+        self.assertFalse(Card.objects.filter(id=card.id).exists())
+
+    def test_card_changes_reach_subscribers_cached_stats(self):
+        url = f"/api/decks/{self.deck.id}/stats/"
+
+        def total(user):
+            self.client.force_authenticate(user)
+            return self.client.get(url).data["total"]
+
+        self.assertEqual((total(self.owner), total(self.subscriber)), (3, 3))
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            f"/api/decks/{self.deck.id}/cards/",
+            {"term": "term3", "meaning": "meaning3"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((total(self.owner), total(self.subscriber)), (4, 4))
+
+        self.assertEqual(
+            self.call(self.owner, "delete", f"/api/cards/{self.cards[0].id}/"), 204
+        )
+        self.assertEqual((total(self.owner), total(self.subscriber)), (3, 3))
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class DailyBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("budget", password="pw")
+        self.deck, self.cards = make_deck(self.user, n=8)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def use(self, answered_at, *, new=0, reviews=0):
+        deltas = UsageDeltas()
+        for _ in range(new):
+            deltas.add(CardProgress(user=self.user), answered_at, first_answer=True)
+        for _ in range(reviews):
+            p = CardProgress(user=self.user, due_at=answered_at - timedelta(hours=1))
+            deltas.add(p, answered_at, first_answer=False)
+        bump_daily_counts(deltas)
+
+    def test_day_rolls_over_at_local_midnight(self):
+        # Ho Chi Minh City is UTC+7: 16:30 UTC is 23:30 there, 17:30 is 00:30
+        StudyLimits.objects.create(
+            user=self.user,
+            reviews_per_day=10,
+            new_per_day=10,
+            time_zone="Asia/Ho_Chi_Minh",
+        )
+        self.use(utc(2026, 3, 1, 16, 30), new=1, reviews=2)
+        self.use(utc(2026, 3, 1, 17, 30), reviews=1)
+
+        rows = dict(
+            DailyStudyCount.objects.values_list("day", "reviews").order_by("day")
+        )
+        self.assertEqual(
+            [(d.isoformat(), n) for d, n in rows.items()],
+            [("2026-03-01", 2), ("2026-03-02", 1)],
+        )
+        self.assertEqual(today_counts(self.user, utc(2026, 3, 1, 16, 59)), (2, 1))
+        self.assertEqual(today_counts(self.user, utc(2026, 3, 1, 17, 0)), (1, 0))
+        # same instants for a UTC user: one day
+        StudyLimits.objects.filter(user=self.user).update(time_zone="UTC")
+        self.assertEqual(today_counts(self.user, utc(2026, 3, 1, 17, 0)), (2, 1))
+
+    def test_only_due_and_first_answers_count(self):
+        now = timezone.now()
+        deltas = UsageDeltas()
+        fresh = CardProgress(user=self.user, due_at=now + timedelta(days=2))
+        deltas.add(fresh, now, first_answer=False)  # not due: a free drill
+        self.assertEqual(deltas.answers, [])
+
+    def test_study_start_caps_due_and_new_cards(self):
+        StudyLimits.objects.create(user=self.user, reviews_per_day=1, new_per_day=2)
+        past = timezone.now() - timedelta(hours=1)
+        due = self.cards[:3]
+        for card in due:
+            CardProgress.objects.create(user=self.user, card=card, due_at=past)
+
+        response = self.client.post(
+            f"/api/decks/{self.deck.id}/study/start/", {"core_size": 6}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        picked = set(response.data["core_ids"])
+        due_ids = {c.id for c in due}
+        self.assertEqual(len(picked & due_ids), 1)
+        self.assertEqual(len(picked - due_ids), 2)
+
+    def test_answers_use_up_the_budget(self):
+        StudyLimits.objects.create(user=self.user, reviews_per_day=1, new_per_day=1)
+        session = StudySession.objects.create(user=self.user, deck=self.deck)
+        CardProgress.objects.create(
+            user=self.user, card=self.cards[0], due_at=timezone.now(), total_correct=1
+        )
+        for card in self.cards[:2]:  # one due review, one new card
+            response = self.client.post(
+                "/api/study/answer/",
+                {"session_id": session.id, "card_id": card.id, "is_correct": True},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(today_counts(self.user), (1, 1))
+        self.assertEqual(
+            remaining_budget(self.user), {"reviews_left": 0, "new_left": 0}
+        )
+        response = self.client.get("/api/study/limits/")
+        self.assertEqual(response.data["today"]["reviews_left"], 0)
+
+    def test_bump_adds_to_a_row_another_answer_created(self):
+        # the INSERT of a concurrent first answer of the day won the race
+        now = timezone.now()
+        DailyStudyCount.objects.create(
+            user=self.user, day=timezone.localdate(now), reviews=3, new_cards=1
+        )
+        self.use(now, new=1, reviews=1)
+        self.assertEqual(today_counts(self.user, now), (4, 2))
+
+
+# in-memory SQLite serves one connection at a time: runs on PostgreSQL
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class DailyCountConcurrencyTests(TransactionTestCase):
+    def test_concurrent_bumps_add_up(self):
+        user = User.objects.create_user("racer", password="pw")
+        now = timezone.now()
+        errors = []
+
+        def bump(times):
+            try:
+                for _ in range(times):
+                    deltas = UsageDeltas()
+                    deltas.add(CardProgress(user=user), now, first_answer=True)
+                    bump_daily_counts(deltas)
+            except Exception as e:  # surfaced by the assertion below
+                errors.append(e)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=bump, args=(10,)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(today_counts(user, now), (0, 40))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("author", password="pw")
+        self.subscriber = User.objects.create_user("reader", password="pw")
+        self.deck, self.cards = make_deck(self.owner)
+        Deck.objects.filter(id=self.deck.id).update(published=True)
+        subscribe(self.subscriber, self.deck)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.cards_url = f"/api/decks/{self.deck.id}/cards/"
+
+    def assert_revalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        return first["ETag"]
+
+    def test_unchanged_resources_are_not_modified(self):
+        for url in ("/api/decks/", f"/api/decks/{self.deck.id}/", self.cards_url):
+            with self.subTest(url=url):
+                self.assert_revalidates(url)
+        first = self.client.get(self.cards_url)
+        since = self.client.get(
+            self.cards_url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(since.status_code, 304)
+
+    def test_card_edit_changes_the_validator(self):
+        etag = self.assert_revalidates(self.cards_url)
+        response = self.client.patch(
+            f"/api/cards/{self.cards[0].id}/", {"meaning": "edited"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.cards_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_fields_are_part_of_the_validator(self):
+        etag = self.assert_revalidates(self.cards_url)
+        response = self.client.get(
+            self.cards_url + "?fields=id,term", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_subscriber_override_only_changes_their_validator(self):
+        owner_etag = self.assert_revalidates(self.cards_url)
+        self.client.force_authenticate(self.subscriber)
+        reader_etag = self.assert_revalidates(self.cards_url)
+
+        response = self.client.patch(
+            f"/api/cards/{self.cards[0].id}/", {"note": "mine"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.cards_url, HTTP_IF_NONE_MATCH=reader_etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.cards_url, HTTP_IF_NONE_MATCH=owner_etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_subscribing_changes_the_deck_list(self):
+        self.client.force_authenticate(self.subscriber)
+        etag = self.assert_revalidates("/api/decks/")
+        other, _ = make_deck(self.owner)
+        Deck.objects.filter(id=other.id).update(published=True)
+        self.assertEqual(
+            self.client.post(f"/api/decks/{other.id}/subscribe/").status_code, 201
+        )
+        response = self.client.get("/api/decks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class CatalogCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.owner = User.objects.create_user("author", password="pw")
+        self.learner = User.objects.create_user("learner", password="pw")
+        self.deck, _ = make_deck(self.owner)
+        self.client = APIClient()
+
+    def test_new_decks_are_counted_before_the_refresh_job_runs(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.patch(
+            f"/api/decks/{self.deck.id}/", {"published": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        StudySession.objects.create(user=self.learner, deck=self.deck)
+        self.assertTrue(Job.objects.filter(kind="refresh_catalog").exists())
+
+        self.client.force_authenticate(self.learner)
+        (row,) = self.client.get("/api/decks/catalog/").data["results"]
+        self.assertEqual((row["card_count"], row["active_learners"]), (3, 1))
+        self.deck.refresh_from_db()
+        self.assertEqual(self.deck.card_count, 3)
@@ -1,15 +1,42 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework.routers import DefaultRouter
 
-from .views import CardViewSet, DeckViewSet, study_answer, study_summary
+from .views import (
+    CardViewSet,
+    DeckViewSet,
+    StudyGroupViewSet,
+    delta_sync,
+    group_invite,
+    group_invites,
+    group_leave,
+    job_status,
+    media_blob,
+    study_answer,
+    study_limits,
+    study_media,
+    study_review_start,
+    study_sessions,
+    study_summary,
+)
 
 router = DefaultRouter()
 router.register(r"decks", DeckViewSet, basename="deck")
 router.register(r"cards", CardViewSet, basename="card")
+router.register(r"groups", StudyGroupViewSet, basename="group")
 
 urlpatterns = [
+    path("study/start/", study_review_start, name="study_review_start"),
     path("study/answer/", study_answer, name="study_answer"),
     path("study/summary/", study_summary, name="study_summary"),
+    path("study/sessions/", study_sessions, name="study_sessions"),
+    path("study/media/", study_media, name="study_media"),
+    path("study/limits/", study_limits, name="study_limits"),
+    re_path(r"^media/(?P<sha256>[0-9a-f]{64})/$", media_blob, name="media_blob"),
+    path("sync/", delta_sync, name="delta_sync"),
+    path("groups/invites/", group_invites, name="group_invites"),
+    path("groups/invites/<int:invite_id>/", group_invite, name="group_invite"),
+    path("groups/<int:group_id>/leave/", group_leave, name="group_leave"),
+    path("jobs/<int:job_id>/", job_status, name="job_status"),
 ]
 
 urlpatterns += router.urls
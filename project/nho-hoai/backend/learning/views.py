@@ -1,100 +1,130 @@
+import logging
 import random
-from datetime import timedelta
 
-from django.db.models import Case, Count, IntegerField, Sum, When
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from rest_framework import mixins, viewsets
+from rest_framework import mixins, serializers, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Card, CardProgress, Deck, StudyAnswer, StudySession
-from .permissions import IsOwnerOfCardDeck, IsOwnerOfDeck
+from . import answer_log
+from .budget import (
+    UsageDeltas,
+    bump_daily_counts,
+    get_limits,
+    remaining_budget,
+    today_counts,
+    user_zone,
+)
+from .catalog import (
+    cached_page,
+    catalog_queryset,
+    count_uncounted,
+    page_cache_key,
+    schedule_catalog_refresh,
+)
+from .conditional import (
+    conditional_response,
+    deck_list_validators,
+    deck_validators,
+    mark_cards_changed,
+)
+from .distractors import schedule_distractor_build, session_choices
+from .grading import accepted_forms, grade
+from .groups import AnswerDeltas, bump_group_stats, invalidate_user_groups
+from .jobs import enqueue
+from .media import (
+    BlobMissing,
+    MediaError,
+    attach_media,
+    blob_response,
+    media_payload,
+)
+from .models import (
+    LANG_CHOICES,
+    Card,
+    CardMedia,
+    CardOverride,
+    CardProgress,
+    Deck,
+    GroupCardStat,
+    GroupInvite,
+    Job,
+    MediaBlob,
+    StudyAnswer,
+    StudyGroup,
+    StudyLimits,
+    StudySession,
+)
+from .pagination import CATALOG_SORTS, HardCardsPagination, SessionHistoryPagination
+from .permissions import IsOwnerOrSubscriberOfCardDeck, IsOwnerOrSubscriberOfDeck
+from .progress_ops import SHIFT_DAYS_MAX, SHIFT_DAYS_MIN, run_bulk_op
+from .replica import read_snapshot, replica_reads
+from .sharing import (
+    apply_override,
+    overlay_card,
+    overlay_overrides,
+    readable_cards_q,
+    readable_decks,
+    save_override,
+    subscribe,
+    unsubscribe,
+)
 from .serializers import (
-    CardProgressSerializer,
+    CARD_FIELDS,
     CardSerializer,
     DeckSerializer,
+    JobSerializer,
+    StudyGroupSerializer,
+    StudyLimitsSerializer,
+    StudySessionHistorySerializer,
+    format_row_datetimes,
     StudySessionSerializer,
+    progress_payload,
+    requested_fields,
+    session_payload,
+)
+from .srs import (
+    DIFF_DEC_CORRECT,
+    DIFF_INC_WRONG,
+    HARD_THRESHOLD,
+    apply_srs,
+    clamp_int,
+    ensure_progress,
+)
+from .stats import deck_stats, invalidate_deck_card_stats, invalidate_deck_stats
+from .sync import (
+    SYNC_MAX_ANSWERS,
+    SyncConflict,
+    changes_since,
+    encode_page,
+    parse_cursor,
+    parse_page,
+    upload_answers,
 )
 
-# --- Difficulty policy (Option 2 persisted) ---
-DIFF_MIN = 0
-DIFF_MAX = 100
-DIFF_INC_WRONG = 20
-DIFF_DEC_CORRECT = 10
-HARD_THRESHOLD = 40
+logger = logging.getLogger(__name__)
 
 # --- Session policy (core queue) ---
 CORE_SIZE_DEFAULT = 6
 MAX_TOTAL_QUESTIONS_DEFAULT = 12
 
 
-def clamp_int(n: int, lo: int, hi: int) -> int:
-    return max(lo, min(hi, n))
-
-
-def ensure_progress(user, card: Card) -> CardProgress:
-    progress, _ = CardProgress.objects.get_or_create(
-        user=user,
-        card=card,
-        defaults={
-            "due_at": timezone.now(),
-            "ease": 2.5,
-            "interval_days": 0,
-            "difficulty_score": 0,
-        },
-    )
-    return progress
-
-
-def apply_srs(progress: CardProgress, is_correct: bool):
-    """
-    - scheduling: simple SM-2-ish
-    - difficulty_score (0..100): wrong +20, correct -10
-    """
-    now = timezone.now()
-    progress.last_answered_at = now
-
-    # persistent difficulty
-    if is_correct:
-        progress.difficulty_score = clamp_int(
-            progress.difficulty_score - DIFF_DEC_CORRECT, DIFF_MIN, DIFF_MAX
-        )
-    else:
-        progress.difficulty_score = clamp_int(
-            progress.difficulty_score + DIFF_INC_WRONG, DIFF_MIN, DIFF_MAX
-        )
-
-    if is_correct:
-        progress.total_correct += 1
-        progress.correct_streak += 1
-        progress.wrong_streak = 0
-
-        progress.ease = max(1.3, progress.ease + 0.1)
-        if progress.interval_days == 0:
-            progress.interval_days = 1
-        elif progress.interval_days == 1:
-            progress.interval_days = 3
-        else:
-            progress.interval_days = max(
-                1, int(round(progress.interval_days * progress.ease))
-            )
-
-        progress.due_at = now + timedelta(days=progress.interval_days)
-
-    else:
-        progress.total_wrong += 1
-        progress.lapses += 1
-        progress.wrong_streak += 1
-        progress.correct_streak = 0
-
-        progress.ease = max(1.3, progress.ease - 0.2)
-        progress.interval_days = 0
-        progress.due_at = now + timedelta(minutes=10)
-
-    progress.save()
-
-
 def _dedupe_keep_order(ids):
     seen = set()
     out = []
@@ -119,62 +149,73 @@ def _pick_core_ids_option_a(
     all_card_ids: list[int],
     carry_over_ids: list[int],
     core_size: int,
+    budget: dict,
 ):
     """
     Option A priority:
       1) carry_over (from previous summary)
-      2) due
+      2) due  (at most budget["reviews_left"])
       3) hard
-      4) new (no progress yet)
+      4) new (no progress yet; at most budget["new_left"])
+
+    Each source is a LIMITed query, so what is left of the daily budget
+    bounds the scan instead of loading the deck's progress.
     """
     now = timezone.now()
-
-    # load progress for this deck
-    prog_qs = CardProgress.objects.filter(user=user, card_id__in=all_card_ids)
-    prog_map = {p.card_id: p for p in prog_qs}
+    base = CardProgress.objects.filter(user=user, card__deck=deck)
+    suspended = set(base.filter(suspended=True).values_list("card_id", flat=True))
+    base = base.filter(suspended=False)
 
     carry = _filter_existing_deck_ids(deck, carry_over_ids)
-    carry = _dedupe_keep_order(carry)
-
-    due = []
-    hard = []
-    new_ids = []
-
-    for cid in all_card_ids:
-        p = prog_map.get(cid)
-        if p is None:
-            new_ids.append(cid)
-            continue
-
-        if p.due_at <= now:
-            due.append(cid)
-        if p.difficulty_score >= HARD_THRESHOLD:
-            hard.append(cid)
-
-    # de-dup and keep order (stable)
-    due = _dedupe_keep_order(due)
-    hard = _dedupe_keep_order(hard)
-    new_ids = _dedupe_keep_order(new_ids)
-
-    core = []
-    for src in (carry, due, hard, new_ids):
-        for cid in src:
-            if cid in core:
-                continue
-            core.append(cid)
-            if len(core) >= core_size:
-                break
-        if len(core) >= core_size:
-            break
-
-    # if still not enough (deck small), fill with remaining cards (allow duplicates later)
-    if len(core) < min(core_size, len(all_card_ids)):
-        for cid in all_card_ids:
-            if cid in core:
-                continue
-            core.append(cid)
-            if len(core) >= min(core_size, len(all_card_ids)):
-                break
+    carry = _dedupe_keep_order([cid for cid in carry if cid not in suspended])
+    core = carry[:core_size]
+
+    reviews_left = budget["reviews_left"]
+    want = min(core_size - len(core), reviews_left)
+    if want > 0:
+        due = list(
+            base.filter(due_at__lte=now)
+            .exclude(card_id__in=core)
+            .order_by("due_at")
+            .values_list("card_id", flat=True)[:want]
+        )
+        core += due
+        reviews_left -= len(due)
+
+    if len(core) < core_size:
+        hard = base.filter(difficulty_score__gte=HARD_THRESHOLD)
+        if reviews_left <= 0:
+            # a due hard card is a review too: not past the budget
+            hard = hard.filter(due_at__gt=now)
+        hard = (
+            hard.exclude(card_id__in=core)
+            .order_by("-difficulty_score")
+            .values_list("card_id", flat=True)[: core_size - len(core)]
+        )
+        core += list(hard)
+
+    want = min(core_size - len(core), budget["new_left"])
+    if want > 0:
+        studied = CardProgress.objects.filter(user=user, card=OuterRef("pk"))
+        new_ids = (
+            Card.objects.filter(deck=deck)
+            .exclude(Exists(studied))
+            .order_by("id")
+            .values_list("id", flat=True)[:want]
+        )
+        core += list(new_ids)
+
+    # if still not enough (deck small), fill with studied cards that are not
+    # due: due and new cards beyond the budget stay out
+    target = min(core_size, len(all_card_ids) - len(suspended))
+    if len(core) < target:
+        rest = (
+            base.filter(due_at__gt=now)
+            .exclude(card_id__in=core)
+            .order_by("due_at")
+            .values_list("card_id", flat=True)[: target - len(core)]
+        )
+        core += list(rest)
 
     # if deck has 0 card
     if not core:
@@ -188,26 +229,145 @@ def _pick_core_ids_option_a(
     return core
 
 
+def _session_cards(session: StudySession):
+    """
+    Cards a session may answer: its deck, or any deck the user owns or
+    subscribes to (review), narrowed to the session's deck_scope if set.
+    """
+    if session.deck_id is not None:
+        return Card.objects.filter(deck_id=session.deck_id)
+    cards = Card.objects.filter(readable_cards_q(session.user_id))
+    if session.deck_scope:
+        cards = cards.filter(deck_id__in=session.deck_scope)
+    return cards
+
+
+def _pick_review_ids(*, user, deck_ids, carry_over_ids, core_size: int, budget):
+    """
+    Cross-deck core set, priority: carry_over > due > hard (no new cards).
+    Due cards are capped by budget["reviews_left"].
+
+    Each source is a LIMITed range scan on a CardProgress(user, ...) index
+    (due -> (user, due_at), hard -> (user, difficulty_score)), so the cost
+    stays flat for users with 100k+ progress rows.
+    """
+    now = timezone.now()
+    base = CardProgress.objects.filter(user=user, suspended=False)
+    # progress outlives an unsubscribe: only decks still owned/subscribed
+    base = base.filter(readable_cards_q(user, prefix="card__"))
+    if deck_ids:
+        base = base.filter(card__deck_id__in=deck_ids)
+
+    core = []
+    if carry_over_ids:
+        known = set(
+            base.filter(card_id__in=carry_over_ids).values_list("card_id", flat=True)
+        )
+        core = [cid for cid in _dedupe_keep_order(carry_over_ids) if cid in known]
+        core = core[:core_size]
+
+    reviews_left = budget["reviews_left"]
+    want = min(core_size - len(core), reviews_left)
+    if want > 0:
+        due = list(
+            base.filter(due_at__lte=now)
+            .exclude(card_id__in=core)
+            .order_by("due_at")
+            .values_list("card_id", flat=True)[:want]
+        )
+        core += due
+        reviews_left -= len(due)
+
+    if len(core) < core_size:
+        hard = base.filter(difficulty_score__gte=HARD_THRESHOLD)
+        if reviews_left <= 0:
+            # a due hard card is a review too: not past the budget
+            hard = hard.filter(due_at__gt=now)
+        hard = (
+            hard.exclude(card_id__in=core)
+            .order_by("-difficulty_score")
+            .values_list("card_id", flat=True)[: core_size - len(core)]
+        )
+        core += list(hard)
+
+    return core
+
+
 class DeckViewSet(viewsets.ModelViewSet):
     serializer_class = DeckSerializer
-    permission_classes = [IsAuthenticated, IsOwnerOfDeck]
+    permission_classes = [IsAuthenticated, IsOwnerOrSubscriberOfDeck]
     http_method_names = ["get", "post", "patch", "put", "delete", "head", "options"]
+    # non-read actions a subscriber of a shared deck may call
+    subscriber_actions = ("study_start", "progress_bulk", "progress_rebuild")
 
     def get_queryset(self):
-        return Deck.objects.filter(owner=self.request.user).annotate(
-            cards_count=Count("cards")
+        # correlated count instead of JOIN + GROUP BY: the OR over owned and
+        # subscribed decks does not come out in pk order (temp B-tree)
+        cards_count = (
+            Card.objects.filter(deck=OuterRef("pk"))
+            .order_by()
+            .values("deck")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return readable_decks(self.request.user).annotate(
+            cards_count=Coalesce(Subquery(cards_count), 0)
         )
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        deck = serializer.save(owner=self.request.user)
+        if deck.published:
+            schedule_catalog_refresh(deck.id)
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        old_langs = (instance.source_lang, instance.target_lang)
+        was_published = instance.published
+        deck = serializer.save()
+        if deck.published and not was_published:
+            schedule_catalog_refresh(deck.id)
+        if (deck.source_lang, deck.target_lang) != old_langs:
+            # normalized answers depend on the languages
+            cards = list(Card.objects.filter(deck=deck).only("id", "term", "meaning"))
+            for card in cards:
+                card.refresh_norms(deck)
+            Card.objects.bulk_update(
+                cards, ["term_norm", "meaning_norm"], batch_size=500
+            )
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = deck_list_validators(request, request.user)
+        return conditional_response(
+            request,
+            etag,
+            last_modified,
+            lambda: super(DeckViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = self._deck_validators("deck")
+        return conditional_response(
+            request,
+            etag,
+            last_modified,
+            lambda: super(DeckViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    def _deck_validators(self, kind):
+        pk = self.kwargs.get("pk")
+        if not str(pk).isdigit():
+            return None, None
+        return deck_validators(self.request, self.request.user, int(pk), kind)
 
     @action(detail=True, methods=["get", "post"], url_path="cards")
     def cards(self, request, pk=None):
-        deck = self.get_object()
-
         if request.method.lower() == "get":
-            qs = Card.objects.filter(deck=deck).order_by("-updated_at")
-            return Response(CardSerializer(qs, many=True).data)
+            etag, last_modified = self._deck_validators("cards")
+            return conditional_response(
+                request, etag, last_modified, lambda: self._list_cards(request)
+            )
+
+        deck = self.get_object()
 
         serializer = CardSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -219,8 +379,163 @@ class DeckViewSet(viewsets.ModelViewSet):
             example=serializer.validated_data.get("example", ""),
             note=serializer.validated_data.get("note", ""),
         )
+        mark_cards_changed(deck.id)
+        schedule_distractor_build(deck.id)
+        invalidate_deck_card_stats(deck.id)
         return Response({"ok": True}, status=201)
 
+    def _list_cards(self, request):
+        deck = self.get_object()
+        # values() rows have CardSerializer's shape without per-field overhead
+        fields = requested_fields(request, CARD_FIELDS) or CARD_FIELDS
+        if deck.owner_id == request.user.id:
+            qs = Card.objects.filter(deck=deck).order_by("-updated_at").values(*fields)
+            return Response(format_row_datetimes(list(qs)))
+
+        # subscriber: the shared rows + this user's copy-on-write edits
+        rows = list(
+            Card.objects.filter(deck=deck)
+            .order_by("-updated_at")
+            .values(*{"id", *fields})
+        )
+        overlay_overrides(request.user, rows)
+        if "id" not in fields:
+            for r in rows:
+                del r["id"]
+        return Response(format_row_datetimes(rows))
+
+    @action(detail=False, methods=["get"], url_path="catalog")
+    def catalog(self, request):
+        """
+        GET /api/decks/catalog/?sort=subscribers|active&source_lang=&target_lang=
+        Published decks by popularity: denormalized counters, keyset pages
+        (`cursor`), one short-TTL page cache shared by every user.
+        """
+        params = request.query_params
+        paginator_class = CATALOG_SORTS.get(params.get("sort", "subscribers"))
+        if paginator_class is None:
+            return Response(
+                {"detail": f"sort must be one of {', '.join(CATALOG_SORTS)}."},
+                status=400,
+            )
+        langs = {code for code, _ in LANG_CHOICES}
+        source_lang = params.get("source_lang") or None
+        target_lang = params.get("target_lang") or None
+        if {source_lang, target_lang} - langs - {None}:
+            return Response(
+                {"detail": f"Languages must be one of {', '.join(sorted(langs))}."},
+                status=400,
+            )
+
+        paginator = paginator_class()
+        key = page_cache_key(
+            paginator.ordering,
+            source_lang,
+            target_lang,
+            paginator.get_page_size(request),
+            params.get(paginator.cursor_query_param, ""),
+        )
+
+        def build():
+            count_uncounted(source_lang, target_lang)
+            rows = paginator.paginate_queryset(
+                catalog_queryset(source_lang, target_lang), request
+            )
+            return {"results": rows, "next_cursor": paginator.next_cursor}
+
+        page = cached_page(key, build)
+        paginator.request = request
+        paginator.next_cursor = page["next_cursor"]
+        return paginator.get_paginated_response(page["results"])
+
+    @action(detail=True, methods=["post", "delete"], url_path="subscribe")
+    def subscribe(self, request, pk=None):
+        """
+        POST   /api/decks/{id}/subscribe/  study a published deck (no card copy)
+        DELETE /api/decks/{id}/subscribe/  drop it (own edits go, progress stays)
+        """
+        if request.method.lower() == "delete":
+            deck = Deck.objects.filter(id=pk, subscriptions__user=request.user).first()
+            if deck is None or not unsubscribe(request.user, deck):
+                return Response({"detail": "Not subscribed."}, status=404)
+            invalidate_deck_stats(request.user.id, [deck.id])
+            return Response(status=204)
+
+        deck = Deck.objects.filter(id=pk, published=True).first()
+        if deck is None:
+            return Response({"detail": "Deck not found."}, status=404)
+        if deck.owner_id == request.user.id:
+            return Response({"detail": "Cannot subscribe to own deck."}, status=400)
+        _, created = subscribe(request.user, deck)
+        return Response(
+            {"ok": True, "deck_id": deck.id}, status=201 if created else 200
+        )
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"progress/(?P<op>reset|suspend|unsuspend|reschedule)",
+    )
+    def progress_bulk(self, request, pk=None, op=None):
+        """
+        POST /api/decks/{id}/progress/{reset|suspend|unsuspend|reschedule}/
+        body: { card_ids?: [...], shift_days?: int, only_due?: bool }
+        Whole deck unless card_ids is given; one set-based statement per op.
+        """
+        deck = self.get_object()
+
+        card_qs = Card.objects.filter(deck=deck)
+        card_ids = request.data.get("card_ids")
+        if card_ids is not None:
+            if not isinstance(card_ids, list):
+                return Response({"detail": "card_ids must be a list."}, status=400)
+            card_qs = card_qs.filter(
+                id__in=[int(x) for x in card_ids if str(x).isdigit()]
+            )
+
+        shift_days = 0
+        if op == "reschedule":
+            try:
+                shift_days = int(request.data.get("shift_days"))
+            except (TypeError, ValueError):
+                return Response({"detail": "shift_days is required."}, status=400)
+            shift_days = clamp_int(shift_days, SHIFT_DAYS_MIN, SHIFT_DAYS_MAX)
+
+        # JSON true/false or form "true"/"false"/"1"/"0"; bool("false") is True
+        try:
+            only_due = serializers.BooleanField().to_internal_value(
+                request.data.get("only_due", False)
+            )
+        except serializers.ValidationError:
+            return Response({"detail": "only_due must be a boolean."}, status=400)
+
+        result = run_bulk_op(
+            request.user, op, card_qs, shift_days=shift_days, only_due=only_due
+        )
+        return Response({"ok": True, "op": op, "deck_id": deck.id, **result})
+
+    @action(detail=True, methods=["post"], url_path="progress/rebuild")
+    def progress_rebuild(self, request, pk=None):
+        """
+        POST /api/decks/{id}/progress/rebuild/
+        Replays the answer history of this deck in the background;
+        poll GET /api/jobs/{job_id}/.
+        """
+        deck = self.get_object()
+        job = enqueue(
+            "rebuild_progress",
+            user=request.user,
+            user_id=request.user.id,
+            deck_id=deck.id,
+        )
+        return Response(JobSerializer(job).data, status=202)
+
+    @action(detail=True, methods=["get"], url_path="stats")
+    def stats(self, request, pk=None):
+        deck = self.get_object()
+        with replica_reads(request.user):
+            return Response(deck_stats(request.user, deck))
+
     @action(detail=True, methods=["post"], url_path="study/start")
     def study_start(self, request, pk=None):
         deck = self.get_object()
@@ -245,11 +560,15 @@ class DeckViewSet(viewsets.ModelViewSet):
             carry_ids = []
         carry_ids = [int(x) for x in carry_ids if str(x).isdigit()]
 
-        cards = list(Card.objects.filter(deck=deck).order_by("id"))
+        cards = list(Card.objects.filter(deck=deck).order_by("id").values(*CARD_FIELDS))
+        if deck.owner_id != request.user.id:
+            overlay_overrides(request.user, cards)
+        format_row_datetimes(cards)
         if not cards:
             return Response({"detail": "Deck has no cards."}, status=400)
 
-        all_ids = [c.id for c in cards]
+        all_ids = [c["id"] for c in cards]
+        budget = remaining_budget(request.user)
 
         # pick core ids using Option A
         core_ids = _pick_core_ids_option_a(
@@ -258,11 +577,13 @@ class DeckViewSet(viewsets.ModelViewSet):
             all_card_ids=all_ids,
             carry_over_ids=carry_ids,
             core_size=core_size,
+            budget=budget,
         )
 
         if not core_ids:
             return Response(
-                {"detail": "Failed to create session core set."}, status=400
+                {"detail": "Failed to create session core set.", "budget": budget},
+                status=400,
             )
 
         # shuffle core for better UX (frontend will also shuffle queue, but we give shuffled as well)
@@ -275,8 +596,10 @@ class DeckViewSet(viewsets.ModelViewSet):
             {
                 "session": StudySessionSerializer(session).data,
                 "deck": DeckSerializer(deck).data,
-                "cards": CardSerializer(cards, many=True).data,
+                "cards": cards,
                 "core_ids": core_ids_shuffled,  # ✅ exactly core_size (duplicates allowed)
+                # multiple-choice options per core card (learning/distractors.py)
+                "choices": session_choices(request.user, cards, core_ids),
                 "policy": {
                     "core_size": core_size,
                     "max_total_questions": max_total,
@@ -284,6 +607,7 @@ class DeckViewSet(viewsets.ModelViewSet):
                     "diff_inc_wrong": DIFF_INC_WRONG,
                     "diff_dec_correct": DIFF_DEC_CORRECT,
                     "priority": "carry_over > due > hard > new",
+                    "budget": budget,
                 },
             }
         )
@@ -296,24 +620,403 @@ class CardViewSet(
     viewsets.GenericViewSet,
 ):
     serializer_class = CardSerializer
-    permission_classes = [IsAuthenticated, IsOwnerOfCardDeck]
-    http_method_names = ["get", "patch", "put", "delete", "head", "options"]
+    permission_classes = [IsAuthenticated, IsOwnerOrSubscriberOfCardDeck]
+    http_method_names = ["get", "post", "patch", "put", "delete", "head", "options"]
+    # subscribers edit shared cards copy-on-write (perform_update)
+    subscriber_actions = ("update", "partial_update")
 
     def get_queryset(self):
-        return Card.objects.select_related("deck").filter(deck__owner=self.request.user)
+        return Card.objects.select_related("deck").filter(
+            readable_cards_q(self.request.user)
+        )
+
+    def get_object(self):
+        card = super().get_object()
+        if card.deck.owner_id != self.request.user.id:
+            overlay_card(self.request.user, card)
+        return card
+
+    @action(detail=False, methods=["get"], url_path="hard")
+    def hard(self, request):
+        """
+        GET /api/cards/hard/?min_difficulty=40&cursor=...&page_size=...
+        Hardest cards across all decks, keyset-paginated on
+        (difficulty_score, lapses, id) -> CardProgress(user, difficulty_score,
+        lapses) index range scan with the card columns joined in.
+        """
+        min_diff = request.query_params.get("min_difficulty", HARD_THRESHOLD)
+        try:
+            min_diff = int(min_diff)
+        except (TypeError, ValueError):
+            min_diff = HARD_THRESHOLD
+
+        qs = CardProgress.objects.filter(
+            user=request.user, difficulty_score__gte=min_diff
+        ).values(
+            "id",
+            "card_id",
+            "difficulty_score",
+            "lapses",
+            "total_correct",
+            "total_wrong",
+            "due_at",
+            deck_id=F("card__deck_id"),
+            term=F("card__term"),
+            meaning=F("card__meaning"),
+            note=F("card__note"),
+        )
+
+        paginator = HardCardsPagination()
+        page = paginator.paginate_queryset(qs, request)
+        overlay_overrides(request.user, page, key="card_id")
+        return paginator.get_paginated_response(page)
+
+    @action(detail=True, methods=["get", "post", "delete"], url_path="media")
+    def media(self, request, pk=None):
+        """
+        GET    /api/cards/{id}/media/              -> the card's audio/image
+        POST   /api/cards/{id}/media/  (multipart `file`; owner only)
+        DELETE /api/cards/{id}/media/?kind=audio   (owner only)
+        Identical files are stored once (learning/media.py).
+        """
+        card = self.get_object()
+        method = request.method.lower()
+        if method == "post":
+            uploaded = request.FILES.get("file")
+            if uploaded is None:
+                return Response({"detail": "file is required."}, status=400)
+            try:
+                link = attach_media(card, uploaded)
+            except MediaError as e:
+                return Response({"detail": str(e)}, status=400)
+            return Response(media_payload(link), status=201)
+
+        if method == "delete":
+            kind = request.query_params.get("kind")
+            if kind not in dict(CardMedia.KIND_CHOICES):
+                return Response({"detail": "kind must be audio or image."}, status=400)
+            deleted, _ = CardMedia.objects.filter(card=card, kind=kind).delete()
+            return Response(status=204 if deleted else 404)
+
+        links = CardMedia.objects.filter(card=card).select_related("blob")
+        return Response([media_payload(link) for link in links])
+
+    def perform_update(self, serializer):
+        card = serializer.instance
+        if card.deck.owner_id != self.request.user.id:
+            # shared card: never touch the canonical row
+            override = save_override(self.request.user, card, serializer.validated_data)
+            apply_override(card, override)
+            return
+        old_deck_id = card.deck_id
+        card = serializer.save()
+        mark_cards_changed(old_deck_id, card.deck_id)
+        schedule_distractor_build(old_deck_id, card.deck_id)
+        if card.deck_id != old_deck_id:
+            invalidate_deck_card_stats(old_deck_id, card.deck_id)
+
+    def perform_destroy(self, instance):
+        deck_id = instance.deck_id
+        instance.delete()
+        mark_cards_changed(deck_id)
+        schedule_distractor_build(deck_id)
+        invalidate_deck_card_stats(deck_id)
+
+
+# --- Teacher analytics ---
+HARDEST_LIMIT_DEFAULT = 20
+HARDEST_LIMIT_MAX = 100
+HARDEST_MIN_ATTEMPTS_DEFAULT = 3
+
+
+class StudyGroupViewSet(viewsets.ModelViewSet):
+    """Classes of the requesting teacher; members are students' usernames."""
+
+    serializer_class = StudyGroupSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+
+    def get_queryset(self):
+        return StudyGroup.objects.filter(owner=self.request.user).annotate(
+            members_count=Count("members")
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        member_ids = list(instance.members.values_list("id", flat=True))
+        instance.delete()
+        invalidate_user_groups(member_ids)
+
+    @action(detail=True, methods=["get", "post", "delete"], url_path="members")
+    def members(self, request, pk=None):
+        """
+        GET    /api/groups/{id}/members/
+        POST   /api/groups/{id}/members/  body: { usernames: [...] }  invite
+        DELETE /api/groups/{id}/members/  body: { usernames: [...] }  remove
+        Students join only by accepting the invite (/api/groups/invites/);
+        responses never say which usernames exist.
+        """
+        group = self.get_object()
+        if request.method.lower() == "get":
+            return Response(
+                list(group.members.order_by("username").values("id", "username"))
+            )
+
+        usernames = request.data.get("usernames")
+        if not isinstance(usernames, list) or not usernames:
+            return Response(
+                {"detail": "usernames must be a non-empty list."}, status=400
+            )
+        users = get_user_model().objects.filter(
+            username__in=[str(u) for u in usernames]
+        )
+        if request.method.lower() == "post":
+            GroupInvite.objects.bulk_create(
+                [
+                    GroupInvite(group=group, user_id=uid)
+                    for uid in users.exclude(study_groups=group)
+                    .exclude(id=group.owner_id)
+                    .values_list("id", flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+            return Response({"ok": True}, status=202)
+
+        GroupInvite.objects.filter(group=group, user__in=users).delete()
+        removed = list(group.members.filter(id__in=users).values_list("id", flat=True))
+        group.members.remove(*removed)
+        invalidate_user_groups(removed)
+        job = enqueue("refresh_group_stats", user=request.user, group_id=group.id)
+        return Response({"ok": True, "job_id": job.id})
+
+    @action(detail=True, methods=["get"], url_path="hardest-cards")
+    def hardest_cards(self, request, pk=None):
+        """
+        GET /api/groups/{id}/hardest-cards/?limit=20&min_attempts=3&deck=<id>
+        Highest wrong rate first, straight from the GroupCardStat index.
+        """
+        group = self.get_object()
+        try:
+            limit = int(request.query_params.get("limit", HARDEST_LIMIT_DEFAULT))
+            min_attempts = int(
+                request.query_params.get("min_attempts", HARDEST_MIN_ATTEMPTS_DEFAULT)
+            )
+        except (TypeError, ValueError):
+            return Response({"detail": "limit/min_attempts must be ints."}, status=400)
+        limit = clamp_int(limit, 1, HARDEST_LIMIT_MAX)
+
+        # only cards the teacher may show: own decks or published ones
+        qs = GroupCardStat.objects.filter(
+            Q(card__deck__owner=group.owner_id) | Q(card__deck__published=True),
+            group=group,
+            attempts__gte=min_attempts,
+        )
+        deck_id = request.query_params.get("deck")
+        if deck_id:
+            if not str(deck_id).isdigit():
+                return Response({"detail": "deck must be an id."}, status=400)
+            qs = qs.filter(card__deck_id=int(deck_id))
+
+        rows = list(
+            qs.order_by("-wrong_rate", "-id").values(
+                "card_id",
+                "attempts",
+                "wrong",
+                "wrong_rate",
+                "learners",
+                "difficulty_sum",
+                deck_id=F("card__deck_id"),
+                term=F("card__term"),
+                meaning=F("card__meaning"),
+            )[:limit]
+        )
+        for r in rows:
+            r["wrong_rate"] = round(r["wrong_rate"], 3)
+            r["avg_difficulty"] = (
+                round(r.pop("difficulty_sum") / r["learners"], 1)
+                if r["learners"]
+                else 0.0
+            )
+        return Response({"group_id": group.id, "results": rows})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def group_invites(request):
+    """
+    GET /api/groups/invites/
+    Classes that invited the requesting student and are waiting for an answer.
+    """
+    rows = GroupInvite.objects.filter(user=request.user).values(
+        "id",
+        "group_id",
+        "created_at",
+        group_name=F("group__name"),
+        teacher=F("group__owner__username"),
+    )
+    return Response(list(rows))
+
+
+@api_view(["POST", "DELETE"])
+@permission_classes([IsAuthenticated])
+def group_invite(request, invite_id):
+    """
+    POST   /api/groups/invites/{id}/  accept: join the class
+    DELETE /api/groups/invites/{id}/  decline
+    """
+    invite = GroupInvite.objects.filter(id=invite_id, user=request.user).first()
+    if invite is None:
+        return Response({"detail": "Invite not found."}, status=404)
+    if request.method == "DELETE":
+        invite.delete()
+        return Response(status=204)
+
+    with transaction.atomic():
+        invite.group.members.add(request.user)
+        invite.delete()
+    invalidate_user_groups([request.user.id])
+    job = enqueue(
+        "refresh_group_stats", user=invite.group.owner, group_id=invite.group_id
+    )
+    return Response({"ok": True, "group_id": invite.group_id, "job_id": job.id})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def group_leave(request, group_id):
+    """POST /api/groups/{id}/leave/  a student stops sharing answers with a class"""
+    group = StudyGroup.objects.filter(id=group_id, members=request.user).first()
+    if group is None:
+        return Response({"detail": "Not a member."}, status=404)
+    group.members.remove(request.user)
+    invalidate_user_groups([request.user.id])
+    enqueue("refresh_group_stats", user=group.owner, group_id=group.id)
+    return Response(status=204)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def study_review_start(request):
+    """
+    POST /api/study/start/
+    body: { core_size?, max_total_questions?, carry_over_card_ids?, deck_ids? }
+    Cross-deck session over everything due/hard; `deck_ids` narrows the scope.
+    """
+    core_size = request.data.get("core_size", CORE_SIZE_DEFAULT)
+    max_total = request.data.get("max_total_questions", MAX_TOTAL_QUESTIONS_DEFAULT)
+
+    try:
+        core_size = int(core_size)
+    except Exception:
+        core_size = CORE_SIZE_DEFAULT
+    try:
+        max_total = int(max_total)
+    except Exception:
+        max_total = MAX_TOTAL_QUESTIONS_DEFAULT
+
+    core_size = max(1, min(core_size, 50))
+    max_total = max(core_size, min(max_total, 200))
+
+    carry_ids = request.data.get("carry_over_card_ids", [])
+    if not isinstance(carry_ids, list):
+        carry_ids = []
+    carry_ids = [int(x) for x in carry_ids if str(x).isdigit()]
+
+    deck_ids = request.data.get("deck_ids", [])
+    if not isinstance(deck_ids, list):
+        deck_ids = []
+    deck_ids = [int(x) for x in deck_ids if str(x).isdigit()]
+    if deck_ids:
+        deck_ids = list(
+            readable_decks(request.user)
+            .filter(id__in=deck_ids)
+            .values_list("id", flat=True)
+        )
+        if not deck_ids:
+            return Response({"detail": "Deck not found."}, status=404)
+
+    budget = remaining_budget(request.user)
+    core_ids = _pick_review_ids(
+        user=request.user,
+        deck_ids=deck_ids,
+        carry_over_ids=carry_ids,
+        core_size=core_size,
+        budget=budget,
+    )
+    if not core_ids:
+        return Response({"detail": "Nothing to review.", "budget": budget}, status=400)
+
+    # minimal payload: only the picked cards, no serializer round-trip
+    cards = list(
+        Card.objects.filter(readable_cards_q(request.user), id__in=core_ids)
+        .order_by()
+        .values("id", "deck", "term", "meaning", "note")
+    )
+    overlay_overrides(request.user, cards)
+
+    core_ids_shuffled = core_ids[:]
+    random.shuffle(core_ids_shuffled)
+
+    session = StudySession.objects.create(
+        user=request.user,
+        deck_id=deck_ids[0] if len(deck_ids) == 1 else None,
+        deck_scope=sorted(deck_ids) if len(deck_ids) > 1 else None,
+    )
+
+    return Response(
+        {
+            "session": StudySessionSerializer(session).data,
+            "deck": None,
+            "cards": cards,
+            "core_ids": core_ids_shuffled,
+            "choices": session_choices(request.user, cards, core_ids),
+            "policy": {
+                "core_size": len(core_ids),
+                "max_total_questions": max(len(core_ids), max_total),
+                "hard_threshold": HARD_THRESHOLD,
+                "diff_inc_wrong": DIFF_INC_WRONG,
+                "diff_dec_correct": DIFF_DEC_CORRECT,
+                "priority": "carry_over > due > hard",
+                "deck_ids": deck_ids or None,
+                "budget": budget,
+            },
+        }
+    )
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def study_answer(request):
+    """
+    POST /api/study/answer/
+    body: { session_id, card_id, is_correct }
+       or { session_id, card_id, typed_answer, direction?: "t2m" | "m2t" }
+    With typed_answer the server grades against the card's precomputed
+    normalized forms (meaning for t2m, term for m2t).
+    """
     session_id = request.data.get("session_id")
     card_id = request.data.get("card_id")
     is_correct = request.data.get("is_correct")
-
-    if session_id is None or card_id is None or is_correct is None:
+    typed_answer = request.data.get("typed_answer")
+    direction = request.data.get("direction", "t2m")
+
+    if (
+        session_id is None
+        or card_id is None
+        or (is_correct is None and typed_answer is None)
+    ):
         return Response(
             {"detail": "session_id, card_id, is_correct are required."}, status=400
         )
+    if typed_answer is not None and (
+        not isinstance(typed_answer, str) or direction not in ANSWER_DIRECTIONS
+    ):
+        return Response(
+            {"detail": "typed_answer must be a string, direction t2m or m2t."},
+            status=400,
+        )
 
     try:
         session = StudySession.objects.select_related("deck").get(
@@ -323,39 +1026,156 @@ def study_answer(request):
         return Response({"detail": "Session not found."}, status=404)
 
     try:
-        card = Card.objects.select_related("deck").get(id=card_id, deck=session.deck)
+        card = _session_cards(session).select_related("deck").get(id=card_id)
     except Card.DoesNotExist:
         return Response({"detail": "Card not found in this deck."}, status=404)
 
-    ok = bool(is_correct)
+    grading = None
+    if typed_answer is not None:
+        grading = _grade_typed_answer(request.user, card, typed_answer, direction)
+        ok = grading["is_correct"]
+    else:
+        ok = bool(is_correct)
+
+    if answer_log.is_enabled():
+        # write-behind: append to the local log, DB is updated in batches
+        progress = answer_log.record_answer(request.user, session, card, ok)
+    else:
+        # log answer
+        StudyAnswer.objects.create(session=session, card=card, is_correct=ok)
+
+        progress = ensure_progress(request.user, card)
+        old_difficulty = progress.difficulty_score
+        first_answer = progress.total_correct + progress.total_wrong == 0
+        usage = UsageDeltas()
+        usage.add(progress, timezone.now(), first_answer=first_answer)
+        apply_srs(progress, ok)
+
+        deltas = AnswerDeltas()
+        deltas.add(progress, ok, old_difficulty, first_answer)
+        bump_group_stats(deltas)
+        bump_daily_counts(usage)
+
+        session.total_answered += 1
+        if ok:
+            session.correct_count += 1
+        else:
+            session.wrong_count += 1
+
+        session.save(update_fields=["total_answered", "correct_count", "wrong_count"])
+        invalidate_deck_stats(request.user.id, [card.deck_id])
+
+    payload = {
+        "ok": True,
+        "session": session_payload(session),
+        "progress": progress_payload(progress),
+        "flags": {
+            "hard": progress.difficulty_score >= HARD_THRESHOLD,
+            "difficulty_score": progress.difficulty_score,
+        },
+    }
+    if grading is not None:
+        payload["grading"] = grading
+    return Response(payload)
 
-    # log answer
-    StudyAnswer.objects.create(session=session, card=card, is_correct=ok)
 
-    progress = ensure_progress(request.user, card)
-    apply_srs(progress, ok)
+ANSWER_DIRECTIONS = ("t2m", "m2t")
 
-    session.total_answered += 1
-    if ok:
-        session.correct_count += 1
+
+def _grade_typed_answer(user, card, typed_answer, direction):
+    """Grade against the stored normalized forms; no query for own decks."""
+    deck = card.deck
+    if direction == "t2m":
+        expected, forms, lang = card.meaning, card.meaning_norm, deck.target_lang
+        field = "meaning"
     else:
-        session.wrong_count += 1
+        expected, forms, lang = card.term, card.term_norm, deck.source_lang
+        field = "term"
+
+    if deck.owner_id != user.id:
+        # subscriber: an own edit of the shared card wins (not precomputed)
+        edited = (
+            CardOverride.objects.filter(user=user, card=card)
+            .values_list(field, flat=True)
+            .first()
+        )
+        if edited is not None:
+            expected = edited
+            forms = accepted_forms(expected, lang)
 
-    session.save(update_fields=["total_answered", "correct_count", "wrong_count"])
+    is_ok, distance = grade(typed_answer, forms, lang)
+    return {"is_correct": is_ok, "distance": distance, "expected": expected}
 
+
+STUDY_MEDIA_MAX_CARDS = 500
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def study_media(request):
+    """
+    GET /api/study/media/?session_id=<id>&card_ids=1,2,3
+    Pre-fetch manifest: every audio/image of the session's cards in one
+    response, so the client can download them before the questions come up.
+    `card_ids` narrows a deck session and is required for review sessions.
+    """
+    session_id = request.query_params.get("session_id")
+    if not session_id or not str(session_id).isdigit():
+        return Response({"detail": "session_id is required."}, status=400)
+    session = StudySession.objects.filter(id=session_id, user=request.user).first()
+    if session is None:
+        return Response({"detail": "Session not found."}, status=404)
+
+    raw_ids = request.query_params.get("card_ids", "")
+    card_ids = [int(x) for x in raw_ids.split(",") if x.strip().isdigit()]
+    if len(card_ids) > STUDY_MEDIA_MAX_CARDS:
+        return Response(
+            {"detail": f"At most {STUDY_MEDIA_MAX_CARDS} card_ids."}, status=400
+        )
+    cards = _session_cards(session)
+    if card_ids:
+        cards = cards.filter(id__in=card_ids)
+    elif session.deck_id is None:
+        return Response(
+            {"detail": "card_ids is required for review sessions."}, status=400
+        )
+
+    links = (
+        CardMedia.objects.filter(card__in=cards)
+        .select_related("blob")
+        .order_by("card_id", "kind")
+    )
+    items = [media_payload(link) for link in links]
     return Response(
         {
-            "ok": True,
-            "session": StudySessionSerializer(session).data,
-            "progress": CardProgressSerializer(progress).data,
-            "flags": {
-                "hard": progress.difficulty_score >= HARD_THRESHOLD,
-                "difficulty_score": progress.difficulty_score,
-            },
+            "session_id": session.id,
+            "total_bytes": sum(item["size"] for item in items),
+            "items": items,
         }
     )
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def media_blob(request, sha256):
+    """
+    GET /api/media/{sha256}/
+    Streams a blob linked to a card the user can read. Range / If-Range,
+    strong ETag (the hash) and immutable caching, see learning/media.py.
+    """
+    linked = CardMedia.objects.filter(
+        readable_cards_q(request.user, prefix="card__"), blob_id=sha256
+    ).exists()
+    blob = MediaBlob.objects.filter(sha256=sha256).first() if linked else None
+    if blob is None:
+        return Response({"detail": "Not found."}, status=404)
+    try:
+        return blob_response(request, blob)
+    except BlobMissing:
+        logger.error("media blob %s has no file", sha256)
+        return Response({"detail": "Media file is gone."}, status=410)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def study_summary(request):
@@ -363,6 +1183,17 @@ def study_summary(request):
     if not session_id or not str(session_id).isdigit():
         return Response({"detail": "session_id is required."}, status=400)
 
+    # write-behind: log files first, DB snapshot second, so an answer flushed
+    # in between is in the snapshot and dropped from the log entries; the
+    # replica lags the flushes, so logged answers mean reading the primary
+    logged = (
+        answer_log.logged_answers(int(session_id)) if answer_log.is_enabled() else []
+    )
+    with replica_reads(request.user, primary=bool(logged)) as db, read_snapshot(db):
+        return _study_summary(request, session_id, logged)
+
+
+def _study_summary(request, session_id, logged):
     try:
         session = StudySession.objects.select_related("deck").get(
             id=int(session_id), user=request.user
@@ -370,6 +1201,8 @@ def study_summary(request):
     except StudySession.DoesNotExist:
         return Response({"detail": "Session not found."}, status=404)
 
+    pending = answer_log.unflushed(logged)
+
     answers = (
         StudyAnswer.objects.filter(session=session)
         .values("card_id")
@@ -391,13 +1224,29 @@ def study_summary(request):
         )
     )
 
+    answers = list(answers)
+    if pending:
+        by_card = {a["card_id"]: a for a in answers}
+        for e in pending:
+            a = by_card.get(e["card_id"])
+            if a is None:
+                a = {"card_id": e["card_id"], "correct": 0, "wrong": 0}
+                by_card[e["card_id"]] = a
+                answers.append(a)
+            key = "correct" if e["is_correct"] else "wrong"
+            a[key] = int(a[key] or 0) + 1
+
     card_ids = [a["card_id"] for a in answers]
-    cards = {c.id: c for c in Card.objects.filter(id__in=card_ids, deck=session.deck)}
+    cards = {
+        c.id: c for c in _session_cards(session).filter(id__in=card_ids).order_by()
+    }
 
     prog_map = {
         p.card_id: p
         for p in CardProgress.objects.filter(user=request.user, card_id__in=card_ids)
     }
+    if pending:
+        answer_log.overlay_pending(session, prog_map, pending)
 
     rows = []
     for a in answers:
@@ -420,6 +1269,7 @@ def study_summary(request):
             }
         )
 
+    overlay_overrides(request.user, rows, key="cardId")
     rows.sort(key=lambda r: (-r["wrong"], -r["difficulty_score"], r["term"]))
     recommended = [r["cardId"] for r in rows if r["wrong"] > 0][:4]
 
@@ -431,3 +1281,138 @@ def study_summary(request):
             "recommended_carry_over_card_ids": recommended,
         }
     )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def study_sessions(request):
+    """
+    GET /api/study/sessions/?deck=<id>&cursor=...&page_size=...
+    Past sessions newest first, keyset-paginated on (user, started_at).
+    """
+    with replica_reads(request.user):
+        return _study_sessions(request)
+
+
+def _study_sessions(request):
+    qs = StudySession.objects.filter(user=request.user)
+
+    deck_id = request.query_params.get("deck")
+    if deck_id:
+        if not str(deck_id).isdigit():
+            return Response({"detail": "deck must be an id."}, status=400)
+        qs = qs.filter(deck_id=int(deck_id))
+
+    # correlated subquery: only evaluated for the rows of the page,
+    # served by the StudyAnswer(session, answered_at) index
+    last_answer = (
+        StudyAnswer.objects.filter(session=OuterRef("pk"))
+        .order_by("-answered_at")
+        .values("answered_at")[:1]
+    )
+    qs = qs.annotate(last_answered_at=Subquery(last_answer))
+
+    paginator = SessionHistoryPagination()
+    page = paginator.paginate_queryset(qs, request)
+    return paginator.get_paginated_response(
+        StudySessionHistorySerializer(
+            page, many=True, context={"request": request}
+        ).data
+    )
+
+
+@api_view(["GET", "PATCH"])
+@permission_classes([IsAuthenticated])
+def study_limits(request):
+    """
+    GET   /api/study/limits/
+    PATCH /api/study/limits/  body: { reviews_per_day?, new_per_day?, time_zone? }
+    Daily budgets applied by the session pickers, plus today's consumption
+    (days in `time_zone`, an IANA name such as "Asia/Ho_Chi_Minh").
+    """
+    reviews_per_day, new_per_day, time_zone = get_limits(request.user)
+    if request.method == "PATCH":
+        limits = StudyLimits.objects.filter(user=request.user).first() or StudyLimits(
+            user=request.user,
+            reviews_per_day=reviews_per_day,
+            new_per_day=new_per_day,
+        )
+        serializer = StudyLimitsSerializer(limits, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        limits = serializer.save()
+        reviews_per_day, new_per_day = limits.reviews_per_day, limits.new_per_day
+        time_zone = limits.time_zone
+
+    reviews, new_cards = today_counts(request.user, time_zone=time_zone)
+    return Response(
+        {
+            "reviews_per_day": reviews_per_day,
+            "new_per_day": new_per_day,
+            "time_zone": str(user_zone(time_zone)),
+            "today": {
+                "reviews": reviews,
+                "new_cards": new_cards,
+                "reviews_left": max(0, reviews_per_day - reviews),
+                "new_left": max(0, new_per_day - new_cards),
+            },
+        }
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def delta_sync(request):
+    """
+    POST /api/sync/
+    body: { cursor?, page?,
+            answers?: [{ key, card_id, is_correct, answered_at?, session_id? }] }
+    Offline answers are applied first (once per client `key`), then all
+    changes since `cursor` come back with the next cursor (learning/sync.py);
+    while the response has a `next_page`, post it back as `page` for the rest.
+    """
+    answers = request.data.get("answers", [])
+    if not isinstance(answers, list) or len(answers) > SYNC_MAX_ANSWERS:
+        return Response(
+            {"detail": f"answers must be a list of at most {SYNC_MAX_ANSWERS}."},
+            status=400,
+        )
+    page = request.data.get("page")
+    after = None
+    if page:
+        try:
+            now, since, after = parse_page(page)
+        except ValueError:
+            return Response({"detail": "Invalid page."}, status=400)
+    else:
+        now = timezone.now()
+        since = parse_cursor(request.data.get("cursor"), now)
+    try:
+        uploaded = upload_answers(request.user, answers)
+    except SyncConflict:
+        return Response(
+            {"detail": "Another sync is uploading these answers; retry."}, status=409
+        )
+    changes = changes_since(request.user, since, after)
+    next_page = changes.pop("next_page")
+    return Response(
+        {
+            "cursor": now.isoformat(),
+            "full": since is None,
+            "answers": uploaded,
+            **changes,
+            "next_page": next_page and encode_page(now, since, next_page),
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def job_status(request, job_id):
+    """
+    GET /api/jobs/{id}/
+    Status/progress/result of one of the user's background jobs.
+    """
+    job = Job.objects.filter(id=job_id, user=request.user).first()
+    if job is None:
+        return Response({"detail": "Job not found."}, status=404)
+    return Response(JobSerializer(job, context={"request": request}).data)
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from nho_hoai.warmup import warm_up_from_env
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nho_hoai.settings')
 
 application = get_asgi_application()
+
+# database connections are per thread under ASGI: only the code is warmed
+warm_up_from_env(databases=False)
@@ -0,0 +1,22 @@
+"""
+gunicorn settings: `gunicorn -c nho_hoai/gunicorn.conf.py nho_hoai.wsgi`
+
+With preload the master imports wsgi.py, which warms the code and opens the
+database connections (see nho_hoai/warmup.py). Those connections belong to
+the master: they are closed before every fork and the workers open their own
+on their first request.
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # runs in the master only, unlike os.register_at_fork hooks that would
+    # also fire on every subprocess / multiprocessing fork in a worker
+    from nho_hoai.warmup import close_connections
+
+    close_connections()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,11 +46,23 @@ CSRF_TRUSTED_ORIGINS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
 }
 
+# Opt-in orjson renderer (learning.renderers.FastJSONRenderer)
+if os.environ.get("NHO_HOAI_FAST_JSON") == "1":
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
+        "learning.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    )
+
+# accounts.authentication.CachedJWTAuthentication: seconds a resolved user
+# is reused before the users table is hit again. Off unless
+# JWT_USER_CACHE_ALIAS names a cache shared by all workers (not LocMem).
+JWT_USER_CACHE_TTL = 60
+
 
 # Application definition
 
@@ -78,6 +91,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "learning.replica.PrimaryPinMiddleware",
 ]
 
 ROOT_URLCONF = "nho_hoai.urls"
@@ -111,6 +125,44 @@ DATABASES = {
     }
 }
 
+# Optional read replica for summary/stats/history reads (learning/replica.py).
+# SQLITE_REPLICA_PATH points at a copy of db.sqlite3, refreshed with
+# `manage.py refresh_sqlite_replica`; tests mirror it onto "default".
+if os.environ.get("SQLITE_REPLICA_PATH"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["SQLITE_REPLICA_PATH"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["learning.replica.ReplicaRouter"]
+LEARNING_REPLICA_ALIAS = "replica"
+# read-your-writes window after a write when the replica has no refresh stamp
+LEARNING_REPLICA_PIN_SECONDS = 10
+
+# Write-behind answer logging (learning/answer_log.py).
+# Off by default: study_answer writes to the DB inline.
+LEARNING_WRITE_BEHIND = {
+    "ENABLED": os.environ.get("NHO_HOAI_WRITE_BEHIND") == "1",
+    "LOG_DIR": BASE_DIR / "var" / "answer-log",
+    "FLUSH_INTERVAL": 1.0,  # seconds, max lag before a batch is written
+    "BATCH_SIZE": 500,
+}
+
+# Card media (learning/media.py): blobs stored once per SHA-256 under ROOT
+LEARNING_MEDIA = {
+    "ROOT": BASE_DIR / "var" / "media",
+    "MAX_BYTES": 10 * 1024 * 1024,
+    "CONTENT_TYPES": {
+        "audio": ["audio/mpeg", "audio/mp4", "audio/ogg", "audio/wav", "audio/webm"],
+        "image": ["image/png", "image/jpeg", "image/webp", "image/gif"],
+    },
+}
+
+
+# accounts.provisioning: one-time credentials files of provisioning jobs
+PROVISIONING_CREDENTIALS_DIR = BASE_DIR / "var" / "provisioning"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
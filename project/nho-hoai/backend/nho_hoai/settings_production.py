@@ -0,0 +1,49 @@
+"""
+Production profile: DJANGO_SETTINGS_MODULE=nho_hoai.settings_production
+
+- DATABASE_URL=postgres://... -> PostgreSQL with persistent/pooled connections
+  (psycopg[binary,pool] from requirements.txt)
+- otherwise SQLite tuned for concurrent learners: WAL, synchronous=NORMAL,
+  busy_timeout, mmap/cache size, BEGIN IMMEDIATE, persistent connections
+- REPLICA_DATABASE_URL=postgres://... or SQLITE_REPLICA_PATH=... adds the
+  "replica" alias that summaries / stats / history read from
+- REDIS_URL=redis://... makes the default cache shared by all workers (needs
+  `pip install redis`) and turns on the JWT user cache
+"""
+
+import os
+
+from .dbconfig import database_from_env, replica_from_env
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, SECRET_KEY
+
+DEBUG = os.environ.get("DJANGO_DEBUG") == "1"
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)
+
+ALLOWED_HOSTS = [
+    h.strip()
+    for h in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if h.strip()
+]
+
+DATABASES = {
+    "default": database_from_env(os.environ, BASE_DIR / "db.sqlite3"),
+}
+
+replica = replica_from_env(os.environ)
+if replica is not None:
+    DATABASES["replica"] = replica
+
+# JWT_USER_CACHE_ALIAS (see settings.JWT_USER_CACHE_TTL) turns on
+# CachedJWTAuthentication's user cache. It needs a cache every worker shares,
+# so it is set only with Redis; without REDIS_URL every request loads its user
+# from the database (accounts.E001 rejects a per-process cache).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+    JWT_USER_CACHE_ALIAS = "default"
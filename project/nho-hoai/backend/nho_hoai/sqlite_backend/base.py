@@ -0,0 +1,59 @@
+"""
+sqlite3 backend with connect-time tuning, configured through OPTIONS:
+
+    "OPTIONS": {
+        "pragmas": {"journal_mode": "WAL", "synchronous": "NORMAL", ...},
+        "transaction_mode": "IMMEDIATE",
+    }
+
+`pragmas` run on every new connection. `transaction_mode` makes atomic()
+open with BEGIN IMMEDIATE, so a read-then-write transaction takes the write
+lock up front (and waits on busy_timeout) instead of failing with
+"database is locked" when it tries to upgrade (same option as Django 5.1+).
+Read-only blocks wrap their atomic() in `deferred_transactions()` so they
+get a snapshot without queueing behind writers for the lock.
+"""
+
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.sqlite_pragmas = kwargs.pop("pragmas", None) or {}
+
+        mode = kwargs.pop("transaction_mode", None)
+        if mode is not None:
+            mode = str(mode).upper()
+            if mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+                )
+            self.transaction_mode = mode
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.sqlite_pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = getattr(self, "transaction_mode", None)
+        self.cursor().execute(f"BEGIN {mode}" if mode else "BEGIN")
+
+    @contextmanager
+    def deferred_transactions(self):
+        """Transactions opened inside the block start with a plain BEGIN."""
+        self.ensure_connection()  # get_connection_params() sets transaction_mode
+        mode = getattr(self, "transaction_mode", None)
+        self.transaction_mode = None
+        try:
+            yield
+        finally:
+            self.transaction_mode = mode
@@ -0,0 +1,141 @@
+"""
+Worker warm-up, run by wsgi.py / asgi.py before the server starts accepting
+requests (NHO_HOAI_WARMUP=0 turns it off).
+
+Everything Django and DRF otherwise do lazily on the first request is done
+here: URL patterns compiled and the resolver's reverse index populated, DRF
+and simplejwt classes imported, translation catalogs loaded, the learning
+serializers built once, and one connection per database opened. A database
+that cannot be reached is logged, not raised: the worker still boots and
+connects on its first request.
+
+Under `gunicorn --preload` the module is imported by the master: the code
+warm-up is shared by the forked workers. Sockets / sqlite handles must not
+cross a fork, so the master's connections are closed by the `pre_fork` hook
+of nho_hoai/gunicorn.conf.py and each worker connects lazily.
+"""
+
+import inspect
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_urls(resolver):
+    """Compile every pattern's regex (lazy per pattern); returns the count."""
+    count = 0
+    for entry in resolver.url_patterns:
+        entry.pattern.regex
+        count += 1
+        if isinstance(entry, URLResolver):
+            count += _compile_urls(entry)
+    return count
+
+
+def warm_urls():
+    resolver = get_resolver()
+    count = _compile_urls(resolver)
+    resolver.reverse_dict  # populates reverse / namespace lookups
+    return count
+
+
+def warm_rest_framework():
+    # api_settings import their classes on first attribute access
+    from rest_framework.settings import api_settings
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+    from rest_framework_simplejwt.state import token_backend
+
+    for name in (
+        "DEFAULT_RENDERER_CLASSES",
+        "DEFAULT_PARSER_CLASSES",
+        "DEFAULT_AUTHENTICATION_CLASSES",
+        "DEFAULT_PERMISSION_CLASSES",
+        "DEFAULT_THROTTLE_CLASSES",
+        "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+        "DEFAULT_PAGINATION_CLASS",
+        "DEFAULT_VERSIONING_CLASS",
+        "EXCEPTION_HANDLER",
+    ):
+        getattr(api_settings, name)
+    jwt_settings.AUTH_TOKEN_CLASSES
+    token_backend.get_leeway()
+
+
+def warm_translations():
+    # the first gettext() loads every app's catalog for LANGUAGE_CODE
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("This field is required.")
+
+
+def warm_serializers():
+    """Build the fields of every learning serializer once; returns the count."""
+    from learning import serializers as module
+    from rest_framework.serializers import BaseSerializer
+
+    count = 0
+    for cls in vars(module).values():
+        if (
+            inspect.isclass(cls)
+            and issubclass(cls, BaseSerializer)
+            and cls.__module__ == module.__name__
+        ):
+            cls().fields
+            count += 1
+    return count
+
+
+def open_connections():
+    """
+    Connect (and run the connect-time pragmas of) every configured database;
+    returns how many are connected. A database that is down is skipped.
+    """
+    opened = 0
+    for conn in connections.all():
+        try:
+            conn.ensure_connection()
+        except DatabaseError as e:
+            logger.warning("warm-up: database %r unavailable: %s", conn.alias, e)
+        else:
+            opened += 1
+    return opened
+
+
+def close_connections():
+    for conn in connections.all():
+        conn.close()
+
+
+def warm_up(databases=True):
+    """Run every step; returns {step: milliseconds} (also logged)."""
+    steps = [
+        ("urls", warm_urls),
+        ("rest_framework", warm_rest_framework),
+        ("translations", warm_translations),
+        ("serializers", warm_serializers),
+    ]
+    if databases:
+        steps.append(("databases", open_connections))
+
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    logger.info(
+        "worker warm-up: %s",
+        ", ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()),
+    )
+    return timings
+
+
+def warm_up_from_env(databases=True):
+    if os.environ.get("NHO_HOAI_WARMUP", "1") != "0":
+        warm_up(databases=databases)
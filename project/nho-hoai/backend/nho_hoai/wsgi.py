@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from nho_hoai.warmup import warm_up_from_env
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nho_hoai.settings')
 
 application = get_wsgi_application()
+
+# before the server accepts traffic; NHO_HOAI_WARMUP=0 to skip
+warm_up_from_env()